@@ -1,22 +1,29 @@
 from langchain.tools import tool
-from dplibraries.generators.deployment_generator import generate_deployment_files
-from dplibraries.generators.diagram_generator import generate_architecture_diagram
+from dplibraries.agents.analysis_session import AnalysisSession
+from dplibraries.generators.tracing import get_tracer
 
-@tool
-def recommend_deployment(repo_url: str) -> str:
-    """Given a GitHub repo URL, recommend the best deployment platform."""
-    result = generate_deployment_files(repo_url, target_platform=None)
-    return result.get('recommendation', 'No recommendation available.')
+def make_tools(session: AnalysisSession) -> list:
+    """Build the agent tools around a session, so follow-up questions reuse earlier analysis."""
+    tracer = get_tracer()
 
-@tool
-def get_deployment_files(repo_url: str) -> str:
-    """Given a GitHub repo URL, generate deployment config files (e.g., vercel.json, service mapping)."""
-    result = generate_deployment_files(repo_url, target_platform=None)
-    return result.get('files', {})
+    @tool
+    def recommend_deployment(repo_url: str) -> str:
+        """Given a GitHub repo URL, recommend the best deployment platform."""
+        with tracer.span("agent.recommend_deployment", repo_url=repo_url):
+            return session.get(repo_url).recommendation or 'No recommendation available.'
 
-@tool
-def get_architecture_diagram(repo_url: str) -> str:
-    """Given a GitHub repo URL, generate a system architecture Mermaid.js diagram."""
-    return generate_architecture_diagram(repo_url)
+    @tool
+    def get_deployment_files(repo_url: str) -> str:
+        """Given a GitHub repo URL, generate deployment config files (e.g., vercel.json, service mapping)."""
+        with tracer.span("agent.get_deployment_files", repo_url=repo_url):
+            return session.get(repo_url).files()
 
-tools = [recommend_deployment, get_deployment_files, get_architecture_diagram]
+    @tool
+    def get_architecture_diagram(repo_url: str) -> str:
+        """Given a GitHub repo URL, generate a system architecture Mermaid.js diagram."""
+        with tracer.span("agent.get_architecture_diagram", repo_url=repo_url):
+            return session.get(repo_url).diagram
+
+    return [recommend_deployment, get_deployment_files, get_architecture_diagram]
+
+tools = make_tools(AnalysisSession())
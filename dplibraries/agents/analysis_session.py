@@ -0,0 +1,178 @@
+import threading
+from collections import OrderedDict
+
+from dplibraries.generators.deployment_generator import DeploymentGenerator
+from dplibraries.generators.single_flight import SingleFlight
+
+
+def _failed(result) -> bool:
+    """Whether a stage returned one of the generators' error values, which are not worth keeping."""
+    if isinstance(result, dict):
+        return "error" in result or "error.txt" in result
+    return result is None or result == "unknown"
+
+
+class RepositoryAnalysis:
+    def __init__(self, generator: DeploymentGenerator, repo_url: str, revision: str = None):
+        """
+        Pipeline results for one repository at one commit, each computed on first access.
+
+        Stages build on each other (the files reuse the structure, service
+        mapping and diagram), and a stage that fails is retried on the next
+        access instead of being remembered. Concurrent accesses to the same
+        stage share one computation, while different stages run independently:
+        no lock is held while a stage talks to GitHub or OpenAI.
+
+        Args:
+            generator (DeploymentGenerator): Generator used to compute stages.
+            repo_url (str): GitHub URL, e.g. https://github.com/user/repo
+            revision (str): (Optional) commit SHA every stage is pinned to.
+        """
+        self.generator = generator
+        self.repo_url = repo_url
+        parts = repo_url.rstrip("/").split("/")[-2:]
+        self.repo_name = parts[-1]
+        self.full_name = "/".join(parts)
+        self.revision = revision
+        self._results = {}
+        # Guards _results only; computations are coalesced per stage by _flights
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+
+    def _stage(self, key, compute):
+        """Return the result stored under key, computing and storing it if needed."""
+        with self._lock:
+            if key in self._results:
+                return self._results[key]
+        return self._flights.do(key, lambda: self._compute(key, compute))
+
+    def _compute(self, key, compute):
+        """Run compute for key unless a computation that finished meanwhile stored it."""
+        with self._lock:
+            if key in self._results:
+                return self._results[key]
+        result = compute()
+        self._store(key, result)
+        return result
+
+    def _store(self, key, result):
+        """Remember a stage result unless it is an error value."""
+        if not _failed(result):
+            with self._lock:
+                self._results.setdefault(key, result)
+
+    @property
+    def structure(self) -> str:
+        return self._stage("structure", lambda: self.generator._get_project_structure(self.full_name, self.revision))
+
+    @property
+    def recommendation(self) -> str:
+        return self._stage("recommendation", lambda: self.generator.recommend_deployment_target(
+            self.repo_name, self.structure, self.revision
+        ))
+
+    @property
+    def service_mapping(self):
+        return self._stage("service_mapping", lambda: self.generator.analyze_project_services(
+            self.repo_name, self.structure, self.revision
+        ))
+
+    @property
+    def diagram(self) -> str:
+        return self._stage("diagram", lambda: self.generator.diagram_generator.generate_architecture_diagram(
+            self.repo_name, self.structure, self.revision
+        ))
+
+    def files(self, platform: str = None) -> dict:
+        """
+        Deployment files for platform, defaulting to the recommended one.
+
+        The service mapping and diagram are reused when already stored;
+        otherwise ``generate_files`` computes them concurrently with the
+        platform files, and the pieces it returns are stored for later
+        accesses and other platforms.
+        """
+        platform = platform or self.recommendation
+
+        def compute():
+            with self._lock:
+                service_mapping = self._results.get("service_mapping")
+                diagram = self._results.get("diagram")
+            files = self.generator.generate_files(
+                platform,
+                self.repo_name,
+                self.repo_url,
+                project_structure=self.structure,
+                revision=self.revision,
+                service_mapping=service_mapping,
+                architecture_diagram=diagram,
+            )
+            self._store("service_mapping", files.get("service_mapping.json"))
+            self._store("diagram", files.get("architecture_diagram.mmd"))
+            return files
+
+        return self._stage(("files", platform), compute)
+
+    def computed(self) -> list:
+        """Names of the stages already stored."""
+        with self._lock:
+            return [key if isinstance(key, str) else f"{key[0]}:{key[1]}" for key in self._results]
+
+
+class AnalysisSession:
+    def __init__(self, generator: DeploymentGenerator = None, max_repositories: int = 16):
+        """
+        Keeps the analyses of recently discussed repositories for a chat session.
+
+        Analyses are keyed by repository and commit SHA, so a push to the
+        repository starts a fresh analysis while follow-up questions about the
+        same commit reuse every stage already computed. Only the
+        ``max_repositories`` most recently used analyses are kept.
+
+        Args:
+            generator (DeploymentGenerator): (Optional) generator to use. Created on first use.
+            max_repositories (int): Analyses kept before the least recently used is evicted.
+        """
+        self._generator = generator
+        self.max_repositories = max_repositories
+        self._analyses = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def generator(self) -> DeploymentGenerator:
+        with self._lock:
+            if self._generator is None:
+                self._generator = DeploymentGenerator()
+            return self._generator
+
+    def get(self, repo_url: str, ref: str = None) -> RepositoryAnalysis:
+        """
+        Return the analysis of a repository at its current commit.
+
+        Args:
+            repo_url (str): GitHub URL, e.g. https://github.com/user/repo
+            ref (str): (Optional) branch, tag or commit SHA. Defaults to the default branch.
+        """
+        generator = self.generator
+        full_name = "/".join(repo_url.rstrip("/").split("/")[-2:])
+        # One cheap request tells whether the repository moved since the last question
+        revision = generator.resolve_revision(full_name, ref)
+        key = (full_name, revision or ref)
+
+        with self._lock:
+            analysis = self._analyses.get(key)
+            if analysis is None:
+                analysis = RepositoryAnalysis(generator, repo_url, revision or ref)
+                self._analyses[key] = analysis
+            self._analyses.move_to_end(key)
+            while len(self._analyses) > self.max_repositories:
+                self._analyses.popitem(last=False)
+            return analysis
+
+    def __len__(self) -> int:
+        return len(self._analyses)
+
+    def clear(self) -> None:
+        """Forget every analysis."""
+        with self._lock:
+            self._analyses.clear()
@@ -0,0 +1,6 @@
+"""
+Benchmarks module for DeployPilot.
+
+This module contains offline stand-ins for GitHub and OpenAI and a benchmark
+suite built on them. Run it with ``python -m dplibraries.benchmarks``.
+"""
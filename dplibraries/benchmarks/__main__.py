@@ -0,0 +1,3 @@
+from dplibraries.benchmarks.suite import main
+
+main()
@@ -0,0 +1,295 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+from dplibraries.generators.github_access import RateLimitScheduler
+
+# Files sprinkled over synthetic trees so feature extraction and prompt trimming see realistic input
+MANIFESTS = ["package.json", "requirements.txt", "Dockerfile", "docker-compose.yml", "main.py", "index.ts"]
+SOURCE_EXTENSIONS = [".py", ".ts", ".js", ".go", ".md", ".json", ".yml"]
+
+
+def synthetic_paths(n_files: int, fanout: int = 8, files_per_dir: int = 20, vendored_share: float = 0.1,
+                    seed: int = 0) -> list:
+    """
+    Return the paths of a synthetic repository in tree order.
+
+    Directories are "a/b/" (trailing slash) and files "a/b/c.py", in the
+    shape of a ``fanout``-ary directory tree holding ``files_per_dir`` files
+    each, deepened until it has room for ``n_files``. Roughly
+    ``vendored_share`` of the files sit under node_modules/ so ignore rules
+    have something to skip, and each top-level directory gets a manifest.
+
+    Args:
+        n_files (int): Number of files.
+        fanout (int): Subdirectories per directory.
+        files_per_dir (int): Files per directory.
+        vendored_share (float): Share of files placed under node_modules/.
+        seed (int): Seed for file extensions.
+    """
+    rng = random.Random(seed)
+    n_vendored = int(n_files * vendored_share)
+    n_source = n_files - n_vendored
+
+    # Breadth-first directories until there is room for every file
+    directories, frontier = [""], [""]
+    while len(directories) * files_per_dir < n_source:
+        frontier = [f"{parent}pkg_{i}/" for parent in frontier for i in range(fanout)]
+        directories.extend(frontier)
+
+    files = []
+    for i in range(n_source):
+        directory = directories[i % len(directories)]
+        if i < len(directories) and directory.count("/") <= 1:
+            name = MANIFESTS[i % len(MANIFESTS)]
+        else:
+            name = f"module_{i}{rng.choice(SOURCE_EXTENSIONS)}"
+        files.append(directory + name)
+    vendored_dirs = ["node_modules/"] + [f"node_modules/lib_{i}/" for i in range(max(1, n_vendored // files_per_dir))]
+    files.extend(f"{vendored_dirs[1 + i % (len(vendored_dirs) - 1)]}index_{i}.js" for i in range(n_vendored))
+
+    # Directories are listed only when they hold files
+    holders = set()
+    for path in files:
+        parts = path.split("/")[:-1]
+        holders.update("/".join(parts[:k]) + "/" for k in range(1, len(parts) + 1))
+    return sorted(holders | set(files), key=lambda p: p.rstrip("/").split("/"))
+
+
+class SyntheticRepository:
+    def __init__(self, paths: list, full_name: str = "bench/synthetic", truncate_over: int = 100000,
+                 latency: float = 0.0):
+        """
+        Offline stand-in for a PyGithub Repository backed by a list of paths.
+
+        Implements the calls the structure walk makes (get_commit,
+        get_git_tree, get_contents) and counts them. Like GitHub, recursive
+        tree listings longer than ``truncate_over`` entries are truncated.
+
+        Args:
+            paths (list): "a/b/" (directory) and "a/b.py" (file) paths, e.g. from ``synthetic_paths``.
+            full_name (str): "owner/name" of the repository.
+            truncate_over (int): Entries a recursive tree listing returns before it is truncated.
+            latency (float): Seconds each call sleeps, to mimic a network round trip.
+        """
+        self.full_name = full_name
+        self.name = full_name.split("/")[-1]
+        self.default_branch = "main"
+        self.head_sha = "0" * 40
+        self.paths = paths
+        self.truncate_over = truncate_over
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+        # Children per directory ("" is the root), in tree order
+        self._children = {"": []}
+        for path in paths:
+            parent = path.rstrip("/").rsplit("/", 1)[0] + "/" if "/" in path.rstrip("/") else ""
+            self._children.setdefault(parent, []).append(path)
+            if path.endswith("/"):
+                self._children.setdefault(path, [])
+
+    def _call(self):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _below(self, base: str):
+        """Yield every path below directory base, in tree order."""
+        for path in self._children.get(base, []):
+            yield path
+            if path.endswith("/"):
+                yield from self._below(path)
+
+    def _element(self, path: str, base: str):
+        is_dir = path.endswith("/")
+        return SimpleNamespace(path=path.rstrip("/")[len(base):], type="tree" if is_dir else "blob",
+                               sha=path if is_dir else "blob")
+
+    def get_commit(self, ref):
+        self._call()
+        return SimpleNamespace(sha=self.head_sha)
+
+    def get_git_tree(self, sha, recursive=False):
+        self._call()
+        base = "" if sha in (self.head_sha, self.default_branch) else sha
+        if not recursive:
+            below = self._children.get(base, [])
+            return SimpleNamespace(sha=sha, tree=[self._element(p, base) for p in below], truncated=False)
+        below = []
+        for path in self._below(base):
+            if len(below) == self.truncate_over:
+                return SimpleNamespace(sha=sha, tree=[self._element(p, base) for p in below], truncated=True)
+            below.append(path)
+        return SimpleNamespace(sha=sha, tree=[self._element(p, base) for p in below], truncated=False)
+
+    def get_contents(self, path, ref=None):
+        self._call()
+        base = path + "/" if path else ""
+        return [
+            SimpleNamespace(name=p.rstrip("/").rsplit("/", 1)[-1], path=p.rstrip("/"),
+                            type="dir" if p.endswith("/") else "file")
+            for p in self._children.get(base, [])
+        ]
+
+
+class FakeGitHub:
+    def __init__(self, repositories: dict):
+        """Offline stand-in for a PyGithub client serving SyntheticRepository objects by "owner/name"."""
+        self.repositories = repositories
+
+    def get_repo(self, full_name):
+        return self.repositories[full_name]
+
+
+class FakeChatServer:
+    def __init__(self, latency: float = 0.5, tokens_per_second: float = 200.0, completion_tokens: int = 200,
+                 host: str = "127.0.0.1", port: int = 0):
+        """
+        Local HTTP server speaking the OpenAI chat completions protocol.
+
+        Requests go through the real OpenAI client (connection pool, retries,
+        streaming parser), only the model is replaced: every reply waits
+        ``latency`` seconds for its first token, then produces
+        ``completion_tokens`` words at ``tokens_per_second``. Streaming
+        requests receive server-sent events as the words are produced.
+
+        Args:
+            latency (float): Seconds before the first token.
+            tokens_per_second (float): Generation rate after the first token.
+            completion_tokens (int): Words per reply.
+            host (str): Interface to listen on.
+            port (int): Port to listen on, 0 for any free port.
+        """
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def client(self, **kwargs):
+        """Return an OpenAI client pointed at this server."""
+        from openai import OpenAI
+        return OpenAI(base_url=self.base_url, api_key="offline", **kwargs)
+
+    def reply(self, body: dict) -> list:
+        """Return the words of the reply to a request; a blank line splits it in two blocks."""
+        words = [f"token{i}" for i in range(self.completion_tokens)]
+        if body.get("response_format", {}).get("type") in ("json_object", "json_schema"):
+            return [json.dumps({"text": " ".join(words)})]
+        half = len(words) // 2
+        return [w + " " for w in words[:half]] + ["\n\n"] + [w + " " for w in words[half:]]
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                with server._lock:
+                    server.requests += 1
+                prompt_tokens = sum(len(m.get("content", "")) for m in body.get("messages", [])) // 4
+                words = server.reply(body)
+                usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(words),
+                         "total_tokens": prompt_tokens + len(words)}
+                time.sleep(server.latency)
+                if body.get("stream"):
+                    self._stream(body, words, usage)
+                else:
+                    time.sleep(len(words) / server.tokens_per_second)
+                    self._send_json({
+                        "id": "chatcmpl-offline", "object": "chat.completion", "created": int(time.time()),
+                        "model": body.get("model", "offline"),
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant", "content": "".join(words)}}],
+                        "usage": usage,
+                    })
+
+            def _send_json(self, payload):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _stream(self, body, words, usage):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+
+                def event(choices, extra=None):
+                    chunk = {"id": "chatcmpl-offline", "object": "chat.completion.chunk", "created": int(time.time()),
+                             "model": body.get("model", "offline"), "choices": choices, **(extra or {})}
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+
+                try:
+                    for word in words:
+                        event([{"index": 0, "delta": {"content": word}, "finish_reason": None}])
+                        time.sleep(1 / server.tokens_per_second)
+                    event([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+                    if body.get("stream_options", {}).get("include_usage"):
+                        event([], {"usage": usage})
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client closed the stream early
+                    pass
+                self.close_connection = True
+
+        return Handler
+
+
+class OfflineClients:
+    def __init__(self, openai_client, github):
+        """
+        Stand-in for ClientRegistry handing fixed offline clients to the generators.
+
+        Args:
+            openai_client: OpenAI client, e.g. ``FakeChatServer.client()``.
+            github: PyGithub-like client, e.g. ``FakeGitHub``.
+        """
+        self._openai = openai_client
+        self._github = github
+        self.github_scheduler = RateLimitScheduler()
+
+    def openai(self):
+        return self._openai
+
+    def github(self):
+        return self._github
@@ -0,0 +1,350 @@
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+from dplibraries.benchmarks.backends import FakeChatServer, FakeGitHub, OfflineClients, SyntheticRepository, synthetic_paths
+from dplibraries.generators.completion_cache import CompletionCache
+from dplibraries.generators.deployment_generator import DeploymentGenerator
+from dplibraries.models.deployment_predictor import DeploymentPredictor
+from dplibraries.models.evaluation import evaluate_predictor, scale_dataset
+from dplibraries.models.feature_extractor import FEATURE_COLUMNS
+
+DEFAULT_SIZES = [10, 100, 1000, 10000, 100000]
+DEFAULT_KS = [1, 3, 5, 7, 9]
+PLATFORMS = ["AWS", "Firebase", "Vercel", "Google Cloud"]
+
+# Imported from the repository root so main.py is importable too
+ROOT = Path(__file__).absolute().parents[2]
+
+# Dependencies that take long to import, and the ones each startup module is allowed to load
+HEAVY_MODULES = ["pandas", "sklearn", "scipy", "openai", "langchain", "tiktoken", "github", "requests", "numpy"]
+STARTUP_MODULES = {
+    "dplibraries.utils": (),
+    "dplibraries.generators": (),
+    "dplibraries.models": (),
+    "dplibraries.models.deployment_predictor": ("numpy",),
+    "dplibraries.generators.deployment_generator": ("github", "requests"),
+    "main": ("github", "requests", "numpy"),
+}
+
+# Run in a fresh interpreter: import argv[1], report the seconds it took and which of argv[2:] it loaded
+STARTUP_PROBE = """
+import importlib, json, sys, time
+start = time.perf_counter()
+importlib.import_module(sys.argv[1])
+seconds = time.perf_counter() - start
+print(json.dumps({"seconds": seconds, "loaded": [m for m in sys.argv[2:] if m in sys.modules]}))
+"""
+
+
+def summarize(samples) -> dict:
+    """Return p50/p95/mean in milliseconds for a list of durations in seconds."""
+    samples = np.asarray(samples, dtype=np.float64) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(samples, 50)), 3),
+        "p95_ms": round(float(np.percentile(samples, 95)), 3),
+        "mean_ms": round(float(samples.mean()), 3),
+        "runs": len(samples),
+    }
+
+
+def measure(fn, repeat: int):
+    """
+    Time repeat calls of fn, then make one more call under tracemalloc for its peak memory.
+
+    Tracing slows Python allocation down a lot, so it is kept out of the timed runs.
+
+    Returns:
+        tuple: (durations in seconds, peak traced memory in bytes, result of the last call)
+    """
+    durations = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        durations.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return durations, peak, result
+
+
+def offline_generator(repository: SyntheticRepository, openai_client=None) -> DeploymentGenerator:
+    """Return a DeploymentGenerator wired to offline backends, with completion caching off."""
+    generator = DeploymentGenerator(OfflineClients(openai_client, FakeGitHub({repository.full_name: repository})))
+    cache = CompletionCache(":memory:", enabled=False)
+    generator.cache = generator.diagram_generator.cache = cache
+    return generator
+
+
+def bench_structure(sizes, repeat: int = 5, github_latency: float = 0.0) -> list:
+    """Time ``_get_project_structure`` in tree and contents mode over synthetic repositories."""
+    rows = []
+    for n_files in sizes:
+        repository = SyntheticRepository(synthetic_paths(n_files), latency=github_latency)
+        generator = offline_generator(repository)
+        for mode in ("tree", "contents"):
+            generator.structure_mode = mode
+            repository.calls = 0
+            durations, peak, structure = measure(lambda: generator._get_project_structure(repository.full_name), repeat)
+            rows.append({
+                "benchmark": "structure",
+                "mode": mode,
+                "files": n_files,
+                **summarize(durations),
+                "github_calls_per_run": repository.calls / (repeat + 1),
+                "lines": structure.count("\n") + 1,
+                "peak_memory_kb": round(peak / 1024, 1),
+            })
+    return rows
+
+
+def bench_pipeline(sizes, server: FakeChatServer, repeat: int = 5, platform: str = "AWS") -> list:
+    """
+    Time ``generate_files`` and the first streamed piece of ``stream_files`` against a fake chat server,
+    then ``generate_files_for_platforms`` over every platform against one ``generate_files``.
+    """
+    rows = []
+    openai_client = server.client(max_retries=0)
+    for n_files in sizes:
+        repository = SyntheticRepository(synthetic_paths(n_files))
+        generator = offline_generator(repository, openai_client)
+        structure = generator._get_project_structure(repository.full_name)
+
+        requests_before = server.requests
+        durations, peak, files = measure(
+            lambda: generator.generate_files(platform, repository.name, project_structure=structure), repeat
+        )
+        calls = (server.requests - requests_before) / (repeat + 1)
+
+        # Before the streams below, whose cancelled requests may still reach the server
+        requests_before = server.requests
+        all_durations, all_peak, results = measure(
+            lambda: generator.generate_files_for_platforms(PLATFORMS, repository.name, project_structure=structure),
+            repeat
+        )
+        all_calls = (server.requests - requests_before) / (repeat + 1)
+
+        def first_piece():
+            events = generator.stream_files(platform, repository.name, project_structure=structure)
+            try:
+                return next(events)
+            finally:
+                events.close()
+
+        first_durations = [measure(first_piece, 1)[0][0] for _ in range(repeat)]
+        tokens = generator.prompt_builder.totals()
+        rows.append({
+            "benchmark": "pipeline",
+            "mode": "separate",
+            "files": n_files,
+            **summarize(durations),
+            "stream_first_piece_p50_ms": summarize(first_durations)["p50_ms"],
+            "openai_calls_per_run": calls,
+            "prompt_tokens_per_call": round(tokens["prompt_tokens"] / max(tokens["calls"], 1)),
+            "peak_memory_kb": round(peak / 1024, 1),
+            "ok": "error.txt" not in files,
+        })
+
+        rows.append({
+            "benchmark": "pipeline",
+            "mode": "all_platforms",
+            "files": n_files,
+            **summarize(all_durations),
+            "vs_one_platform": round(float(np.median(all_durations) / np.median(durations)), 2),
+            "openai_calls_per_run": all_calls,
+            "peak_memory_kb": round(all_peak / 1024, 1),
+            "ok": not any("error.txt" in result for result in results.values()),
+        })
+    return rows
+
+
+def write_dataset(path: str, n_rows: int, seed: int = 0) -> None:
+    """Write a dataset.csv-shaped file of n_rows random repositories."""
+    rng = np.random.default_rng(seed)
+    features = rng.random((n_rows, len(FEATURE_COLUMNS))) < 0.3
+    labels = rng.integers(0, len(PLATFORMS), n_rows)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["repository", "deployment", *FEATURE_COLUMNS])
+        for i in range(n_rows):
+            writer.writerow([f"bench/repo-{i}", PLATFORMS[labels[i]], *("Yes" if v else "No" for v in features[i])])
+
+
+def bench_predictor(sizes, repeat: int = 5, index: str = "exact", n_queries: int = 100) -> list:
+    """Time building a DeploymentPredictor and batch queries over synthetic datasets."""
+    rows = []
+    rng = np.random.default_rng(1)
+    queries = (rng.random((n_queries, len(FEATURE_COLUMNS))) < 0.3).astype(np.uint8)
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in sizes:
+            path = os.path.join(tmp, f"dataset-{n_rows}.csv")
+            write_dataset(path, n_rows)
+            build, build_peak, predictor = measure(lambda: DeploymentPredictor(path, index=index), repeat)
+            query, query_peak, _ = measure(lambda: predictor.predict_batch(queries), repeat)
+            rows.append({
+                "benchmark": "predictor",
+                "mode": index,
+                "files": n_rows,
+                **{f"build_{k}": v for k, v in summarize(build).items() if k != "runs"},
+                **summarize(query),
+                "queries_per_second": round(n_queries / float(np.median(query))),
+                "peak_memory_kb": round(max(build_peak, query_peak) / 1024, 1),
+            })
+    return rows
+
+
+def bench_evaluation(sizes, ks=DEFAULT_KS, folds: int = None, index: str = "exact", dataset_path=None) -> list:
+    """
+    Cross-validate the predictor for each k, on dataset.csv and on synthetic datasets scaled up from it.
+
+    Args:
+        sizes (list): Synthetic dataset sizes in rows; dataset.csv itself is always evaluated first.
+        ks (list): Neighbour counts to sweep.
+        folds (int): (Optional) number of folds. Defaults to leave-one-out.
+        index (str): Predictor neighbour index.
+        dataset_path: Real dataset to evaluate and scale up. Defaults to the repository's dataset.csv.
+
+    Returns:
+        list: one row per dataset and k with accuracy and queries per second
+    """
+    dataset_path = dataset_path or ROOT / "dataset.csv"
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        datasets = [("dataset.csv", dataset_path)]
+        for n_rows in sizes:
+            path = os.path.join(tmp, f"scaled-{n_rows}.csv")
+            scale_dataset(dataset_path, n_rows, path)
+            datasets.append(("scaled", path))
+        for source, path in datasets:
+            predictor = DeploymentPredictor(path, index=index)
+            for result in evaluate_predictor(predictor, ks, folds):
+                rows.append({
+                    "benchmark": "evaluation",
+                    "mode": f"{index}/{source}",
+                    "files": result["rows"],
+                    "k": result["k"],
+                    "folds": result["folds"],
+                    "accuracy": result["accuracy"],
+                    "queries_per_second": result["queries_per_second"],
+                })
+    return rows
+
+
+def bench_startup(modules: dict = None, repeat: int = 5) -> list:
+    """
+    Time importing each module in a fresh interpreter and list the heavy dependencies it loaded.
+
+    Args:
+        modules (dict): Module name -> heavy modules it may load. Defaults to ``STARTUP_MODULES``.
+        repeat (int): Fresh interpreters per module.
+
+    Returns:
+        list: one row per module; "unexpected" names heavy modules loaded beyond the allowed ones
+    """
+    rows = []
+    for module, allowed in (modules or STARTUP_MODULES).items():
+        durations, loaded = [], []
+        for _ in range(repeat):
+            result = subprocess.run([sys.executable, "-c", STARTUP_PROBE, module, *HEAVY_MODULES],
+                                    capture_output=True, text=True, check=True, cwd=ROOT)
+            probe = json.loads(result.stdout)
+            durations.append(probe["seconds"])
+            loaded = probe["loaded"]
+        rows.append({
+            "benchmark": "startup",
+            "mode": "import",
+            "module": module,
+            **summarize(durations),
+            "heavy_modules": ",".join(loaded) or "-",
+            "unexpected": ",".join(m for m in loaded if m not in allowed) or "-",
+        })
+    return rows
+
+
+def print_rows(rows: list) -> None:
+    """Render benchmark rows as one Rich table per benchmark."""
+    from rich.console import Console
+    from rich.table import Table
+
+    console = Console()
+    for benchmark in dict.fromkeys(row["benchmark"] for row in rows):
+        selected = [row for row in rows if row["benchmark"] == benchmark]
+        columns = [key for key in selected[0] if key != "benchmark"]
+        table = Table(title=benchmark)
+        for column in columns:
+            table.add_column(column, justify="right")
+        for row in selected:
+            table.add_row(*(f"{row[c]:,}" if isinstance(row[c], (int, float)) and not isinstance(row[c], bool)
+                            else str(row[c]) for c in columns))
+        console.print(table)
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline DeployPilot benchmarks (no API keys needed)")
+    parser.add_argument("--benchmarks", default="startup,structure,pipeline,predictor,evaluation",
+                        help="Comma-separated subset of: startup, structure, pipeline, predictor, evaluation")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="Comma-separated repository sizes in files (dataset rows for the predictor)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per measurement (default: 5)")
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake model seconds to first token (default: 0.2)")
+    parser.add_argument("--tokens-per-second", type=float, default=500.0, help="Fake model generation rate")
+    parser.add_argument("--completion-tokens", type=int, default=200, help="Words per fake completion")
+    parser.add_argument("--github-latency", type=float, default=0.0, help="Seconds per fake GitHub call")
+    parser.add_argument("--index", default="exact", help="Predictor neighbour index (default: exact)")
+    parser.add_argument("--ks", default=",".join(map(str, DEFAULT_KS)),
+                        help="Comma-separated neighbour counts the evaluation sweeps")
+    parser.add_argument("--folds", type=int, help="Folds of the evaluation (default: leave-one-out)")
+    parser.add_argument("--min-accuracy", type=float,
+                        help="Exit non-zero if any k scores below this accuracy on dataset.csv")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON Lines instead of tables")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> list:
+    args = parse_args(argv)
+    sizes = [int(size) for size in args.sizes.split(",")]
+    selected = set(args.benchmarks.split(","))
+
+    rows = []
+    if "startup" in selected:
+        rows += bench_startup(repeat=args.repeat)
+    if "structure" in selected:
+        rows += bench_structure(sizes, args.repeat, args.github_latency)
+    if "pipeline" in selected:
+        with FakeChatServer(args.latency, args.tokens_per_second, args.completion_tokens) as server:
+            rows += bench_pipeline(sizes, server, args.repeat)
+    if "predictor" in selected:
+        rows += bench_predictor(sizes, args.repeat, args.index)
+    if "evaluation" in selected:
+        ks = [int(k) for k in args.ks.split(",")]
+        rows += bench_evaluation(sizes, ks, args.folds, args.index)
+
+    if args.json:
+        for row in rows:
+            print(json.dumps(row))
+    else:
+        print_rows(rows)
+
+    regressions = [f"{row['module']} loads {row['unexpected']}" for row in rows if row.get("unexpected", "-") != "-"]
+    if regressions:
+        sys.exit("Startup regression: " + "; ".join(regressions))
+    if args.min_accuracy is not None:
+        low = [f"k={row['k']}: {row['accuracy']}" for row in rows
+               if row["benchmark"] == "evaluation" and row["mode"].endswith("/dataset.csv")
+               and row["accuracy"] < args.min_accuracy]
+        if low:
+            sys.exit(f"Accuracy below {args.min_accuracy}: " + "; ".join(low))
+    return rows
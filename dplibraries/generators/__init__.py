@@ -4,5 +4,26 @@ Generators module for DeployPilot.
 This module contains deployment and diagram generators.
 """
 
-from dplibraries.generators.deployment_generator import DeploymentGenerator
-from dplibraries.generators.diagram_generator import DiagramGenerator
\ No newline at end of file
+import importlib
+
+# Exported name -> module defining it; imported on first access (openai, PyGithub)
+_EXPORTS = {
+    "DeploymentGenerator": "dplibraries.generators.deployment_generator",
+    "DiagramGenerator": "dplibraries.generators.diagram_generator",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    """Import exported names on first access, so importing the package loads no heavy dependencies."""
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,150 @@
+import os
+import threading
+from typing import TYPE_CHECKING
+
+from dotenv import load_dotenv
+from github import Auth, Github
+from urllib3.util.retry import Retry
+
+from dplibraries.generators.github_access import ConditionalCache, RateLimitScheduler, connection_class
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+
+class ClientRegistry:
+    def __init__(self, max_connections: int = 20, max_keepalive_connections: int = 10,
+                 keepalive_expiry: float = 30.0, max_retries: int = 3, backoff_factor: float = 0.5,
+                 timeout: float = 120.0):
+        """
+        Process-wide OpenAI and GitHub clients with keep-alive connection pools.
+
+        Clients are built on first use, one per credential, and handed to every
+        generator afterwards, so repeated calls reuse open TCP/TLS connections
+        instead of paying the handshake and the .env parsing again. Clients are
+        safe to share between threads.
+
+        Every GitHub client sends its requests through ``self.github_scheduler``,
+        which keeps them within the rate limit and counts them per repository,
+        and ``self.github_cache``, which turns repeated GETs into conditional
+        requests.
+
+        Args:
+            max_connections (int): Connections each client may hold open at once.
+            max_keepalive_connections (int): Idle OpenAI connections kept for reuse.
+            keepalive_expiry (float): Seconds an idle OpenAI connection is kept.
+            max_retries (int): Retries for failed requests. OpenAI backs off
+                exponentially on its own; GitHub connection errors and 5xx
+                responses wait backoff_factor * 2 ** n seconds. GitHub rate-limit
+                refusals are retried by ``GitHubAdapter`` only, after waiting
+                in ``self.github_scheduler``.
+            backoff_factor (float): Base delay of the GitHub retry backoff.
+            timeout (float): Default request timeout in seconds.
+        """
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+
+        self.github_scheduler = RateLimitScheduler()
+        self.github_cache = ConditionalCache()
+
+        self._lock = threading.Lock()
+        self._env_loaded = False
+        self._openai = {}
+        self._github = {}
+
+    def _getenv(self, name: str):
+        """Read a setting, loading the .env file on the first lookup only."""
+        if not self._env_loaded:
+            load_dotenv()
+            self._env_loaded = True
+        return os.getenv(name)
+
+    def openai(self) -> "OpenAI":
+        """Return the shared OpenAI client for $OPENAI_API_KEY."""
+        # openai takes longer to import than the rest of the package together
+        import httpx
+        from openai import DefaultHttpxClient, OpenAI
+
+        with self._lock:
+            api_key = self._getenv("OPENAI_API_KEY")
+            if not api_key:
+                raise ValueError("OPENAI_API_KEY not found in environment variables. Please check your .env file.")
+            client = self._openai.get(api_key)
+            if client is None:
+                client = OpenAI(
+                    api_key=api_key,
+                    max_retries=self.max_retries,
+                    timeout=self.timeout,
+                    http_client=DefaultHttpxClient(
+                        limits=httpx.Limits(
+                            max_connections=self.max_connections,
+                            max_keepalive_connections=self.max_keepalive_connections,
+                            keepalive_expiry=self.keepalive_expiry,
+                        ),
+                        timeout=self.timeout,
+                    ),
+                )
+                self._openai[api_key] = client
+            return client
+
+    def github(self) -> Github:
+        """Return the shared GitHub client for $GITHUB_TOKEN."""
+        with self._lock:
+            token = self._getenv("GITHUB_TOKEN")
+            if not token:
+                raise ValueError("GITHUB_TOKEN not found in environment variables. Please check your .env file.")
+            client = self._github.get(token)
+            if client is None:
+                client = Github(
+                    auth=Auth.Token(token),
+                    retry=Retry(
+                        total=self.max_retries,
+                        backoff_factor=self.backoff_factor,
+                        # 403/429 refusals are left to GitHubAdapter, whose waits go through the scheduler
+                        status_forcelist=(500, 502, 503, 504),
+                        respect_retry_after_header=False,
+                        raise_on_status=False,
+                    ),
+                    pool_size=self.max_connections,
+                    timeout=int(self.timeout),
+                )
+                # PyGithub's only transport hook (Requester.injectConnectionClasses) is process-wide,
+                # so this client's connection factory is swapped instead; the attribute is private
+                # and PyGithub is pinned in requirements.txt for it
+                if not hasattr(client.requester, "_Requester__connectionClass"):
+                    raise RuntimeError(
+                        "This PyGithub version has no Requester connection factory to route GitHub "
+                        "requests through the rate-limit scheduler; install the version pinned in requirements.txt"
+                    )
+                client.requester._Requester__connectionClass = connection_class(
+                    self.github_scheduler, self.github_cache
+                )
+                self._github[token] = client
+            return client
+
+    def close(self) -> None:
+        """Close every pooled connection; the next lookup builds fresh clients."""
+        with self._lock:
+            for client in self._openai.values():
+                client.close()
+            for client in self._github.values():
+                client.close()
+            self._openai.clear()
+            self._github.clear()
+
+
+_default_registry = None
+_default_registry_lock = threading.Lock()
+
+
+def get_client_registry() -> ClientRegistry:
+    """Return the process-wide client registry, creating it on first use."""
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = ClientRegistry()
+        return _default_registry
@@ -0,0 +1,102 @@
+import json
+import re
+
+# Files generate_files returns for each platform, besides the service mapping and diagram
+PLATFORM_FILES = {
+    "AWS": ["Dockerfile", "terraform.tf"],
+    "Vercel": ["vercel.json"],
+    "Firebase": ["firebase.json"],
+    "Google Cloud": ["deployment.yaml"],
+}
+
+# Models that accept response_format={"type": "json_schema"}; others get JSON mode plus the schema in the prompt
+STRUCTURED_OUTPUT_MODELS = re.compile(r"^(gpt-4o-mini|gpt-4o-20(24-(08|11)|25)|gpt-4\.1|gpt-5|o[1-9])")
+
+COMBINED_PROMPT = """{task}
+
+Also analyze the project structure of {repo_name} and:
+- map files to the cloud provider services (AWS, GCP, Firebase, Vercel, etc.) that should run them, and
+- draw its architecture as a Mermaid.js "graph TD" diagram (without ``` fences).
+
+Respond with a single JSON object matching this JSON schema:
+{schema}
+
+Project Structure:
+{project_structure}
+"""
+
+
+def combined_schema(platform: str) -> dict:
+    """Return the JSON schema of the combined response for a platform."""
+    filenames = PLATFORM_FILES[platform]
+    return {
+        "type": "object",
+        "properties": {
+            "files": {
+                "type": "object",
+                "properties": {name: {"type": "string"} for name in filenames},
+                "required": filenames,
+                "additionalProperties": False,
+            },
+            "service_mapping": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {"path": {"type": "string"}, "service": {"type": "string"}},
+                    "required": ["path", "service"],
+                    "additionalProperties": False,
+                },
+            },
+            "architecture_diagram": {"type": "string"},
+        },
+        "required": ["files", "service_mapping", "architecture_diagram"],
+        "additionalProperties": False,
+    }
+
+
+def response_format(platform: str, model: str) -> dict:
+    """Return the response_format asking the model for the combined JSON object."""
+    if STRUCTURED_OUTPUT_MODELS.match(model):
+        return {
+            "type": "json_schema",
+            "json_schema": {"name": "deployment_artifacts", "strict": True, "schema": combined_schema(platform)},
+        }
+    return {"type": "json_object"}
+
+
+def parse_combined(content: str, platform: str) -> dict:
+    """
+    Validate a combined response and return it as generate_files' filename to content dict.
+
+    Raises:
+        ValueError: if the content is not JSON or does not match ``combined_schema``
+    """
+    try:
+        data = json.loads(content)
+    except (TypeError, json.JSONDecodeError) as e:
+        raise ValueError(f"Combined response is not valid JSON: {e}")
+    if not isinstance(data, dict):
+        raise ValueError("Combined response is not a JSON object")
+
+    files = data.get("files")
+    if not isinstance(files, dict):
+        raise ValueError("Combined response has no 'files' object")
+    missing = [name for name in PLATFORM_FILES[platform] if not isinstance(files.get(name), str)]
+    if missing:
+        raise ValueError(f"Combined response is missing files: {', '.join(missing)}")
+
+    mapping = data.get("service_mapping")
+    if not isinstance(mapping, list) or not all(
+        isinstance(item, dict) and isinstance(item.get("path"), str) and isinstance(item.get("service"), str)
+        for item in mapping
+    ):
+        raise ValueError("Combined response has an invalid 'service_mapping' list")
+
+    diagram = data.get("architecture_diagram")
+    if not isinstance(diagram, str):
+        raise ValueError("Combined response has no 'architecture_diagram' string")
+
+    output = {name: files[name] for name in PLATFORM_FILES[platform]}
+    output["service_mapping.json"] = json.dumps({item["path"]: item["service"] for item in mapping}, indent=2)
+    output["architecture_diagram.mmd"] = diagram.strip()
+    return output
@@ -0,0 +1,259 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from dplibraries.generators.tracing import get_tracer
+
+
+class CompletionCache:
+    def __init__(self, path: str = None, max_entries: int = 10000, ttl: float = 7 * 24 * 3600, enabled: bool = True):
+        """
+        Persistent cache of chat completion results stored in SQLite.
+
+        Entries are addressed by a SHA-256 of the model, temperature, messages
+        and repository revision, so a re-run on an unchanged repository is
+        answered without calling OpenAI.
+
+        Args:
+            path (str): SQLite file. Defaults to $DEPLOYPILOT_CACHE_DIR or ~/.cache/deploypilot.
+            max_entries (int): Least recently used entries beyond this count are evicted.
+            ttl (float): Seconds an entry stays valid. None keeps entries forever.
+            enabled (bool): When False every lookup misses and nothing is stored.
+        """
+        if path is None:
+            cache_dir = os.getenv("DEPLOYPILOT_CACHE_DIR") or Path.home() / ".cache" / "deploypilot"
+            path = str(Path(cache_dir) / "completions.sqlite3")
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = enabled and not os.getenv("DEPLOYPILOT_NO_CACHE")
+        self.hits = 0
+        self.misses = 0
+
+        # Completions run on worker threads, so the connection is shared behind a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS completions ("
+            "key TEXT PRIMARY KEY, content TEXT NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS completions_accessed ON completions (accessed_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model: str, temperature: float, messages: list, revision: str = None,
+                 response_format: dict = None) -> str:
+        """Return the content address for a completion request."""
+        request = {"model": model, "temperature": temperature, "messages": messages, "revision": revision}
+        if response_format is not None:
+            request["response_format"] = response_format
+        payload = json.dumps(request, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        """Return the cached content for key, or None on a miss or expired entry."""
+        if not self.enabled:
+            self.misses += 1
+            return None
+
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, created_at FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE completions SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, content: str) -> None:
+        """Store content under key and evict expired and least recently used entries."""
+        if not self.enabled:
+            return
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions (key, content, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, content, now, now),
+            )
+            if self.ttl is not None:
+                self._conn.execute("DELETE FROM completions WHERE created_at < ?", (now - self.ttl,))
+            if self.max_entries is not None:
+                self._conn.execute(
+                    "DELETE FROM completions WHERE key IN ("
+                    "SELECT key FROM completions ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        """Remove every entry and reset the counters."""
+        with self._lock:
+            self._conn.execute("DELETE FROM completions")
+            self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and the current number of entries."""
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self), "enabled": self.enabled}
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_completion_cache() -> CompletionCache:
+    """Return the process-wide completion cache, creating it on first use."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = CompletionCache()
+        return _default_cache
+
+
+def cached_completion(client, cache: CompletionCache, model: str, messages: list, temperature: float,
+                      timeout: float = None, revision: str = None, on_usage=None, response_format: dict = None,
+                      validate=None, stage: str = None) -> str:
+    """
+    Return the message content of a chat completion, serving repeats from cache.
+
+    Args:
+        client: OpenAI client used on a cache miss.
+        cache (CompletionCache): Cache to consult. None always calls the client.
+        model (str): Chat model name.
+        messages (list): Chat messages sent to the model.
+        temperature (float): Sampling temperature.
+        timeout (float): (Optional) request timeout in seconds.
+        revision (str): (Optional) repository revision the prompt was built from.
+        on_usage: (Optional) called with prompt_tokens, completion_tokens and cached
+            keyword arguments once the result is known. Token counts are None when
+            the API did not report them or the result came from cache.
+        response_format (dict): (Optional) OpenAI response_format, e.g. a JSON schema.
+        validate: (Optional) called with fresh content before it is cached; raise to
+            reject the content so it is neither cached nor returned.
+        stage (str): (Optional) pipeline stage recorded on the "openai.completion" span.
+
+    Returns:
+        str: the completion text
+    """
+    with get_tracer().span("openai.completion", stage=stage, model=model, calls=1) as span:
+        key = None
+        if cache is not None:
+            key = cache.make_key(model, temperature, messages, revision, response_format)
+            content = cache.get(key)
+            if content is not None:
+                span.set(cache_hits=1)
+                if on_usage is not None:
+                    on_usage(prompt_tokens=None, completion_tokens=None, cached=True)
+                return content
+
+        request = {"model": model, "messages": messages, "temperature": temperature, "timeout": timeout}
+        if response_format is not None:
+            request["response_format"] = response_format
+        response = client.chat.completions.create(**request)
+        content = response.choices[0].message.content
+
+        usage = getattr(response, "usage", None)
+        _record_usage(span, usage)
+        if on_usage is not None:
+            on_usage(
+                prompt_tokens=getattr(usage, "prompt_tokens", None),
+                completion_tokens=getattr(usage, "completion_tokens", None),
+                cached=False
+            )
+
+        if validate is not None:
+            validate(content)
+        if cache is not None and content is not None:
+            cache.set(key, content)
+        return content
+
+
+def _record_usage(span, usage) -> None:
+    """Copy the token counts an API response reported onto a span."""
+    span.set(cache_hits=0)
+    for key in ("prompt_tokens", "completion_tokens"):
+        if getattr(usage, key, None) is not None:
+            span.set(**{key: getattr(usage, key)})
+
+
+def stream_completion(client, cache: CompletionCache, model: str, messages: list, temperature: float,
+                      timeout: float = None, revision: str = None, on_usage=None, stage: str = None):
+    """
+    Yield the text of a chat completion as it is generated, serving repeats from cache.
+
+    Takes the same arguments as ``cached_completion``. A cached result is
+    yielded as a single piece. The result is cached (and reported to
+    on_usage) only once the stream has been read to the end; closing the
+    generator early closes the HTTP response without caching anything.
+
+    Yields:
+        str: successive pieces of the completion text
+    """
+    # Not activated: the span stays open across yields to the consumer
+    with get_tracer().span("openai.completion", activate=False, stage=stage, model=model, calls=1,
+                           streamed=True) as span:
+        key = None
+        if cache is not None:
+            key = cache.make_key(model, temperature, messages, revision)
+            content = cache.get(key)
+            if content is not None:
+                span.set(cache_hits=1)
+                if on_usage is not None:
+                    on_usage(prompt_tokens=None, completion_tokens=None, cached=True)
+                yield content
+                return
+
+        response = client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            timeout=timeout,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        parts, usage = [], None
+        try:
+            for chunk in response:
+                usage = getattr(chunk, "usage", None) or usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    if not parts:
+                        span.set(first_piece_s=time.perf_counter() - span._start)
+                    parts.append(chunk.choices[0].delta.content)
+                    yield parts[-1]
+        finally:
+            close = getattr(response, "close", None)
+            if close is not None:
+                close()
+
+        _record_usage(span, usage)
+        if on_usage is not None:
+            on_usage(
+                prompt_tokens=getattr(usage, "prompt_tokens", None),
+                completion_tokens=getattr(usage, "completion_tokens", None),
+                cached=False
+            )
+        content = "".join(parts)
+        if cache is not None:
+            cache.set(key, content)
@@ -1,32 +1,78 @@
-import os
-from dotenv import load_dotenv
-from github import Github, ContentFile
-from openai import OpenAI
+import hashlib
+import json
+import queue
+import threading
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from github import GithubException
+from dplibraries.generators.clients import ClientRegistry, get_client_registry
+from dplibraries.generators.combined_output import (
+    COMBINED_PROMPT, PLATFORM_FILES, combined_schema, parse_combined, response_format
+)
+from dplibraries.generators.completion_cache import cached_completion, get_completion_cache, stream_completion
 from dplibraries.generators.diagram_generator import DiagramGenerator
+from dplibraries.generators.project_structure import DEFAULT_IGNORE, is_ignored, render_structure
+from dplibraries.generators.prompt_builder import PromptBuilder
+from dplibraries.generators.single_flight import get_single_flight
+from dplibraries.generators.tracing import get_tracer
+
+# Request for each supported platform's deployment files
+PLATFORM_PROMPTS = {
+    "AWS": "Generate a Dockerfile and a Terraform config for deploying {repo_name} to AWS ECS.",
+    "Vercel": "Generate a vercel.json file for deploying {repo_name} (Next.js app) to Vercel.",
+    "Firebase": "Generate a firebase.json and Firestore rules for {repo_name}.",
+    "Google Cloud": "Generate Kubernetes YAML for deploying {repo_name} to GKE.",
+}
+
+def _missing(error: Exception) -> bool:
+    """Whether a GitHub error means the object does not exist (404, or 409 for an empty repository)."""
+    return isinstance(error, GithubException) and error.status in (404, 409)
 
 class DeploymentGenerator:
-    def __init__(self):
-        """Initialize OpenAI and GitHub clients."""
-        load_dotenv()
-
-        openai_api_key = os.getenv("OPENAI_API_KEY")
-        if not openai_api_key:
-            raise ValueError("OPENAI_API_KEY not found in .env")
-
-        github_token = os.getenv("GITHUB_TOKEN")
-        if not github_token:
-            raise ValueError("GITHUB_TOKEN not found in .env")
+    def __init__(self, clients: ClientRegistry = None):
+        """
+        Initialize OpenAI and GitHub clients.
 
-        self.client = OpenAI(api_key=openai_api_key)
-        self.gh = Github(github_token)
-        self.diagram_generator = DiagramGenerator()
+        Args:
+            clients (ClientRegistry): (Optional) source of pooled clients. Defaults to the process-wide registry.
+        """
+        clients = clients or get_client_registry()
+        self.client = clients.openai()
+        self.gh = clients.github()
+        # Shared with every other GitHub client of the process; counts requests per repository
+        self.github_scheduler = clients.github_scheduler
+        self.diagram_generator = DiagramGenerator(clients)
 
         self.model = "gpt-3.5-turbo"
         self.temperature = 0.7
+        self.structure_mode = "tree"
+        self.structure_budgets = {
+            "max_depth": 10,
+            "max_entries": 2000,
+            "max_dir_entries": 200,
+            "ignore": list(DEFAULT_IGNORE),
+        }
+
+        # Seconds allowed per completion; generate_files runs its three completions in parallel
+        self.request_timeout = 120.0
+        self.parallel = True
+        # "separate" asks for service mapping, diagram and platform files in three completions;
+        # "combined" asks for all of them in one structured JSON completion
+        self.generation_mode = "separate"
+
+        # Completions are cached on disk by prompt and repository commit SHA
+        self.cache = get_completion_cache()
+        self.revisions = {}
+        # Concurrent identical requests (same repository, commit, platform and stage) share one call
+        self.single_flight = get_single_flight()
 
-    def recommend_deployment_target(self, repo_name: str, project_structure: str) -> str:
+        # Prompts are trimmed to a token budget; both generators share one token ledger
+        self.prompt_builder = PromptBuilder(self.model)
+        self.diagram_generator.prompt_builder = self.prompt_builder
+
+    def recommend_deployment_target(self, repo_name: str, project_structure: str, revision: str = None) -> str:
         """Use OpenAI to recommend a suitable deployment platform based on the repo."""
-        prompt = f"""
+        prompt = self.prompt_builder.build(
+            """
         Given the following project structure for a GitHub repository named '{repo_name}', suggest the most appropriate deployment platform 
         from the following options: AWS, Firebase, Vercel, Google Cloud.
 
@@ -34,69 +80,244 @@ class DeploymentGenerator:
 
         Project Structure:
         {project_structure}
-        """
+        """,
+            project_structure,
+            repo_name=repo_name
+        )
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a deployment strategy expert."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3
+            messages = [
+                {"role": "system", "content": "You are a deployment strategy expert."},
+                {"role": "user", "content": prompt}
+            ]
+            content = self._coalesce(
+                repo_name, revision, None, "recommendation", project_structure,
+                lambda: self._complete(messages, temperature=0.3, revision=revision, stage="recommendation")
             )
-            return response.choices[0].message.content.strip()
+            return content.strip()
         except Exception as e:
             return "unknown"
 
-    def _get_project_structure(self, full_repo_name: str) -> str:
-        """Generate a tree-like textual structure of the GitHub repository."""
+    def _get_project_structure(self, full_repo_name: str, ref: str = None, **budgets) -> str:
+        """
+        Generate a tree-like textual structure of the GitHub repository.
+
+        By default the whole tree is fetched with a single recursive git tree
+        request. Set ``self.structure_mode = "contents"`` to walk the contents
+        API one directory at a time instead. The listing is bounded by
+        ``self.structure_budgets`` (see ``iter_project_structure``).
+
+        Args:
+            full_repo_name (str): Repository in "owner/name" form.
+            ref (str): (Optional) branch, tag or commit SHA. Defaults to the default branch.
+            **budgets: Overrides for ``self.structure_budgets``.
+
+        Returns:
+            str: one line per entry, indented two spaces per level, directories suffixed with "/"
+        """
+        budgets = {**self.structure_budgets, **budgets}
+
+        def walk():
+            repo = self.gh.get_repo(full_repo_name)
+            revision = self.resolve_revision(full_repo_name, ref, repo=repo)
+            return "\n".join(self._render_structure(repo, revision or ref, budgets)), revision
+
+        # Concurrent walks of the same repository, ref and budgets share one walk, possibly
+        # led by another generator, so every caller records the commit the walk was pinned to
+        key = (full_repo_name.lower(), ref, None, "structure", self.structure_mode,
+               json.dumps(budgets, sort_keys=True))
+        with get_tracer().span("github.structure", repo=full_repo_name, mode=self.structure_mode) as span:
+            before = self.github_usage(full_repo_name)
+            structure, revision = self.single_flight.do(key, walk)
+            if revision:
+                self.revisions[full_repo_name] = revision
+            else:
+                self.revisions.pop(full_repo_name, None)
+            after = self.github_usage(full_repo_name)
+            span.set(lines=structure.count("\n") + 1 if structure else 0,
+                     **{key: after[key] - before[key] for key in after})
+            return structure
+
+    def iter_project_structure(self, full_repo_name: str, ref: str = None, **budgets):
+        """
+        Yield the lines of ``_get_project_structure`` as the tree is read.
+
+        Args:
+            full_repo_name (str): Repository in "owner/name" form.
+            ref (str): (Optional) branch, tag or commit SHA. Defaults to the default branch.
+            **budgets: Overrides for ``self.structure_budgets``: max_depth, max_entries,
+                max_dir_entries (None for no limit) and ignore (list of globs).
+
+        Yields:
+            str: structure lines, with "… N more entries in dir/" where a budget hid entries
+        """
+        budgets = {**self.structure_budgets, **budgets}
         repo = self.gh.get_repo(full_repo_name)
-        contents = repo.get_contents("")
-        structure = []
-
-        def traverse_dir(contents, prefix=""):
-            for content in contents:
-                if content.type == "dir":
-                    structure.append(f"{prefix}{content.name}/")
-                    try:
-                        inner = repo.get_contents(content.path)
-                        traverse_dir(inner, prefix + "  ")
-                    except Exception:
-                        continue
-                else:
-                    structure.append(f"{prefix}{content.name}")
 
-        traverse_dir(contents)
-        return "\n".join(structure)
+        # Pin the walk to one commit; its SHA also keys the completion cache
+        ref = self.resolve_revision(full_repo_name, ref, repo=repo) or ref
+        yield from self._render_structure(repo, ref, budgets)
+
+    def _render_structure(self, repo, ref: str, budgets: dict):
+        """Yield the structure lines of repo at ref within budgets."""
+        hidden_dirs = set()
+        entries, cheap = self._structure_entries(repo, ref, budgets, self.structure_mode, hidden_dirs)
+        # In the contents walk every directory is a request, so stop reading once the budget is spent
+        yield from render_structure(entries, count_hidden=cheap, hidden_dirs=hidden_dirs, **budgets)
+
+    def _structure_entries(self, repo, ref: str, budgets: dict, mode: str = "tree", hidden_dirs: set = None):
+        """
+        Return the (path, is_dir) entries the structure is rendered from, in tree order.
+
+        Directories too deep for ``budgets`` or ignored by them are listed
+        without their contents, as are those in ``hidden_dirs``: the renderer
+        consuming the entries adds the directories its budgets hide there
+        before the walk would fetch their contents.
 
-    def analyze_project_services(self, repo_name: str, project_structure: str) -> dict:
+        Returns:
+            tuple: (lazy iterator of entries, whether reading every entry is cheap)
+        """
+        max_depth, ignore = budgets["max_depth"], budgets["ignore"]
+
+        def descend(path):
+            """Whether a directory's contents are worth fetching at all."""
+            if hidden_dirs and path in hidden_dirs:
+                hidden_dirs.discard(path)
+                return False
+            too_deep = max_depth is not None and path.count("/") + 1 >= max_depth
+            return not too_deep and not is_ignored(path, ignore)
+
+        tree = None
+        if mode != "contents":
+            try:
+                tree = repo.get_git_tree(ref or repo.default_branch, recursive=True)
+            except GithubException as e:
+                # Empty repositories have no git tree; anything else (rate limits included) is an error
+                if not _missing(e):
+                    raise
+
+        if tree is not None:
+            return self._iter_tree_entries(repo, tree, descend), True
+        return self._iter_contents_entries(repo, ref, descend), False
+
+    def _coalesce(self, repo: str, revision: str, platform: str, stage: str, project_structure: str, fn):
+        """
+        Run fn, sharing the call with concurrent requests for the same repository, commit, platform and stage.
+
+        A digest of the project structure is part of the key, so requests
+        with different structure budgets, or without a known commit, never
+        share a result.
+        """
+        digest = hashlib.sha1((project_structure or "").encode("utf-8")).hexdigest()
+        key = (repo.lower(), revision, platform, stage, self.model, digest)
+        return self.single_flight.do(key, fn)
+
+    def github_usage(self, full_repo_name: str) -> dict:
+        """Return the GitHub requests spent on a repository so far, and how many were 304 Not Modified."""
+        return self.github_scheduler.usage(full_repo_name)
+
+    def resolve_revision(self, full_repo_name: str, ref: str = None, repo=None):
+        """
+        Return the commit SHA a branch, tag or SHA points at and remember it in ``self.revisions``.
+
+        Args:
+            full_repo_name (str): Repository in "owner/name" form.
+            ref (str): (Optional) branch, tag or commit SHA. Defaults to the default branch.
+            repo: (Optional) already fetched PyGithub repository.
+
+        Returns:
+            str: the commit SHA, or None if it could not be resolved
+        """
+        try:
+            repo = repo or self.gh.get_repo(full_repo_name)
+            sha = repo.get_commit(ref or repo.default_branch).sha
+        except GithubException as e:
+            # Unknown refs are a 422; empty repositories have no commit
+            if not _missing(e) and e.status != 422:
+                raise
+            self.revisions.pop(full_repo_name, None)
+            return None
+        self.revisions[full_repo_name] = sha
+        return sha
+
+    def _iter_tree_entries(self, repo, tree, descend, base_path: str = ""):
+        """
+        Yield (path, is_dir) pairs for every entry below a recursive git tree, in git order.
+
+        If GitHub reports the recursive listing as truncated, the tree is
+        listed one level deep and each subdirectory worth descending into is
+        fetched recursively on its own, so only oversized subtrees pay for
+        extra requests.
+        """
+        if not tree.truncated:
+            for element in tree.tree:
+                yield f"{base_path}{element.path}", element.type == "tree"
+            return
+
+        for element in repo.get_git_tree(tree.sha).tree:
+            path = f"{base_path}{element.path}"
+            if element.type != "tree":
+                yield path, False
+                continue
+            yield path, True
+            if not descend(path):
+                continue
+            try:
+                subtree = repo.get_git_tree(element.sha, recursive=True)
+            except GithubException as e:
+                if not _missing(e):
+                    raise
+                continue
+            yield from self._iter_tree_entries(repo, subtree, descend, path + "/")
+
+    def _iter_contents_entries(self, repo, ref: str, descend, path: str = ""):
+        """Yield (path, is_dir) pairs with one contents API request per directory."""
+        kwargs = {"ref": ref} if ref else {}
+        for content in repo.get_contents(path, **kwargs):
+            if content.type != "dir":
+                yield content.path, False
+                continue
+            yield content.path, True
+            if not descend(content.path):
+                continue
+            try:
+                yield from self._iter_contents_entries(repo, ref, descend, content.path)
+            except GithubException as e:
+                if not _missing(e):
+                    raise
+
+    def analyze_project_services(self, repo_name: str, project_structure: str, revision: str = None) -> dict:
         """Ask OpenAI to map files to cloud services."""
-        prompt = (
-            f"""Analyze the following project structure for {repo_name} and determine which cloud provider services 
+        try:
+            return self._complete(
+                self._service_mapping_messages(repo_name, project_structure),
+                revision=revision,
+                stage="service_mapping"
+            )
+        except Exception as e:
+            return {"error": f"Service analysis failed: {str(e)}"}
+
+    def _service_mapping_messages(self, repo_name: str, project_structure: str) -> list:
+        """Build the chat messages asking for the service mapping."""
+        prompt = self.prompt_builder.build(
+            """Analyze the following project structure for {repo_name} and determine which cloud provider services 
             (AWS, GCP, Firebase, Vercel, etc.) should be used for each file based on its functionality.
 
             Provide the response in JSON format with file paths as keys and the recommended cloud services as values.
 
             Project Structure:
             {project_structure}
-            """
+            """,
+            project_structure,
+            repo_name=repo_name
         )
+        return [
+            {"role": "system", "content": "You are a cloud infrastructure expert."},
+            {"role": "user", "content": prompt}
+        ]
 
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a cloud infrastructure expert."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=self.temperature
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            return {"error": f"Service analysis failed: {str(e)}"}
-
-    def generate_files(self, deployment_type: str, repo_name: str, repo_url: str = None, project_structure: str = None) -> dict:
+    def generate_files(self, deployment_type: str, repo_name: str, repo_url: str = None, project_structure: str = None,
+                       revision: str = None, service_mapping=None, architecture_diagram: str = None) -> dict:
         """
         Generate deployment files, analyze services, and create diagram.
 
@@ -105,55 +326,369 @@ class DeploymentGenerator:
             repo_name (str): Name of the repo (used in prompts)
             repo_url (str): GitHub URL, e.g. https://github.com/user/repo
             project_structure (str): (Optional) project file layout as string
+            revision (str): (Optional) commit SHA the structure was taken from, used as part of the cache key
+            service_mapping: (Optional) result of ``analyze_project_services`` to reuse instead of asking again
+            architecture_diagram (str): (Optional) previously generated diagram to reuse
 
         Returns:
             dict: mapping of filenames to content
         """
-        prompts = {
-            "AWS": f"Generate a Dockerfile and a Terraform config for deploying {repo_name} to AWS ECS.",
-            "Vercel": f"Generate a vercel.json file for deploying {repo_name} (Next.js app) to Vercel.",
-            "Firebase": f"Generate a firebase.json and Firestore rules for {repo_name}.",
-            "Google Cloud": f"Generate Kubernetes YAML for deploying {repo_name} to GKE.",
-        }
-
-        if deployment_type not in prompts:
+        if deployment_type not in PLATFORM_PROMPTS:
             return {"error.txt": f"No template available for {deployment_type}"}
+        prompt = PLATFORM_PROMPTS[deployment_type].format(repo_name=repo_name)
+
+        with get_tracer().span("generate_files", platform=deployment_type, mode=self.generation_mode) as span:
+            files = self._generate_files(deployment_type, prompt, repo_name, repo_url, project_structure, revision,
+                                         service_mapping, architecture_diagram)
+            span.set(failed="error.txt" in files)
+            return files
 
+    def _generate_files(self, deployment_type: str, prompt: str, repo_name: str, repo_url: str,
+                        project_structure: str, revision: str, service_mapping, architecture_diagram: str) -> dict:
+        """The body of ``generate_files``, inside its span."""
         try:
-            # Auto-generate project structure if not provided
-            if not project_structure and repo_url:
-                parts = repo_url.rstrip("/").split("/")[-2:]
-                full_repo_name = "/".join(parts)
-                project_structure = self._get_project_structure(full_repo_name)
+            repo, project_structure, revision = self._resolve_structure(repo_name, repo_url, project_structure,
+                                                                        revision)
+
+            def shared(platform, stage, fn):
+                return lambda: self._coalesce(repo, revision, platform, stage, project_structure, fn)
+
+            if self.generation_mode == "combined" and service_mapping is None and architecture_diagram is None:
+                return dict(shared(deployment_type, "combined", lambda: self._generate_combined(
+                    deployment_type, prompt, repo_name, project_structure, revision
+                ))())
+
+            # The service mapping and diagram do not depend on the platform, so requests for any platform share them
+            stages = {"output": shared(deployment_type, "platform_files",
+                                       lambda: self._generate_platform_output(prompt, revision))}
+            if service_mapping is None:
+                stages["service_mapping"] = shared(None, "service_mapping", lambda: self.analyze_project_services(
+                    repo_name, project_structure, revision
+                ))
+            if architecture_diagram is None:
+                stages["architecture_diagram"] = shared(None, "architecture_diagram", lambda: (
+                    self.diagram_generator.generate_architecture_diagram(repo_name, project_structure, revision)
+                ))
+            results = self._run_stages(stages)
+            service_mapping = results.get("service_mapping", service_mapping)
+            architecture_diagram = results.get("architecture_diagram", architecture_diagram)
+            return self._assemble_files(deployment_type, results["output"], service_mapping, architecture_diagram)
 
-            service_mapping = self.analyze_project_services(repo_name, project_structure)
-            architecture_diagram = self.diagram_generator.generate_architecture_diagram(repo_name, project_structure)
+        except Exception as e:
+            return {"error.txt": f"An error occurred: {str(e)}"}
 
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a DevOps expert."},
-                    {"role": "user", "content": prompts[deployment_type]}
-                ],
-                temperature=self.temperature
-            )
+    def generate_files_for_platforms(self, deployment_types: list, repo_name: str, repo_url: str = None,
+                                     project_structure: str = None, revision: str = None) -> dict:
+        """
+        Generate the deployment files of several platforms in one pass.
 
-            output = response.choices[0].message.content
+        The structure, service mapping and diagram do not depend on the
+        platform, so they are computed once, while the platform files of
+        every platform are asked for concurrently with them. A platform whose
+        completion fails gets an error.txt without failing the others. The
+        stages always run separately, whatever ``self.generation_mode``, as a
+        combined completion could not be shared between platforms.
 
-            file_mappings = {
-                "AWS": {"Dockerfile": output.split("\n\n")[0], "terraform.tf": output.split("\n\n")[1]},
-                "Vercel": {"vercel.json": output},
-                "Firebase": {"firebase.json": output},
-                "Google Cloud": {"deployment.yaml": output},
+        Args:
+            deployment_types (list): Platforms, e.g. ["AWS", "Vercel"]
+            repo_name, repo_url, project_structure, revision: as for ``generate_files``
+
+        Returns:
+            dict: platform -> mapping of filenames to content, as ``generate_files`` returns it
+        """
+        platforms = list(dict.fromkeys(deployment_types))
+        with get_tracer().span("generate_files_for_platforms", platforms=len(platforms)) as span:
+            results = self._generate_files_for_platforms(platforms, repo_name, repo_url, project_structure,
+                                                         revision)
+            span.set(failed=sum("error.txt" in files for files in results.values()))
+            return results
+
+    def _generate_files_for_platforms(self, platforms: list, repo_name: str, repo_url: str,
+                                      project_structure: str, revision: str) -> dict:
+        """The body of ``generate_files_for_platforms``, inside its span."""
+        results = {platform: {"error.txt": f"No template available for {platform}"}
+                   for platform in platforms if platform not in PLATFORM_PROMPTS}
+        supported = [platform for platform in platforms if platform in PLATFORM_PROMPTS]
+        if not supported:
+            return results
+
+        def isolated(fn):
+            """Return a platform stage's exception instead of raising it, so it cannot cancel the others."""
+            def run():
+                try:
+                    return fn()
+                except Exception as e:
+                    return e
+            return run
+
+        try:
+            repo, project_structure, revision = self._resolve_structure(repo_name, repo_url, project_structure,
+                                                                        revision)
+
+            def shared(platform, stage, fn):
+                return lambda: self._coalesce(repo, revision, platform, stage, project_structure, fn)
+
+            stages = {
+                "service_mapping": shared(None, "service_mapping", lambda: self.analyze_project_services(
+                    repo_name, project_structure, revision
+                )),
+                "architecture_diagram": shared(None, "architecture_diagram", lambda: (
+                    self.diagram_generator.generate_architecture_diagram(repo_name, project_structure, revision)
+                )),
             }
+            for platform in supported:
+                prompt = PLATFORM_PROMPTS[platform].format(repo_name=repo_name)
+                stages[f"output:{platform}"] = isolated(shared(
+                    platform, "platform_files", lambda prompt=prompt: self._generate_platform_output(prompt, revision)
+                ))
+            done = self._run_stages(stages)
+        except Exception as e:
+            results.update({platform: {"error.txt": f"An error occurred: {str(e)}"} for platform in supported})
+            return {platform: results[platform] for platform in platforms}
+
+        for platform in supported:
+            try:
+                output = done[f"output:{platform}"]
+                if isinstance(output, Exception):
+                    raise output
+                results[platform] = self._assemble_files(platform, output, done["service_mapping"],
+                                                         done["architecture_diagram"])
+            except Exception as e:
+                results[platform] = {"error.txt": f"An error occurred: {str(e)}"}
+        return {platform: results[platform] for platform in platforms}
+
+    def _resolve_structure(self, repo_name: str, repo_url: str, project_structure: str, revision: str):
+        """
+        Fetch the project structure and commit of repo_url unless given.
 
-            final_output = file_mappings[deployment_type]
-            final_output["service_mapping.json"] = service_mapping
-            final_output["architecture_diagram.mmd"] = architecture_diagram
-            return final_output
+        Returns:
+            tuple: (repository name completions are shared under, structure, revision)
+        """
+        repo = repo_name
+        if repo_url:
+            parts = repo_url.rstrip("/").split("/")[-2:]
+            full_repo_name = repo = "/".join(parts)
+            if not project_structure:
+                project_structure = self._get_project_structure(full_repo_name)
+            revision = revision or self.revisions.get(full_repo_name)
+        return repo, project_structure, revision
+
+    def stream_files(self, deployment_type: str, repo_name: str, repo_url: str = None, project_structure: str = None,
+                     revision: str = None):
+        """
+        Generate the same files as ``generate_files`` while yielding text as the model writes it.
+
+        The platform files, service mapping and diagram stream concurrently
+        (or one after the other when ``self.parallel`` is off), and their
+        pieces are interleaved in arrival order. Closing the generator early
+        stops every stream and caches nothing that was cut short.
+
+        Args:
+            Same as ``generate_files``.
+
+        Yields:
+            tuple: ("platform_files" | "service_mapping" | "architecture_diagram", text piece)
+            events, then a final ("files", dict) event holding what ``generate_files``
+            would have returned, including {"error.txt": ...} on failure
+        """
+        if deployment_type not in PLATFORM_PROMPTS:
+            yield "files", {"error.txt": f"No template available for {deployment_type}"}
+            return
+        prompt = PLATFORM_PROMPTS[deployment_type].format(repo_name=repo_name)
 
+        try:
+            if repo_url:
+                full_repo_name = "/".join(repo_url.rstrip("/").split("/")[-2:])
+                if not project_structure:
+                    project_structure = self._get_project_structure(full_repo_name)
+                revision = revision or self.revisions.get(full_repo_name)
+
+            streams = {
+                "platform_files": lambda: self._stream(
+                    self._platform_messages(prompt), revision, "platform_files"
+                ),
+                "service_mapping": lambda: self._stream(
+                    self._service_mapping_messages(repo_name, project_structure), revision, "service_mapping"
+                ),
+                "architecture_diagram": lambda: self.diagram_generator.stream_architecture_diagram(
+                    repo_name, project_structure, revision
+                ),
+            }
+            texts = {stage: [] for stage in streams}
+            for stage, piece in self._merge_streams(streams):
+                texts[stage].append(piece)
+                yield stage, piece
+            files = self._assemble_files(
+                deployment_type,
+                "".join(texts["platform_files"]),
+                "".join(texts["service_mapping"]),
+                "".join(texts["architecture_diagram"]).strip()
+            )
         except Exception as e:
-            return {"error.txt": f"An error occurred: {str(e)}"}
+            files = {"error.txt": f"An error occurred: {str(e)}"}
+        yield "files", files
+
+    def _merge_streams(self, streams: dict):
+        """
+        Yield (name, piece) from several text streams in arrival order.
+
+        Each stream is read on its own thread. A stream that produces nothing
+        for ``self.request_timeout`` seconds raises TimeoutError, the first
+        failing stream's error is raised, and closing this generator tells
+        every reader thread to close its stream.
+        """
+        if not self.parallel:
+            for name, make_stream in streams.items():
+                for piece in make_stream():
+                    yield name, piece
+            return
+
+        events = queue.Queue()
+        stop = threading.Event()
+        finished = object()
+
+        def read(name, make_stream):
+            try:
+                stream = make_stream()
+                try:
+                    for piece in stream:
+                        if stop.is_set():
+                            break
+                        events.put((name, piece))
+                finally:
+                    stream.close()
+                events.put((name, finished))
+            except Exception as e:
+                events.put((name, e))
+
+        for name, make_stream in streams.items():
+            threading.Thread(target=get_tracer().wrap(read), args=(name, make_stream), daemon=True).start()
+
+        remaining = set(streams)
+        try:
+            while remaining:
+                try:
+                    name, item = events.get(timeout=self.request_timeout)
+                except queue.Empty:
+                    raise TimeoutError(f"Timed out waiting for: {', '.join(sorted(remaining))}")
+                if item is finished:
+                    remaining.discard(name)
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield name, item
+        finally:
+            stop.set()
+
+    def _assemble_files(self, deployment_type: str, output: str, service_mapping, architecture_diagram: str) -> dict:
+        """
+        Turn the platform output and the shared artifacts into the filename to content dict.
+
+        Platforms with several files (AWS) get one blank-line separated block of the output each.
+        """
+        filenames = PLATFORM_FILES[deployment_type]
+        blocks = output.split("\n\n") if len(filenames) > 1 else [output]
+        final_output = {name: blocks[i] for i, name in enumerate(filenames)}
+        final_output["service_mapping.json"] = service_mapping
+        final_output["architecture_diagram.mmd"] = architecture_diagram
+        return final_output
+
+    def _generate_platform_output(self, prompt: str, revision: str = None) -> str:
+        """Ask OpenAI for the platform-specific deployment files."""
+        return self._complete(self._platform_messages(prompt), revision=revision, stage="platform_files")
+
+    def _platform_messages(self, prompt: str) -> list:
+        """Build the chat messages asking for the platform-specific deployment files."""
+        return [
+            {"role": "system", "content": "You are a DevOps expert."},
+            {"role": "user", "content": prompt}
+        ]
+
+    def _generate_combined(self, deployment_type: str, task: str, repo_name: str, project_structure: str,
+                           revision: str = None) -> dict:
+        """
+        Ask for the platform files, service mapping and diagram in one structured completion.
+
+        The structure is sent once instead of three times, and the reply is
+        validated against ``combined_schema``; a reply that does not match
+        raises ValueError and is not cached.
+        """
+        schema = json.dumps(combined_schema(deployment_type))
+        prompt = self.prompt_builder.build(COMBINED_PROMPT, project_structure, task=task, repo_name=repo_name,
+                                           schema=schema)
+        content = self._complete(
+            [
+                {"role": "system", "content": "You are a DevOps and cloud architecture expert. Reply with JSON only."},
+                {"role": "user", "content": prompt}
+            ],
+            revision=revision,
+            stage="combined",
+            response_format=response_format(deployment_type, self.model),
+            validate=lambda content: parse_combined(content, deployment_type)
+        )
+        return parse_combined(content, deployment_type)
+
+    def _complete(self, messages: list, temperature: float = None, revision: str = None, stage: str = None,
+                  **options) -> str:
+        """
+        Run a chat completion through the completion cache and record its tokens under stage.
+
+        ``options`` (response_format, validate) are passed on to ``cached_completion``.
+        """
+        return cached_completion(
+            self.client,
+            self.cache,
+            model=self.model,
+            messages=messages,
+            temperature=self.temperature if temperature is None else temperature,
+            timeout=self.request_timeout,
+            revision=revision,
+            on_usage=lambda **usage: self.prompt_builder.record(stage, messages, **usage),
+            stage=stage,
+            **options
+        )
+
+    def _stream(self, messages: list, revision: str = None, stage: str = None):
+        """Stream a chat completion through the completion cache and record its tokens under stage."""
+        return stream_completion(
+            self.client,
+            self.cache,
+            model=self.model,
+            messages=messages,
+            temperature=self.temperature,
+            timeout=self.request_timeout,
+            revision=revision,
+            on_usage=lambda **usage: self.prompt_builder.record(stage, messages, **usage),
+            stage=stage
+        )
+
+    def _run_stages(self, stages: dict) -> dict:
+        """
+        Run independent stages and return their results by name.
+
+        With ``self.parallel`` set, every stage runs on its own worker thread so
+        the total latency is that of the slowest stage. Each completion is
+        bounded by ``self.request_timeout``; as soon as a stage fails or the
+        deadline passes, the remaining stages are cancelled (their results are
+        discarded if already running) and the error is raised to the caller.
+        """
+        if not self.parallel:
+            return {name: stage() for name, stage in stages.items()}
+
+        executor = ThreadPoolExecutor(max_workers=len(stages))
+        try:
+            tracer = get_tracer()
+            futures = {name: executor.submit(tracer.wrap(stage)) for name, stage in stages.items()}
+            done, pending = wait(futures.values(), timeout=self.request_timeout, return_when=FIRST_EXCEPTION)
+            failed = [future for future in done if future.exception() is not None]
+            if failed:
+                raise failed[0].exception()
+            if pending:
+                late = [name for name, future in futures.items() if future in pending]
+                raise TimeoutError(f"Timed out waiting for: {', '.join(late)}")
+            return {name: future.result() for name, future in futures.items()}
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
 
 
 def generate_deployment_files(repo_url: str, target_platform: str = None) -> dict:
@@ -170,12 +705,14 @@ def generate_deployment_files(repo_url: str, target_platform: str = None) -> dic
     # Get project structure
     project_structure = dg._get_project_structure(full_repo_name)
 
+    revision = dg.revisions.get(full_repo_name)
+
     # Recommend platform if not provided
     if not target_platform:
-        target_platform = dg.recommend_deployment_target(repo_name, project_structure)
+        target_platform = dg.recommend_deployment_target(repo_name, project_structure, revision)
 
     # Generate deployment files
-    files = dg.generate_files(target_platform, repo_name, repo_url, project_structure)
+    files = dg.generate_files(target_platform, repo_name, repo_url, project_structure, revision)
 
     return {
         "recommendation": target_platform,
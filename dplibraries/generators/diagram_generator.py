@@ -1,68 +1,131 @@
-import openai
-import os
-from dotenv import load_dotenv
+from dplibraries.generators.clients import ClientRegistry, get_client_registry
+from dplibraries.generators.completion_cache import cached_completion, get_completion_cache, stream_completion
+from dplibraries.generators.diagram_rules import synthesize_diagram
+from dplibraries.generators.prompt_builder import PromptBuilder
+from dplibraries.generators.tracing import get_tracer
 
 class DiagramGenerator:
-    def __init__(self):
+    def __init__(self, clients: ClientRegistry = None):
         """
-        Initializes the DiagramGenerator by loading API credentials
-        and setting up the OpenAI client.
-        """
-        # Load environment variables from .env file
-        load_dotenv()
-
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY not found in environment variables. Please check your .env file.")
+        Initializes the DiagramGenerator with the shared OpenAI client.
 
-        self.client = openai.OpenAI(api_key=api_key)
+        Args:
+            clients (ClientRegistry): (Optional) source of pooled clients. Defaults to the process-wide registry.
+        """
+        self.client = (clients or get_client_registry()).openai()
 
         # Default configuration
         self.model = "gpt-3.5-turbo"
         self.temperature = 0.7
+        self.request_timeout = 120.0
+        # Diagrams are drawn from the file tree by rules; set refine to have the model rework the draft
+        self.refine = False
+        self.cache = get_completion_cache()
+        self.prompt_builder = PromptBuilder(self.model)
 
-    def generate_architecture_diagram(self, repo_name: str, project_structure: str) -> str:
+    def generate_architecture_diagram(self, repo_name: str, project_structure: str, revision: str = None) -> str:
         """
         Generates a Mermaid.js diagram representing the project architecture.
 
+        The diagram is drawn locally by ``synthesize_diagram``. With
+        ``self.refine`` set, the model is asked to improve that draft, and the
+        draft is returned if the completion fails.
+
         Args:
             repo_name (str): The name of the repository.
             project_structure (str): A textual representation of the project structure.
+            revision (str): (Optional) commit SHA the structure was taken from, used as part of the cache key.
 
         Returns:
             str: Mermaid.js formatted architecture diagram.
         """
-        prompt = (
-            f"""Analyze the following project structure for {repo_name} and generate a Mermaid.js diagram 
-            representing the system architecture, including key services, components, and their interactions.
-            Ensure the output follows Mermaid.js syntax.
-            
-            Example:
-            ```mermaid
-            graph TD;
-                A[Frontend] -->|API Call| B[Backend]
-                B -->|Database Query| C[Database]
-            ```
-            
-            Project Structure:
-            {project_structure}
-            """
-        )
+        return self.refine_draft(repo_name, project_structure, self.draft(repo_name, project_structure), revision)
+
+    def refine_draft(self, repo_name: str, project_structure: str, draft: str, revision: str = None) -> str:
+        """
+        Return the model's rework of a draft diagram, or the draft itself without ``self.refine`` or on failure.
+
+        Takes the arguments of ``generate_architecture_diagram`` plus the draft
+        ``draft`` returned for the same structure.
+        """
+        if not self.refine:
+            return draft
+        messages = self._messages(repo_name, project_structure, draft)
 
         try:
-            response = self.client.chat.completions.create(
+            content = cached_completion(
+                self.client,
+                self.cache,
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert in cloud architecture and visualization."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=self.temperature
+                messages=messages,
+                temperature=self.temperature,
+                timeout=self.request_timeout,
+                revision=revision,
+                on_usage=lambda **usage: self.prompt_builder.record("architecture_diagram", messages, **usage),
+                stage="architecture_diagram"
             )
 
-            return response.choices[0].message.content.strip()
-        
-        except Exception as e:
-            return f"Error generating architecture diagram: {str(e)}"
+            return content.strip() or draft
+
+        except Exception:
+            return draft
+
+    def stream_architecture_diagram(self, repo_name: str, project_structure: str, revision: str = None):
+        """
+        Yields the Mermaid.js diagram in pieces as the model writes it.
+
+        Takes the same arguments as ``generate_architecture_diagram``; joining
+        the pieces and stripping whitespace gives the same diagram. Without
+        ``self.refine`` the draft is yielded in one piece; with it, errors are
+        raised instead of falling back to the draft.
+        """
+        draft = self.draft(repo_name, project_structure)
+        if not self.refine:
+            yield draft
+            return
+        messages = self._messages(repo_name, project_structure, draft)
+        yield from stream_completion(
+            self.client,
+            self.cache,
+            model=self.model,
+            messages=messages,
+            temperature=self.temperature,
+            timeout=self.request_timeout,
+            revision=revision,
+            on_usage=lambda **usage: self.prompt_builder.record("architecture_diagram", messages, **usage),
+            stage="architecture_diagram"
+        )
+
+    def draft(self, repo_name: str, project_structure: str) -> str:
+        """Return the rule-based diagram of a project structure."""
+        with get_tracer().span("diagram.rules", repo=repo_name) as span:
+            diagram = synthesize_diagram(repo_name, project_structure)
+            span.set(lines=diagram.count("\n") + 1)
+            return diagram
+
+    def _messages(self, repo_name: str, project_structure: str, draft: str) -> list:
+        """Build the chat messages asking the model to refine the draft diagram."""
+        prompt = self.prompt_builder.build(
+            """Analyze the following project structure for {repo_name} and improve the Mermaid.js diagram
+            below, drafted from its file names, so that it represents the system architecture, including
+            key services, components, and their interactions. Keep what is right, fix what is wrong.
+            Ensure the output follows Mermaid.js syntax and reply with the diagram only.
+
+            Draft:
+            {draft}
+
+            Project Structure:
+            {project_structure}
+            """,
+            project_structure,
+            repo_name=repo_name,
+            draft=draft
+        )
+
+        return [
+            {"role": "system", "content": "You are an expert in cloud architecture and visualization."},
+            {"role": "user", "content": prompt}
+        ]
 
 
 def generate_architecture_diagram(repo_name: str, project_structure: str) -> str:
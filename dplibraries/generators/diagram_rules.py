@@ -0,0 +1,164 @@
+import re
+
+from dplibraries.generators.project_structure import iter_structure_paths
+from dplibraries.models.feature_extractor import FEATURE_RULES, extract_features
+
+# Mermaid node shapes: (opening, closing) around the quoted label
+SHAPES = {
+    "box": ("[", "]"),
+    "stadium": ("([", "])"),
+    "cylinder": ("[(", ")]"),
+    "hexagon": ("{{", "}}"),
+    "parallelogram": ("[/", "/]"),
+    "subroutine": ("[[", "]]"),
+}
+
+# Components drawn when their feature is detected: node id -> (label, feature, shape, subgraph)
+COMPONENTS = {
+    "frontend": ("Frontend", "has_frontend", "box", None),
+    "realtime": ("Realtime events", "realtime_events", "box", None),
+    "api": ("API / backend", "api_exposed", "box", None),
+    "auth": ("Authentication", "authentication", "hexagon", None),
+    "workers": ("Background workers", "background_jobs", "subroutine", None),
+    "ai": ("AI / ML", "ai_implementation", "hexagon", None),
+    "external": ("External APIs", "external_apis", "stadium", None),
+    "queue": ("Message queue", "message_queues", "parallelogram", "data"),
+    "cache": ("Cache", "caching", "cylinder", "data"),
+    "db": ("Database", "database", "cylinder", "data"),
+    "storage": ("File storage", "storage", "cylinder", "data"),
+    "cicd": ("CI/CD pipeline", "has_cicd", "box", "delivery"),
+    "containers": ("Container images", "uses_containerization", "box", "delivery"),
+    "iac": ("Infrastructure as code", "uses_iac", "box", "delivery"),
+    "hosting": ("Hosting config", "already_deployed", "box", "delivery"),
+}
+
+SUBGRAPHS = {"data": "Data", "delivery": "Build and deploy"}
+
+# Edges from every backend node (the API, each microservice, or the application itself) to a component
+BACKEND_EDGES = {
+    "auth": "verifies users",
+    "queue": "enqueues",
+    "cache": "caches",
+    "db": "queries",
+    "storage": "stores files",
+    "ai": "inference",
+    "external": "HTTP",
+    "realtime": "publishes",
+}
+
+# Edges between components, drawn when both ends exist: (source, target, label, dotted)
+EDGES = [
+    ("frontend", "realtime", "subscribes", False),
+    ("queue", "workers", "consumes", False),
+    ("workers", "db", "queries", False),
+    ("workers", "storage", "stores files", False),
+    ("workers", "ai", "inference", False),
+    ("cicd", "containers", "builds", False),
+    ("cicd", "iac", "applies", False),
+    ("cicd", "hosting", "deploys", False),
+    ("iac", "db", "provisions", True),
+    ("iac", "queue", "provisions", True),
+    ("iac", "cache", "provisions", True),
+    ("iac", "storage", "provisions", True),
+]
+
+_SERVICE_DIR = re.compile(r"^(?:micro)?services/([^/]+)/")
+_PATH_PATTERNS = {feature: re.compile(rule["paths"]) for feature, rule in FEATURE_RULES.items() if "paths" in rule}
+
+
+def _evidence(paths: list, feature: str, limit: int = 2) -> list:
+    """Return the shallowest directories (or top-level files) whose paths set a feature."""
+    pattern = _PATH_PATTERNS.get(feature)
+    if pattern is None:
+        return []
+    found = set()
+    for path in paths:
+        if pattern.search(path.lower()):
+            found.add(path if path.endswith("/") or "/" not in path else path.rsplit("/", 1)[0] + "/")
+    return sorted(found, key=lambda p: (p.count("/"), p))[:limit]
+
+
+def _node(node_id: str, label: str, shape: str, evidence: list = ()) -> str:
+    """Return the Mermaid declaration of a node, with its evidence paths under the label."""
+    text = label + "".join(f"<br/>{path}" for path in evidence)
+    opening, closing = SHAPES[shape]
+    return f'{node_id}{opening}"{text.replace(chr(34), "#quot;")}"{closing}'
+
+
+def synthesize_diagram(repo_name: str, project_structure: str, files: dict = None) -> str:
+    """
+    Draw a Mermaid.js ``graph TD`` architecture diagram from a repository tree, without any model call.
+
+    Components (frontend, API, microservices, workers, queues, databases,
+    CI/CD, infrastructure as code, ...) come from the features
+    ``extract_features`` detects, each labelled with the directories that
+    revealed it, and are wired with fixed rules. The same tree always gives
+    the same diagram.
+
+    Args:
+        repo_name (str): Name of the repository, used when no backend component is detected.
+        project_structure (str): Indented tree as produced by ``DeploymentGenerator._get_project_structure``.
+        files (dict): (Optional) path -> text of manifest files, passed on to ``extract_features``.
+
+    Returns:
+        str: the diagram, without ``` fences
+    """
+    paths = list(iter_structure_paths(project_structure or ""))
+    features = extract_features(project_structure or "", files)
+
+    nodes = {"users": _node("users", "Users", "stadium")}
+    groups = {name: [] for name in SUBGRAPHS}
+    present = {"users"}
+    for node_id, (label, feature, shape, group) in COMPONENTS.items():
+        if node_id == "api" and not (features["api_exposed"] or features["monolith"]):
+            continue
+        if node_id != "api" and not features[feature]:
+            continue
+        present.add(node_id)
+        line = _node(node_id, label, shape, _evidence(paths, feature))
+        if group:
+            groups[group].append(line)
+        else:
+            nodes[node_id] = line
+
+    # Separately deployable services are drawn one by one, behind the API if there is one
+    services = sorted({match.group(1) for match in map(_SERVICE_DIR.match, paths) if match})
+    backends = []
+    if features["microservices"]:
+        for name in services:
+            node_id = "svc_" + re.sub(r"\W", "_", name)
+            nodes[node_id] = _node(node_id, name, "box", [f"services/{name}/"])
+            backends.append(node_id)
+    if "api" in present:
+        backends.insert(0, "api")
+    if not backends:
+        nodes["app"] = _node("app", repo_name or "Application", "box")
+        backends, present = ["app"], present | {"app"}
+
+    edges = [("users", "frontend", "uses", False)] if "frontend" in present else []
+    entry = "frontend" if "frontend" in present else "users"
+    front = ["api"] if "api" in present else backends
+    edges += [(entry, node_id, "API calls" if entry == "frontend" else "uses", False) for node_id in front]
+    if "api" in present:
+        edges += [("api", node_id, "routes", False) for node_id in backends[1:]]
+    for node_id, label in BACKEND_EDGES.items():
+        if node_id in present:
+            edges += [(backend, node_id, label, False) for backend in backends]
+    if "workers" in present and "queue" not in present:
+        edges += [(backend, "workers", "schedules", False) for backend in backends]
+    edges += [edge for edge in EDGES if edge[0] in present and edge[1] in present]
+    if "containers" in present:
+        edges += [("containers", backend, "packages", True) for backend in backends]
+    if "hosting" in present:
+        edges.append(("hosting", "frontend" if "frontend" in present else backends[0], "serves", True))
+
+    lines = ["graph TD", f"    %% Architecture of {repo_name}, inferred from its file tree"]
+    lines += [f"    {line}" for line in nodes.values()]
+    for group, members in groups.items():
+        if members:
+            lines.append(f'    subgraph {group}["{SUBGRAPHS[group]}"]')
+            lines += [f"        {line}" for line in members]
+            lines.append("    end")
+    for source, target, label, dotted in edges:
+        lines.append(f"    {source} {'-.->' if dotted else '-->'}|{label}| {target}")
+    return "\n".join(lines)
@@ -0,0 +1,247 @@
+import hashlib
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+
+import requests
+from github.Requester import HTTPSRequestsConnectionClass
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+_REPO_PATH = re.compile(r"^/repos/([^/]+/[^/?]+)")
+
+
+def repository_of(url: str):
+    """Return the lower-cased "owner/name" for a GitHub API URL under /repos/, or None."""
+    match = _REPO_PATH.match(requests.utils.urlparse(url).path)
+    return match.group(1).lower() if match else None
+
+
+class RateLimitScheduler:
+    def __init__(self, reserve: int = 20, max_wait: float = 3600.0, backoff: float = 60.0, clock=time.time,
+                 sleep=time.sleep):
+        """
+        Shares the GitHub REST rate limit between every thread of the process.
+
+        Budgets are read from the X-RateLimit-Remaining / X-RateLimit-Reset
+        headers of each response. Once only ``reserve`` requests are left, new
+        requests wait for the window to reset instead of being sent and
+        refused, so concurrent analyses are throttled rather than failing
+        half-way through a tree walk.
+
+        Args:
+            reserve (int): Requests kept back for other tools sharing the token.
+            max_wait (float): Longest wait for a reset before a request is sent anyway.
+            backoff (float): Wait when the budget is spent but no response said when it resets.
+            clock: Returns the current Unix time.
+            sleep: Blocks for the given number of seconds.
+        """
+        self.reserve = reserve
+        self.max_wait = max_wait
+        self.backoff = backoff
+        self.clock = clock
+        self.sleep = sleep
+        self.remaining = None
+        self.limit = None
+        self.reset = None
+        # Per repository: requests sent, and how many of them came back 304 Not Modified
+        self.requests = Counter()
+        self.not_modified = Counter()
+        self._lock = threading.Lock()
+
+    def acquire(self, url: str) -> None:
+        """Block until the budget allows another request, then count it against url's repository."""
+        while True:
+            with self._lock:
+                now = self.clock()
+                if self.reset is not None and now >= self.reset:
+                    # A new window started; the next response tells the real budget
+                    self.remaining, self.reset = None, None
+                if self.remaining is None or self.remaining > self.reserve:
+                    if self.remaining is not None:
+                        self.remaining -= 1
+                    self.requests[repository_of(url)] += 1
+                    return
+                if self.reset is None:
+                    # No X-RateLimit-Reset was reported; assume the window ends after the back-off
+                    self.reset = now + self.backoff
+                wait = self.reset - now
+            self.sleep(min(max(wait, 0.0) + 1.0, self.max_wait))
+
+    def update(self, url: str, response) -> None:
+        """Record the budget reported by a response and whether it was a 304."""
+        headers = response.headers
+        with self._lock:
+            if response.status_code == 304:
+                self.not_modified[repository_of(url)] += 1
+            if "X-RateLimit-Remaining" not in headers:
+                return
+            remaining = int(headers["X-RateLimit-Remaining"])
+            reset = float(headers.get("X-RateLimit-Reset", 0)) or None
+            self.limit = int(headers.get("X-RateLimit-Limit", 0)) or self.limit
+            if self.reset is None or (reset is not None and reset > self.reset):
+                self.remaining, self.reset = remaining, reset
+            else:
+                # Responses overtake each other; the lowest count is the most recent
+                self.remaining = min(self.remaining, remaining) if self.remaining is not None else remaining
+
+    def wait_for_reset(self, response) -> None:
+        """Sleep until a refused request may be retried (Retry-After or the reported reset)."""
+        retry_after = response.headers.get("Retry-After")
+        if retry_after is not None:
+            wait = float(retry_after)
+        else:
+            reset = float(response.headers.get("X-RateLimit-Reset", 0))
+            wait = reset - self.clock() + 1.0 if reset else 60.0
+        self.sleep(min(max(wait, 1.0), self.max_wait))
+
+    def usage(self, full_name: str) -> dict:
+        """Return the requests spent on a repository, including those answered by a 304."""
+        full_name = full_name.lower()
+        with self._lock:
+            return {"requests": self.requests[full_name], "not_modified": self.not_modified[full_name]}
+
+
+class ConditionalCache:
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Remembers GET responses with an ETag or Last-Modified header.
+
+        Repeating such a request as a conditional request lets GitHub answer
+        304 Not Modified, which does not count against the rate limit, and the
+        remembered body is served instead. The least recently used responses
+        are dropped once the bodies and headers kept exceed ``max_bytes``.
+        """
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(request) -> str:
+        """Responses differ per URL, media type and credential."""
+        parts = [request.url, request.headers.get("Accept", ""), request.headers.get("Authorization", "")]
+        return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, response) -> None:
+        headers = dict(response.headers)
+        entry = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "headers": headers,
+            "content": response.content,
+            "encoding": response.encoding,
+            "size": len(response.content or b"") + sum(len(k) + len(v) for k, v in headers.items()),
+        }
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous["size"]
+            if entry["size"] > self.max_bytes:
+                return
+            self._entries[key] = entry
+            self.size += entry["size"]
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= evicted["size"]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class GitHubAdapter(HTTPAdapter):
+    def __init__(self, scheduler: RateLimitScheduler, cache: ConditionalCache = None, rate_limit_retries: int = 3,
+                 **kwargs):
+        """
+        requests transport adapter for api.github.com that waits for rate-limit budget,
+        sends conditional requests and retries requests refused for exceeding the limit.
+
+        Args:
+            scheduler (RateLimitScheduler): Shared budget and request counters.
+            cache (ConditionalCache): (Optional) ETag / Last-Modified cache for GET requests.
+            rate_limit_retries (int): Times a 403/429 rate-limit refusal is retried after waiting.
+            **kwargs: passed to HTTPAdapter (max_retries, pool sizes).
+        """
+        super().__init__(**kwargs)
+        self.scheduler = scheduler
+        self.cache = cache
+        self.rate_limit_retries = rate_limit_retries
+
+    def send(self, request, **kwargs):
+        key = entry = None
+        if self.cache is not None and request.method == "GET":
+            key = self.cache.make_key(request)
+            entry = self.cache.get(key)
+            if entry is not None:
+                if entry["etag"]:
+                    request.headers["If-None-Match"] = entry["etag"]
+                if entry["last_modified"]:
+                    request.headers["If-Modified-Since"] = entry["last_modified"]
+
+        for attempt in range(self.rate_limit_retries + 1):
+            self.scheduler.acquire(request.url)
+            response = super().send(request, **kwargs)
+            self.scheduler.update(request.url, response)
+            if not self._rate_limited(response) or attempt == self.rate_limit_retries:
+                break
+            self.scheduler.wait_for_reset(response)
+
+        if response.status_code == 304 and entry is not None:
+            return self._from_cache(entry, response)
+        if key is not None and response.status_code == 200 and (
+                response.headers.get("ETag") or response.headers.get("Last-Modified")):
+            self.cache.set(key, response)
+        return response
+
+    @staticmethod
+    def _rate_limited(response) -> bool:
+        if response.status_code == 429:
+            return True
+        return response.status_code == 403 and (
+            response.headers.get("X-RateLimit-Remaining") == "0" or "Retry-After" in response.headers
+        )
+
+    @staticmethod
+    def _from_cache(entry: dict, not_modified):
+        """Build a 200 response from a cache entry, carrying the 304's fresh headers."""
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = "OK"
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response.headers.update(not_modified.headers)
+        response._content = entry["content"]
+        response.encoding = entry["encoding"]
+        response.url = not_modified.url
+        response.request = not_modified.request
+        response.connection = getattr(not_modified, "connection", None)
+        return response
+
+
+def connection_class(scheduler: RateLimitScheduler, cache: ConditionalCache = None):
+    """
+    Return a PyGithub connection factory whose sessions go through GitHubAdapter.
+
+    The factory keeps PyGithub's retry and pool settings and only swaps the
+    transport adapter.
+    """
+    def make_connection(host, port=None, **kwargs):
+        connection = HTTPSRequestsConnectionClass(host, port, **kwargs)
+        connection.adapter = GitHubAdapter(
+            scheduler,
+            cache,
+            max_retries=connection.retry,
+            pool_connections=connection.pool_size,
+            pool_maxsize=connection.pool_size,
+        )
+        connection.session.mount("https://", connection.adapter)
+        return connection
+
+    return make_connection
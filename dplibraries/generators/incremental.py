@@ -0,0 +1,358 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+from github import GithubException
+
+from dplibraries.generators.deployment_generator import PLATFORM_PROMPTS, DeploymentGenerator, _missing
+from dplibraries.generators.project_structure import render_structure, within_budgets
+from dplibraries.generators.tracing import get_tracer
+
+# The compare API lists at most this many changed files; larger diffs are walked in full
+MAX_COMPARE_FILES = 300
+
+
+def git_order(path: str, is_dir: bool) -> tuple:
+    """Sort key putting (path, is_dir) entries in git tree order, each directory right before its contents."""
+    parts = path.split("/")
+    return tuple(part + "/" for part in parts[:-1]) + (parts[-1] + ("/" if is_dir else ""),)
+
+
+def _parents(path: str):
+    """Yield the directories containing path, innermost first."""
+    while "/" in path:
+        path = path.rsplit("/", 1)[0]
+        yield path
+
+
+def _relative(path: str) -> str:
+    """Return a path as the model wrote it ("./src/app.py", "/src/app.py") relative to the repository root."""
+    return path.removeprefix("./").lstrip("/")
+
+
+def apply_changes(entries: list, changes: list):
+    """
+    Apply the file list of a commit comparison to the entries of its base commit.
+
+    Files are added, removed or moved; directories appear with their first
+    file and disappear with their last one, as they do in git. Modified
+    files leave the tree as it is.
+
+    Args:
+        entries (list): (path, is_dir) pairs of the base commit, in tree order
+        changes (list): (status, path, previous_path) triples as listed by the compare API
+
+    Returns:
+        tuple: (entries of the head commit in tree order,
+                dict of added path to is_dir, dict of removed path to is_dir)
+    """
+    paths = dict(entries)
+    children = {}
+    for path in paths:
+        parent = path.rsplit("/", 1)[0] if "/" in path else ""
+        children[parent] = children.get(parent, 0) + 1
+    added, removed = {}, {}
+
+    def remove(path):
+        is_dir = paths.pop(path, None)
+        if is_dir is None:
+            # Not listed, e.g. below a directory the walk did not descend into
+            return
+        if added.pop(path, None) is None:
+            removed[path] = is_dir
+        parent = path.rsplit("/", 1)[0] if "/" in path else ""
+        children[parent] -= 1
+        if parent and children[parent] == 0:
+            remove(parent)
+
+    def add(path, is_dir=False):
+        if path in paths:
+            return
+        parent = path.rsplit("/", 1)[0] if "/" in path else ""
+        if parent:
+            add(parent, True)
+        paths[path] = is_dir
+        children[parent] = children.get(parent, 0) + 1
+        if removed.pop(path, None) is None:
+            added[path] = is_dir
+
+    # Removals first, so a file replaced by a directory of the same name is seen as such
+    for status, path, previous in changes:
+        if status == "removed":
+            remove(path)
+        elif status == "renamed" and previous:
+            remove(previous)
+    for status, path, previous in changes:
+        if status in ("added", "copied", "renamed"):
+            add(path)
+
+    head = sorted(paths.items(), key=lambda entry: git_order(*entry))
+    return head, added, removed
+
+
+def parse_mapping(service_mapping):
+    """
+    Return a service mapping as a dict of file path to services, or None if it is not one.
+
+    The model usually answers with JSON, sometimes inside a Markdown code fence.
+    """
+    if isinstance(service_mapping, dict):
+        return None if "error" in service_mapping else service_mapping
+    text = (service_mapping or "").strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[-1].rsplit("```", 1)[0]
+    try:
+        mapping = json.loads(text)
+    except ValueError:
+        return None
+    return mapping if isinstance(mapping, dict) else None
+
+
+class AnalysisStore:
+    def __init__(self, path: str = None):
+        """
+        Latest analysis of each repository, kept in SQLite next to the completion cache.
+
+        A record holds the commit it was made at, the structure entries and
+        budgets of the walk, the service mapping, the diagram and the
+        platform output of every platform generated so far.
+
+        Args:
+            path (str): SQLite file. Defaults to $DEPLOYPILOT_CACHE_DIR or ~/.cache/deploypilot.
+        """
+        if path is None:
+            cache_dir = os.getenv("DEPLOYPILOT_CACHE_DIR") or Path.home() / ".cache" / "deploypilot"
+            path = str(Path(cache_dir) / "analyses.sqlite3")
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS analyses ("
+            "repository TEXT PRIMARY KEY, revision TEXT NOT NULL, "
+            "record TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, full_repo_name: str):
+        """Return the stored record of a repository, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT record FROM analyses WHERE repository = ?", (full_repo_name.lower(),)
+            ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def put(self, full_repo_name: str, record: dict) -> None:
+        """Replace the record of a repository."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analyses (repository, revision, record, updated_at) VALUES (?, ?, ?, ?)",
+                (full_repo_name.lower(), record["revision"], json.dumps(record), time.time())
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM analyses")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+
+
+class IncrementalAnalyzer:
+    def __init__(self, generator: DeploymentGenerator = None, store: AnalysisStore = None, github_slots=None):
+        """
+        Generates deployment files starting from the previous analysis of the same repository.
+
+        The new commit is compared with the stored one through the compare
+        API, and the stored structure entries are patched with the changed
+        files instead of walking the tree again. Artifacts the diff cannot
+        affect are reused: the diagram's refinement while the rule-based
+        draft, redrawn on every run, is unchanged, the platform files always, and the service mapping is only
+        asked for the added files and merged into the previous one. Diffs
+        the compare API cannot list in full (force pushes, more than
+        ``MAX_COMPARE_FILES`` files, changed budgets) fall back to a full run.
+        Only the entries the structure budgets can show are stored, so
+        ignored and overly deep subtrees do not grow the records.
+
+        Args:
+            generator (DeploymentGenerator): (Optional) generator doing the work. Defaults to a new one.
+            store (AnalysisStore): (Optional) where analyses are kept. Defaults to ``AnalysisStore()``.
+            github_slots: (Optional) context manager, e.g. a semaphore, held around the GitHub
+                requests only, so completions do not keep other repositories from reaching GitHub.
+        """
+        self.generator = generator if generator is not None else DeploymentGenerator()
+        self.store = store if store is not None else AnalysisStore()
+        self.github_slots = github_slots if github_slots is not None else nullcontext()
+        # What the last run on each repository reused and regenerated, by "owner/name"
+        self.reports = {}
+
+    def generate_files(self, deployment_type: str, repo_url: str, ref: str = None) -> dict:
+        """
+        Generate the same files as ``DeploymentGenerator.generate_files``, reusing what the diff leaves valid.
+
+        Args:
+            deployment_type (str): AWS, Firebase, Vercel, etc.
+            repo_url (str): GitHub URL, e.g. https://github.com/user/repo
+            ref (str): (Optional) branch, tag or commit SHA. Defaults to the default branch.
+
+        Returns:
+            dict: mapping of filenames to content, or {"error.txt": ...} on failure
+        """
+        if deployment_type not in PLATFORM_PROMPTS:
+            return {"error.txt": f"No template available for {deployment_type}"}
+        parts = repo_url.rstrip("/").split("/")[-2:]
+        full_repo_name, repo_name = "/".join(parts), parts[-1]
+
+        with get_tracer().span("incremental", repo=full_repo_name, platform=deployment_type) as span:
+            try:
+                files, report = self._generate_files(deployment_type, full_repo_name, repo_name, ref)
+            except Exception as e:
+                files = {"error.txt": f"An error occurred: {str(e)}"}
+                report = {"mode": "failed", "reused": [], "regenerated": []}
+            self.reports[full_repo_name] = report
+            span.set(mode=report["mode"], failed="error.txt" in files)
+            return files
+
+    def _generate_files(self, deployment_type: str, full_repo_name: str, repo_name: str, ref: str):
+        """The body of ``generate_files``; returns the files and the report."""
+        g = self.generator
+        before = g.github_usage(full_repo_name)
+        with self.github_slots:
+            repo = g.gh.get_repo(full_repo_name)
+            revision = g.resolve_revision(full_repo_name, ref, repo=repo) or ref
+        budgets = g.structure_budgets
+        budgets_key = json.dumps(budgets, sort_keys=True)
+
+        previous = self.store.get(full_repo_name)
+        # The platform files are asked for by repository name only, so no diff or budget can change them
+        outputs = dict(previous["outputs"]) if previous is not None else {}
+        if previous is not None and previous["budgets"] != budgets_key:
+            previous = None
+        report = {"mode": "full", "base": previous and previous["revision"], "revision": revision,
+                  "changed_files": None, "reused": [], "regenerated": []}
+
+        def visible(path):
+            return within_budgets(path, budgets["max_depth"], budgets["ignore"])
+
+        changes = None
+        if previous is not None and previous["revision"] != revision:
+            with self.github_slots:
+                changes = self._compare(repo, previous["revision"], revision)
+        elif previous is not None:
+            changes = []
+        if changes is None:
+            previous = None
+            with self.github_slots:
+                entries, _ = g._structure_entries(repo, revision, budgets)
+                entries = [[path, is_dir] for path, is_dir in entries if visible(path)]
+            added = removed = None
+        else:
+            entries, added, removed = apply_changes(previous["entries"], changes)
+            entries = [[path, is_dir] for path, is_dir in entries if visible(path)]
+            # Changes to files the structure cannot show leave every artifact valid
+            added = {path: is_dir for path, is_dir in added.items() if visible(path)}
+            removed = {path: is_dir for path, is_dir in removed.items() if visible(path)}
+            report.update(mode="incremental" if changes else "unchanged", changed_files=len(changes))
+        structure = "\n".join(render_structure(entries, **budgets))
+
+        stages, reused = {}, {}
+        if previous is not None and not added and not removed:
+            reused["service_mapping"] = previous["service_mapping"]
+        elif previous is not None and parse_mapping(previous["service_mapping"]) is not None:
+            stages["service_mapping"] = lambda: self._update_mapping(
+                parse_mapping(previous["service_mapping"]), repo_name, entries, added, removed, revision, budgets
+            )
+        else:
+            stages["service_mapping"] = lambda: g.analyze_project_services(repo_name, structure, revision)
+
+        # The rule-based draft follows every file name, so it is always redrawn; only its refinement is reused
+        draft = g.diagram_generator.draft(repo_name, structure)
+        if previous is not None and previous.get("diagram_draft") == draft:
+            reused["architecture_diagram"] = previous["architecture_diagram"]
+        else:
+            stages["architecture_diagram"] = lambda: g.diagram_generator.refine_draft(
+                repo_name, structure, draft, revision
+            )
+
+        if deployment_type in outputs:
+            reused["output"] = outputs[deployment_type]
+        else:
+            prompt = PLATFORM_PROMPTS[deployment_type].format(repo_name=repo_name)
+            stages["output"] = lambda: g._generate_platform_output(prompt, revision)
+
+        results = {**reused, **(g._run_stages(stages) if stages else {})}
+        files = g._assemble_files(deployment_type, results["output"], results["service_mapping"],
+                                  results["architecture_diagram"])
+
+        after = g.github_usage(full_repo_name)
+        report.update(reused=sorted(reused), regenerated=sorted(stages),
+                      github_requests=after["requests"] - before["requests"])
+
+        # The diagram cannot fail: a failed refinement returns the draft
+        if not isinstance(results["service_mapping"], dict):
+            outputs[deployment_type] = results["output"]
+            self.store.put(full_repo_name, {
+                "revision": revision,
+                "budgets": budgets_key,
+                "entries": entries,
+                "service_mapping": results["service_mapping"],
+                "diagram_draft": draft,
+                "architecture_diagram": results["architecture_diagram"],
+                "outputs": outputs,
+            })
+        return files, report
+
+    def _compare(self, repo, base: str, head: str):
+        """
+        Return the (status, path, previous_path) changes from base to head, or None if they cannot all be listed.
+
+        Only fast-forwards are trusted: after a force push the stored commit
+        is not an ancestor of head and the three-dot comparison would miss
+        changes made on the abandoned side.
+        """
+        try:
+            comparison = repo.compare(base, head)
+            if comparison.status not in ("ahead", "identical"):
+                return None
+            files = comparison.files
+        except GithubException as e:
+            # The stored commit may have been garbage collected after a force push
+            if not _missing(e):
+                raise
+            return None
+        changes = [(f.status, f.filename, f.previous_filename) for f in files]
+        return changes if len(changes) < MAX_COMPARE_FILES else None
+
+    def _update_mapping(self, mapping: dict, repo_name: str, entries: list, added: dict, removed: dict,
+                        revision: str, budgets: dict):
+        """
+        Patch the previous service mapping: drop removed files and ask only about the added ones.
+
+        Falls back to asking about the whole structure if the answer for the
+        added files is not a JSON object.
+        """
+        g = self.generator
+        gone = [path for path in removed if removed[path]]
+        mapping = {
+            path: services for path, services in mapping.items()
+            if _relative(path) not in removed and not any(_relative(path).startswith(d + "/") for d in gone)
+        }
+
+        keep = set(added) | {parent for path in added for parent in _parents(path)}
+        partial = "\n".join(render_structure([e for e in entries if e[0] in keep], **budgets))
+        if partial:
+            update = parse_mapping(g.analyze_project_services(repo_name, partial, revision))
+            if update is None:
+                structure = "\n".join(render_structure(entries, **budgets))
+                return g.analyze_project_services(repo_name, structure, revision)
+            mapping.update(update)
+        return json.dumps(mapping, indent=2)
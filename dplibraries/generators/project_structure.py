@@ -0,0 +1,154 @@
+import re
+from fnmatch import translate
+from functools import lru_cache
+
+# Vendored code, build output, caches and lockfiles say little about how a project deploys
+DEFAULT_IGNORE = [
+    ".git", "node_modules", "bower_components", "vendor", "third_party", "dist", "build", "out", "target",
+    ".next", ".nuxt", ".svelte-kit", ".turbo", ".cache", ".parcel-cache", "coverage", "__pycache__",
+    ".pytest_cache", ".mypy_cache", ".tox", ".venv", "venv", "*.egg-info", ".idea", ".vscode",
+    "package-lock.json", "yarn.lock", "pnpm-lock.yaml", "bun.lockb", "poetry.lock", "Pipfile.lock",
+    "Cargo.lock", "Gemfile.lock", "composer.lock", "go.sum", "*.min.js", "*.min.css", "*.map",
+]
+
+
+@lru_cache(maxsize=32)
+def _ignore_regex(ignore: tuple):
+    """Compile a tuple of globs into one regex, so each entry is matched once instead of once per glob."""
+    return re.compile("|".join(translate(pattern) for pattern in ignore))
+
+
+def is_ignored(path: str, ignore) -> bool:
+    """Return True if the entry's name or full path matches one of the ignore globs."""
+    if not ignore:
+        return False
+    regex = _ignore_regex(tuple(ignore))
+    name = path.rstrip("/").rsplit("/", 1)[-1]
+    return regex.match(name) is not None or regex.match(path) is not None
+
+
+def within_budgets(path: str, max_depth: int = None, ignore=()) -> bool:
+    """
+    Return whether an entry can count towards a structure rendered with these budgets.
+
+    Entries more than one level below ``max_depth`` and entries that are, or
+    are inside, an ignored directory never show up. The level right below
+    ``max_depth`` is kept so directories still report how many entries they hide.
+    """
+    if max_depth is not None and path.count("/") > max_depth:
+        return False
+    if not ignore:
+        return True
+    parts = path.split("/")
+    return not any(is_ignored("/".join(parts[:i]), ignore) for i in range(1, len(parts) + 1))
+
+
+def iter_structure_paths(project_structure: str):
+    """
+    Yield the full path of every entry in ``_get_project_structure`` output.
+
+    Lines are consumed one at a time; a stack of parent directories turns the
+    two-space indentation back into "/"-separated paths. Directories keep
+    their trailing "/". Budget summary lines ("… N more entries") are skipped.
+    """
+    parents = []
+    for line in project_structure.splitlines():
+        name = line.lstrip(" ")
+        if not name or name.startswith("…"):
+            continue
+        depth = (len(line) - len(name)) // 2
+        del parents[depth:]
+        yield "".join(parents) + name
+        if name.endswith("/"):
+            parents.append(name)
+
+
+def _summary(directory):
+    """Yield the summary line for a directory whose entries were partly hidden."""
+    prefix, depth, _, hidden = directory
+    if hidden:
+        where = f"in {prefix}" if prefix else "at the top level"
+        yield f"{'  ' * (depth + 1)}… {hidden:,} more entries {where}"
+
+
+def render_structure(entries, max_depth: int = None, max_entries: int = None, max_dir_entries: int = None,
+                     ignore=(), count_hidden: bool = True, hidden_dirs: set = None):
+    """
+    Lazily render (path, is_dir) pairs as indented structure lines within budgets.
+
+    Entries must arrive in tree order (each directory before its contents),
+    as both GitHub listings provide them. Only a stack of open directories is
+    kept, so memory does not grow with the size of the repository.
+
+    Args:
+        entries: iterable of ("a/b/c.py", False) / ("a/b", True) pairs.
+        max_depth (int): (Optional) deepest level listed; 1 lists only top-level entries.
+        max_entries (int): (Optional) total entries listed before the rest is summarised.
+        max_dir_entries (int): (Optional) entries listed per directory before the rest is summarised.
+        ignore: glob patterns for entries to drop entirely, with everything below them.
+        count_hidden (bool): Keep consuming entries past max_entries to report how many
+            were left out. Pass False when each entry costs a request.
+        hidden_dirs (set): (Optional) receives each directory hidden by max_depth or
+            max_dir_entries as soon as it arrives, so a walker fetching directories one
+            request at a time can leave their contents unfetched (and uncounted).
+
+    Yields:
+        str: one line per entry, indented two spaces per level, directories suffixed
+        with "/", and "… N more entries in dir/" lines where budgets hid entries
+    """
+    # Each open directory: [path prefix ending in "/", depth, entries shown, entries hidden]
+    stack = [["", -1, 0, 0]]
+    shown = 0
+    over_limit = 0
+    stopped = False
+    skip_prefix, skip_target = None, None
+
+    for path, is_dir in entries:
+        if skip_prefix is not None:
+            if path.startswith(skip_prefix):
+                if skip_target is not None:
+                    skip_target[3] += 1
+                continue
+            skip_prefix, skip_target = None, None
+
+        while len(stack) > 1 and not path.startswith(stack[-1][0]):
+            yield from _summary(stack.pop())
+        parent = stack[-1]
+        depth = path.count("/")
+
+        if ignore and is_ignored(path, ignore):
+            skip_prefix, skip_target = path + "/", None
+            continue
+
+        if max_entries is not None and shown >= max_entries:
+            if not count_hidden:
+                stopped = True
+                break
+            over_limit += 1
+            continue
+
+        too_deep = max_depth is not None and depth >= max_depth
+        too_wide = max_dir_entries is not None and parent[2] >= max_dir_entries
+        if too_deep or too_wide:
+            parent[3] += 1
+            if is_dir:
+                skip_prefix, skip_target = path + "/", parent
+                if hidden_dirs is not None:
+                    hidden_dirs.add(path)
+            continue
+
+        parent[2] += 1
+        shown += 1
+        name = path.rsplit("/", 1)[-1]
+        if is_dir:
+            yield f"{'  ' * depth}{name}/"
+            stack.append([path + "/", depth, 0, 0])
+        else:
+            yield f"{'  ' * depth}{name}"
+
+    while stack:
+        yield from _summary(stack.pop())
+    if stopped:
+        yield f"… more entries not listed (limit of {max_entries:,} reached)"
+    elif over_limit:
+        yield f"… {over_limit:,} more entries not listed (limit of {max_entries:,} reached)"
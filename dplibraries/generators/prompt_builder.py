@@ -0,0 +1,184 @@
+import math
+import re
+import threading
+from collections import deque
+
+try:
+    import tiktoken
+except ImportError:  # Optional: fall back to a character-based estimate
+    tiktoken = None
+
+# Files that say the most about how a project is built and deployed
+MANIFEST_PATTERN = re.compile(
+    r"(^|/)(package\.json|requirements[^/]*\.txt|pyproject\.toml|setup\.py|pipfile|go\.mod|cargo\.toml|gemfile"
+    r"|pom\.xml|build\.gradle(\.kts)?|composer\.json|dockerfile[^/]*|(docker-)?compose[^/]*\.ya?ml|procfile"
+    r"|vercel\.json|netlify\.toml|firebase\.json|app\.yaml|serverless\.ya?ml|[^/]+\.tf|cdk\.json|chart\.yaml"
+    r"|\.github/workflows/[^/]+|\.gitlab-ci\.yml|next\.config\.[^/]+|vite\.config\.[^/]+|angular\.json|\.env\.example)$"
+)
+ENTRY_POINT_PATTERN = re.compile(
+    r"(^|/)(main|app|server|index|manage|wsgi|asgi|cli|handler|lambda_function)\.(py|js|ts|mjs|go|rb|php|java)$"
+)
+INFRA_DIR_PATTERN = re.compile(r"(^|/)(\.github|infra|infrastructure|terraform|deploy|k8s|kubernetes|helm|api|src)/$")
+
+_encoders = {}
+
+
+def count_tokens(text: str, model: str = "gpt-3.5-turbo") -> int:
+    """
+    Count the tokens of text for a model.
+
+    Uses tiktoken when it is installed and otherwise estimates one token per
+    four characters, which is close for English and code.
+    """
+    if tiktoken is not None:
+        encoder = _encoders.get(model)
+        if encoder is None:
+            try:
+                encoder = tiktoken.encoding_for_model(model)
+            except KeyError:
+                encoder = tiktoken.get_encoding("cl100k_base")
+            _encoders[model] = encoder
+        return len(encoder.encode(text))
+    return math.ceil(len(text) / 4)
+
+
+def _relevance(path: str) -> int:
+    """Rank a structure path: manifests and infra files, then entry points, then directories."""
+    lowered = path.lower()
+    if MANIFEST_PATTERN.search(lowered):
+        return 3
+    if ENTRY_POINT_PATTERN.search(lowered):
+        return 2
+    if INFRA_DIR_PATTERN.search(lowered):
+        return 2
+    if lowered.endswith("/"):
+        return 1
+    return 0
+
+
+def trim_structure(project_structure: str, max_tokens: int, model: str = "gpt-3.5-turbo") -> str:
+    """
+    Keep the most relevant lines of a project structure within a token budget.
+
+    Lines are ranked by relevance, then by depth, then by position; each kept
+    line brings its parent directories along so the indentation stays valid.
+    The kept lines are returned in their original order, followed by a note
+    saying how many were dropped.
+
+    Args:
+        project_structure (str): Indented structure text.
+        max_tokens (int): Token budget for the returned text.
+        model (str): Model whose tokenizer is used for counting.
+
+    Returns:
+        str: the structure, unchanged if it already fits
+    """
+    if count_tokens(project_structure, model) <= max_tokens:
+        return project_structure
+
+    lines = project_structure.splitlines()
+    parents, paths, stack = [], [], []
+    for line in lines:
+        name = line.lstrip(" ")
+        depth = (len(line) - len(name)) // 2
+        del stack[depth:]
+        parents.append(stack[-1][0] if stack else None)
+        parent_path = stack[-1][1] if stack else ""
+        paths.append(parent_path + name)
+        if name.endswith("/"):
+            stack.append((len(paths) - 1, parent_path + name))
+
+    order = sorted(range(len(lines)), key=lambda i: (-_relevance(paths[i]), paths[i].count("/"), i))
+
+    omitted_note = f"… {len(lines):,} lines omitted to fit the token budget"
+    budget = max_tokens - count_tokens(omitted_note, model)
+    kept, used = set(), 0
+    for i in order:
+        # The line plus any ancestors not yet kept
+        chain = []
+        j = i
+        while j is not None and j not in kept:
+            chain.append(j)
+            j = parents[j]
+        cost = sum(count_tokens(lines[c] + "\n", model) for c in chain)
+        if used + cost > budget:
+            continue
+        kept.update(chain)
+        used += cost
+
+    trimmed = [lines[i] for i in sorted(kept)]
+    trimmed.append(f"… {len(lines) - len(kept):,} lines omitted to fit the token budget")
+    return "\n".join(trimmed)
+
+
+class PromptBuilder:
+    def __init__(self, model: str = "gpt-3.5-turbo", max_prompt_tokens: int = 4000, max_usage_entries: int = 1000):
+        """
+        Assembles prompts around a project structure and keeps a token ledger.
+
+        The ledger keeps running totals per stage, plus the most recent
+        ``max_usage_entries`` calls in ``usage``, so a long-lived generator
+        does not grow with every completion.
+
+        Args:
+            model (str): Model whose tokenizer is used for counting.
+            max_prompt_tokens (int): Budget for each user prompt, structure included.
+            max_usage_entries (int): Recent calls kept in ``usage``.
+        """
+        self.model = model
+        self.max_prompt_tokens = max_prompt_tokens
+        self.usage = deque(maxlen=max_usage_entries)
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def build(self, template: str, project_structure: str, **fields) -> str:
+        """
+        Fill a ``str.format`` template, trimming ``{project_structure}`` to fit the budget.
+
+        Args:
+            template (str): Prompt with a {project_structure} placeholder and any other fields.
+            project_structure (str): Structure text to embed.
+            **fields: Values for the other placeholders.
+
+        Returns:
+            str: the prompt
+        """
+        overhead = count_tokens(template.format(project_structure="", **fields), self.model)
+        budget = max(self.max_prompt_tokens - overhead, 0)
+        structure = trim_structure(project_structure or "", budget, self.model)
+        return template.format(project_structure=structure, **fields)
+
+    def record(self, stage: str, messages: list, prompt_tokens: int = None, completion_tokens: int = None,
+               cached: bool = False) -> None:
+        """
+        Log the tokens of one completion call.
+
+        Counts missing from the API response (or from cache hits) are estimated
+        locally for the prompt and left at 0 for the completion.
+        """
+        if prompt_tokens is None:
+            prompt_tokens = sum(count_tokens(message["content"], self.model) for message in messages)
+        completion_tokens = completion_tokens or 0
+        with self._lock:
+            self.usage.append({
+                "stage": stage,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "cached": cached,
+            })
+            totals = self.stages.setdefault(
+                stage, {"calls": 0, "cached_calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+            )
+            totals["calls"] += 1
+            if cached:
+                totals["cached_calls"] += 1
+            else:
+                totals["prompt_tokens"] += prompt_tokens
+                totals["completion_tokens"] += completion_tokens
+
+    def totals(self) -> dict:
+        """Return summed prompt/completion tokens and call counts over every call logged so far."""
+        with self._lock:
+            stages = [dict(totals) for totals in self.stages.values()]
+        return {key: sum(totals[key] for totals in stages)
+                for key in ("calls", "cached_calls", "prompt_tokens", "completion_tokens")}
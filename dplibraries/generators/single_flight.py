@@ -0,0 +1,72 @@
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    def __init__(self):
+        """
+        Lets concurrent callers asking for the same thing share one call.
+
+        The first caller for a key runs the work; callers arriving with the
+        same key while it runs wait for it and receive the same result, or the
+        same exception. Nothing is kept once the call returns: repeats after
+        that are the completion cache's business.
+        """
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.calls = 0
+        self.shared = 0
+
+    def do(self, key, fn):
+        """
+        Return fn(), or the result of the call already running under key.
+
+        Args:
+            key: Hashable description of the work, e.g. (repository, commit, platform, stage).
+            fn: Function doing the work.
+        """
+        with self._lock:
+            future = self._flights.get(key)
+            leader = future is None
+            if leader:
+                future = self._flights[key] = Future()
+                self.calls += 1
+            else:
+                self.shared += 1
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._flights[key]
+
+    def in_flight(self) -> int:
+        """Number of calls currently running."""
+        with self._lock:
+            return len(self._flights)
+
+    def stats(self) -> dict:
+        """Calls made and requests that joined a call already running."""
+        with self._lock:
+            return {"calls": self.calls, "shared": self.shared}
+
+
+_default_single_flight = None
+_default_single_flight_lock = threading.Lock()
+
+
+def get_single_flight() -> SingleFlight:
+    """Return the process-wide SingleFlight, so every generator of the process shares in-flight work."""
+    global _default_single_flight
+    with _default_single_flight_lock:
+        if _default_single_flight is None:
+            _default_single_flight = SingleFlight()
+        return _default_single_flight
@@ -0,0 +1,301 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # Optional: only needed by OpenTelemetryExporter
+    otel_trace = None
+
+
+class Span:
+    def __init__(self, name: str, parent=None, **attributes):
+        """
+        One timed unit of work, such as a GitHub walk or a chat completion.
+
+        Numeric attributes (requests, prompt_tokens, cache_hits, ...) are
+        summed per span name in ``Tracer.summary``; other attributes only
+        describe the span.
+        """
+        self.name = name
+        self.parent = parent
+        self.attributes = dict(attributes)
+        self.start_time_ns = time.time_ns()
+        self._start = time.perf_counter()
+        self.duration = None
+        self.error = None
+
+    def set(self, **attributes) -> None:
+        """Set or overwrite attributes."""
+        self.attributes.update(attributes)
+
+    def add(self, key: str, amount=1) -> None:
+        """Increase a numeric attribute."""
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    def to_dict(self) -> dict:
+        return {
+            "span": self.name,
+            "parent": self.parent.name if self.parent is not None else None,
+            "seconds": round(self.duration, 6) if self.duration is not None else None,
+            "error": self.error,
+            **self.attributes,
+        }
+
+
+class Tracer:
+    def __init__(self, exporters=None, max_samples: int = 1000):
+        """
+        Records spans per thread and hands finished spans to exporters.
+
+        Spans nest through a per-thread stack; work handed to another thread
+        keeps its parent when wrapped with ``Tracer.wrap``.
+
+        Args:
+            exporters (list): (Optional) objects with on_start(span) and on_end(span) methods.
+            max_samples (int): Durations kept per span name for the percentiles in ``summary``.
+        """
+        self.exporters = list(exporters or [])
+        self.max_samples = max_samples
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._durations = defaultdict(lambda: deque(maxlen=self.max_samples))
+        self._seconds = defaultdict(float)
+        self._totals = defaultdict(lambda: defaultdict(float))
+        self._counts = defaultdict(int)
+        self._errors = defaultdict(int)
+
+    def _stack(self) -> list:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @property
+    def current(self):
+        """The innermost open span of this thread, or None."""
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    def add_exporter(self, exporter) -> None:
+        self.exporters.append(exporter)
+
+    @contextmanager
+    def span(self, name: str, activate: bool = True, **attributes):
+        """
+        Time the enclosed block as a span.
+
+        Args:
+            name (str): Span name; spans with the same name are summarised together.
+            activate (bool): Make the span the parent of spans opened inside the block.
+                Pass False around generators that yield while the span is open.
+            **attributes: Initial attributes.
+
+        Yields:
+            Span: the open span, for setting attributes
+        """
+        span = Span(name, self.current, **attributes)
+        for exporter in self.exporters:
+            exporter.on_start(span)
+        stack = self._stack()
+        if activate:
+            stack.append(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = type(e).__name__
+            raise
+        finally:
+            if activate:
+                stack.remove(span)
+            self._finish(span)
+
+    def _finish(self, span: Span) -> None:
+        span.duration = time.perf_counter() - span._start
+        with self._lock:
+            self._counts[span.name] += 1
+            self._seconds[span.name] += span.duration
+            self._durations[span.name].append(span.duration)
+            if span.error is not None:
+                self._errors[span.name] += 1
+            totals = self._totals[span.name]
+            for key, value in span.attributes.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    totals[key] += value
+        for exporter in self.exporters:
+            exporter.on_end(span)
+
+    def wrap(self, fn, parent: Span = None):
+        """
+        Return fn bound to the current span, so spans it opens on another thread keep their parent.
+
+        Pass ``parent`` to bind a span that is not active on this thread, such
+        as one opened with ``activate=False``.
+        """
+        parent = parent or self.current
+
+        def run(*args, **kwargs):
+            stack = self._stack()
+            stack.append(parent)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                stack.remove(parent)
+
+        return run if parent is not None else fn
+
+    def summary(self) -> list:
+        """
+        Return one row per span name: calls, errors, total/mean/p50/p95 seconds
+        and the sums of the spans' numeric attributes, slowest total first.
+        """
+        import numpy as np
+
+        with self._lock:
+            rows = []
+            for name, count in self._counts.items():
+                durations = np.asarray(self._durations[name])
+                rows.append({
+                    "span": name,
+                    "calls": count,
+                    "errors": self._errors[name],
+                    "total_s": self._seconds[name],
+                    "mean_s": float(durations.mean()),
+                    "p50_s": float(np.percentile(durations, 50)),
+                    "p95_s": float(np.percentile(durations, 95)),
+                    **{key: int(value) if float(value).is_integer() else value
+                       for key, value in self._totals[name].items()},
+                })
+        return sorted(rows, key=lambda row: -row["total_s"])
+
+    def reset(self) -> None:
+        """Forget the recorded statistics."""
+        with self._lock:
+            self._durations.clear()
+            self._seconds.clear()
+            self._totals.clear()
+            self._counts.clear()
+            self._errors.clear()
+
+
+class LogExporter:
+    def __init__(self, logger: logging.Logger = None, level: int = logging.INFO):
+        """Logs every finished span as one JSON line."""
+        self.logger = logger or logging.getLogger("dplibraries.trace")
+        self.level = level
+
+    def on_start(self, span: Span) -> None:
+        pass
+
+    def on_end(self, span: Span) -> None:
+        self.logger.log(self.level, json.dumps(span.to_dict(), default=str))
+
+
+class PrometheusExporter:
+    def __init__(self, path: str, prefix: str = "deploypilot"):
+        """
+        Writes span metrics in the Prometheus text exposition format, for node_exporter's textfile collector.
+
+        The file is rewritten atomically whenever a top-level span ends, and on ``flush``.
+
+        Args:
+            path (str): Output file, e.g. /var/lib/node_exporter/deploypilot.prom
+            prefix (str): Metric name prefix.
+        """
+        self.path = path
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._seconds = defaultdict(float)
+        self._counts = defaultdict(int)
+        self._errors = defaultdict(int)
+        self._totals = defaultdict(lambda: defaultdict(float))
+
+    def on_start(self, span: Span) -> None:
+        pass
+
+    def on_end(self, span: Span) -> None:
+        with self._lock:
+            self._seconds[span.name] += span.duration
+            self._counts[span.name] += 1
+            self._errors[span.name] += span.error is not None
+            for key, value in span.attributes.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    self._totals[span.name][key] += value
+        if span.parent is None:
+            self.flush()
+
+    def render(self) -> str:
+        p = self.prefix
+        lines = [
+            f"# HELP {p}_span_seconds Wall time spent in spans.",
+            f"# TYPE {p}_span_seconds summary",
+        ]
+        with self._lock:
+            for name in sorted(self._counts):
+                lines.append(f'{p}_span_seconds_sum{{span="{name}"}} {self._seconds[name]:.6f}')
+                lines.append(f'{p}_span_seconds_count{{span="{name}"}} {self._counts[name]}')
+            lines += [f"# HELP {p}_span_errors_total Spans that raised.", f"# TYPE {p}_span_errors_total counter"]
+            for name in sorted(self._counts):
+                lines.append(f'{p}_span_errors_total{{span="{name}"}} {self._errors[name]}')
+            lines += [f"# HELP {p}_span_value_total Sums of numeric span attributes.",
+                      f"# TYPE {p}_span_value_total counter"]
+            for name in sorted(self._totals):
+                for key, value in sorted(self._totals[name].items()):
+                    lines.append(f'{p}_span_value_total{{span="{name}",attribute="{key}"}} {value:g}')
+        return "\n".join(lines) + "\n"
+
+    def flush(self) -> None:
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.render())
+        os.replace(tmp, self.path)
+
+
+class OpenTelemetryExporter:
+    def __init__(self, tracer=None):
+        """
+        Mirrors spans into OpenTelemetry, keeping their nesting.
+
+        Args:
+            tracer: (Optional) OpenTelemetry tracer. Defaults to the global provider's tracer.
+        """
+        if otel_trace is None:
+            raise ImportError("OpenTelemetryExporter needs the opentelemetry-api package")
+        self.tracer = tracer or otel_trace.get_tracer("dplibraries")
+        self._spans = {}
+        self._lock = threading.Lock()
+
+    def on_start(self, span: Span) -> None:
+        with self._lock:
+            parent = self._spans.get(id(span.parent)) if span.parent is not None else None
+        context = otel_trace.set_span_in_context(parent) if parent is not None else None
+        otel_span = self.tracer.start_span(span.name, context=context, start_time=span.start_time_ns)
+        with self._lock:
+            self._spans[id(span)] = otel_span
+
+    def on_end(self, span: Span) -> None:
+        with self._lock:
+            otel_span = self._spans.pop(id(span), None)
+        if otel_span is None:
+            return
+        for key, value in span.to_dict().items():
+            if key not in ("span", "parent") and isinstance(value, (str, bool, int, float)):
+                otel_span.set_attribute(f"deploypilot.{key}", value)
+        otel_span.end(end_time=span.start_time_ns + int(span.duration * 1e9))
+
+
+_default_tracer = None
+_default_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Return the process-wide tracer, creating it on first use."""
+    global _default_tracer
+    with _default_tracer_lock:
+        if _default_tracer is None:
+            _default_tracer = Tracer()
+        return _default_tracer
@@ -4,4 +4,26 @@ Models module for DeployPilot.
 This module contains model definitions and implementations.
 """
 
-# Import models here to make them available at the package level 
\ No newline at end of file
+import importlib
+
+# Models are available at the package level but imported on first access (pandas, scikit-learn)
+_EXPORTS = {
+    "DeploymentPredictor": "dplibraries.models.deployment_predictor",
+    "extract_features": "dplibraries.models.feature_extractor",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    """Import exported names on first access, so importing the package loads no heavy dependencies."""
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
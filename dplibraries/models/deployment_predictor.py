@@ -1,12 +1,8 @@
 import warnings
-from collections import Counter
 import numpy as np
 warnings.simplefilter(action="ignore", category=FutureWarning)
-import pandas as pd
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.preprocessing import LabelEncoder, StandardScaler
-from dplibraries.generators.deployment_generator import DeploymentGenerator
-from dplibraries.generators.diagram_generator import DiagramGenerator
+from dplibraries.generators.tracing import get_tracer
+from dplibraries.models.neighbor_index import make_neighbor_index
 
 # Feature-to-Provider Mapping
 FEATURE_PROVIDER_MAPPING = {
@@ -19,68 +15,517 @@ FEATURE_PROVIDER_MAPPING = {
     "realtime_events": {"AWS": "Kinesis, IoT Core", "GCP": "Pub/Sub", "Firebase": "Realtime Database, Firestore"},
 }
 
+# Bumped whenever the arrays stored by DeploymentPredictor.save change
+SNAPSHOT_VERSION = 3
+
+
+def _check_n_similar(n_similar):
+    """Raise ValueError unless n_similar is a positive integer (bools, being ints, are refused too)."""
+    if isinstance(n_similar, bool) or not isinstance(n_similar, (int, np.integer)) or n_similar < 1:
+        raise ValueError(f"n_similar must be a positive integer, got {n_similar!r}")
+
+
+def _to_bit(value):
+    """Convert a "Yes"/"No", bool or numeric feature value to 0 or 1."""
+    if isinstance(value, str):
+        return int(value.strip().lower() in ("yes", "true", "1"))
+    try:
+        return int(bool(value) and value == value)  # NaN counts as 0
+    except (TypeError, ValueError):
+        return 0
+
+
+def majority_vote(labels, n_classes):
+    """
+    Vote among the neighbour labels of every row at once.
+
+    Ties go to the label seen first among the most similar repositories.
+
+    Args:
+        labels (np.ndarray): (M, k) encoded labels of each row's neighbours, most similar first.
+        n_classes (int): Number of label classes.
+
+    Returns:
+        tuple: (winning label per row, share of the k neighbours that voted for it)
+    """
+    n_rows, k = labels.shape
+    rows = np.repeat(np.arange(n_rows), k)
+    counts = np.zeros((n_rows, n_classes), dtype=np.int64)
+    np.add.at(counts, (rows, labels.ravel()), 1)
+    first_seen = np.full((n_rows, n_classes), k, dtype=np.int64)
+    np.minimum.at(first_seen, (rows, labels.ravel()), np.tile(np.arange(k), n_rows))
+    winners = np.argmax(counts * (k + 1) - first_seen, axis=1)
+    return winners, counts[np.arange(n_rows), winners] / k
+
+
+class FeatureScaler:
+    def __init__(self):
+        """
+        Per-column standardisation with NumPy only, matching sklearn's StandardScaler.
+
+        Keeping it free of scikit-learn lets ``DeploymentPredictor.load`` and
+        ``add_repositories`` run without importing scikit-learn, pandas or SciPy.
+        """
+        self.mean_ = None
+        self.var_ = None
+        self.scale_ = None
+        self.n_samples_seen_ = 0
+
+    @staticmethod
+    def _scale(var):
+        """Standard deviations, with constant columns given a unit scale as in StandardScaler."""
+        scale = np.sqrt(var)
+        return np.where(scale < 10 * np.finfo(scale.dtype).eps, 1.0, scale)
+
+    def fit(self, X):
+        """Fit the column statistics on the rows of X."""
+        X = np.asarray(X)
+        self.mean_, self.var_ = X.mean(axis=0, dtype=np.float64), X.var(axis=0, dtype=np.float64)
+        self.n_samples_seen_ = len(X)
+        self.scale_ = self._scale(self.var_)
+        return self
+
+    def fit_transform(self, X):
+        """Fit the column statistics on X and return it standardised."""
+        return self.fit(X).transform(X)
+
+    def partial_fit(self, X):
+        """Merge the statistics of more rows into the fitted ones (Chan et al.'s pairwise update)."""
+        X = np.asarray(X)
+        n_old, n_new = self.n_samples_seen_, len(X)
+        if n_new == 0:
+            return self
+        mean_new, var_new = X.mean(axis=0, dtype=np.float64), X.var(axis=0, dtype=np.float64)
+        n = n_old + n_new
+        delta = mean_new - self.mean_
+        self.mean_ = self.mean_ + delta * n_new / n
+        self.var_ = (self.var_ * n_old + var_new * n_new + delta ** 2 * n_old * n_new / n) / n
+        self.n_samples_seen_ = n
+        self.scale_ = self._scale(self.var_)
+        return self
+
+    def transform(self, X):
+        """Standardise the rows of X with the fitted statistics."""
+        return (np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_
+
+
+class RepositoryNames:
+    def __init__(self, names=(), data=None, offsets=None):
+        """
+        Repository names stored as one UTF-8 buffer plus row offsets, with a hash lookup.
+
+        Each name takes its encoded length plus 24 bytes (offset, hash and sort
+        position) instead of a fixed-width unicode slot or a Python string and
+        dict entry, which keeps tens of millions of rows affordable.
+
+        Args:
+            names: Names to store, in row order.
+            data (np.ndarray): (Optional) uint8 buffer of an existing table, with its ``offsets``.
+            offsets (np.ndarray): (Optional) int64 start of every name in ``data``, plus the end.
+        """
+        if data is None:
+            encoded = [str(name).encode() for name in names]
+            data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+            offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+            np.cumsum([len(name) for name in encoded], out=offsets[1:])
+        self.data = np.asarray(data, dtype=np.uint8)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self._hashes = np.empty(0, dtype=np.int64)
+        self._order = np.empty(0, dtype=np.int64)
+        self._index(0)
+
+    def _index(self, start):
+        """Add the names from row start onwards to the sorted hash lookup."""
+        hashes = np.fromiter((hash(self[i]) for i in range(start, len(self))), dtype=np.int64)
+        hashes = np.concatenate([self._hashes, hashes])
+        order = np.concatenate([self._order, np.arange(start, len(self))])
+        # Stable, so equal hashes keep ascending rows and the first occurrence of a name wins
+        by_hash = np.argsort(hashes, kind="stable")
+        self._hashes, self._order = hashes[by_hash], order[by_hash]
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("repository index out of range")
+        return self.data[self.offsets[i]:self.offsets[i + 1]].tobytes().decode()
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def position(self, name):
+        """Return the first row holding name, or None."""
+        key = hash(name)
+        at = np.searchsorted(self._hashes, key)
+        while at < len(self._hashes) and self._hashes[at] == key:
+            if self[int(self._order[at])] == name:
+                return int(self._order[at])
+            at += 1
+        return None
+
+    def extend(self, names):
+        """Append names as the next rows."""
+        start = len(self)
+        added = RepositoryNames(names)
+        self.data = np.concatenate([self.data, added.data])
+        self.offsets = np.concatenate([self.offsets, added.offsets[1:] + self.offsets[-1]])
+        self._index(start)
+
+
+def _label_dtype(n_classes):
+    """The narrowest unsigned type that holds label indexes for n_classes platforms."""
+    return np.min_scalar_type(max(n_classes - 1, 0))
+
+
 class DeploymentPredictor:
-    def __init__(self, dataset_path):
-        # Load the dataset
-        self.df = pd.read_csv(dataset_path)
+    def __init__(self, dataset_path, index="exact"):
+        """
+        Args:
+            dataset_path (str): CSV of labelled repositories (see dataset.csv).
+            index (str): Neighbour index, "exact", "approximate" or "binary", or an object with fit/query.
+                Indexes with ``binary = True`` are fitted on the raw 0/1 features instead of scaled ones.
+        """
+        import pandas as pd
+
+        with get_tracer().span("predictor.build", index=index if isinstance(index, str) else type(index).__name__) as span:
+            # Load the dataset
+            df = pd.read_csv(dataset_path)
+
+            # Preprocess data
+            df = df.infer_objects(copy=False)
+            df = df.replace({"Yes": 1, "No": 0})
+
+            # Separate features and target
+            X = df.drop(["repository", "deployment"], axis=1)
+            y = df["deployment"]
+
+            # Encode the target variable as indexes into the sorted platform names
+            self.classes, labels = np.unique(y.to_numpy(dtype=str), return_inverse=True)
+            self.y_encoded = labels.astype(_label_dtype(len(self.classes)))
+
+            # Convert boolean strings to integers (if needed)
+            X = X.astype(int)
+
+            self.repositories = RepositoryNames(df["repository"].astype(str).tolist())
+            self.feature_columns = list(X.columns)
+            features = X.to_numpy(dtype=np.uint8)
+
+            # Fit the scaler statistics; only scaled indexes keep the scaled rows
+            self.scaler = FeatureScaler().fit(features)
+
+            self._build_index(index, features)
+            span.set(rows=len(self.repositories), features=len(self.feature_columns))
+
+    def _build_index(self, index, features):
+        """
+        Fit the neighbour index on (N, F) uint8 features.
+
+        Binary indexes are fitted on the raw rows and no scaled copy is made;
+        when they can hand rows back (``rows()``), their packed words are the
+        only copy of the features. Other indexes are fitted on scaled rows and
+        the raw features are kept alongside for justifications.
+        """
+        self.index = make_neighbor_index(index)
+        self.binary = getattr(self.index, "binary", False)
+        if self.binary:
+            self.X_scaled = None
+            self._features = None if hasattr(self.index, "rows") else features
+            self.index.fit(features)
+        else:
+            self._features = features
+            self.X_scaled = self.scaler.transform(features)
+            self.index.fit(self.X_scaled)
 
-        # Preprocess data
-        self.df = self.df.infer_objects(copy=False)
-        self.df = self.df.replace({"Yes": 1, "No": 0})
+    @property
+    def features(self):
+        """(N, F) uint8 0/1 features of every row, unpacked on demand from a binary index."""
+        if self._features is None:
+            return self.index.rows(slice(None))
+        return self._features
 
-        # Separate features and target
-        self.X = self.df.drop(["repository", "deployment"], axis=1)
-        self.y = self.df["deployment"]
+    def _rows(self, idx):
+        """(len(idx), F) uint8 features of the rows at positions idx."""
+        return self.index.rows(idx) if self._features is None else self._features[idx]
 
-        # Encode the target variable
-        self.le = LabelEncoder()
-        self.y_encoded = self.le.fit_transform(self.y)
+    @property
+    def df(self):
+        """The dataset as a DataFrame with Yes/No columns already converted to 0/1."""
+        import pandas as pd
 
-        # Convert boolean strings to integers (if needed)
-        self.X = self.X.astype(int)
+        df = pd.DataFrame({"repository": list(self.repositories), "deployment": self.classes[self.y_encoded]})
+        return pd.concat([df, self.X], axis=1)
 
-        # Initialize and fit the scaler
-        self.scaler = StandardScaler()
-        self.X_scaled = self.scaler.fit_transform(self.X)
+    @property
+    def X(self):
+        """Feature columns as an int DataFrame."""
+        import pandas as pd
 
-        # Calculate cosine similarity matrix
-        self.similarity_matrix = cosine_similarity(self.X_scaled)
+        return pd.DataFrame(self.features.astype(int), columns=self.feature_columns)
+
+    @property
+    def y(self):
+        """Deployment labels as a Series."""
+        import pandas as pd
+
+        return pd.Series(self.classes[self.y_encoded], name="deployment")
+
+    def save(self, path):
+        """
+        Write a snapshot that ``DeploymentPredictor.load`` reads back without pandas or the CSV.
+
+        Args:
+            path (str): Destination .npz file.
+        """
+        np.savez(
+            path,
+            version=np.array(SNAPSHOT_VERSION),
+            repository_data=self.repositories.data,
+            repository_offsets=self.repositories.offsets,
+            feature_columns=np.array(self.feature_columns),
+            features=self.features,
+            labels=np.asarray(self.y_encoded),
+            classes=np.asarray(self.classes, dtype=str),
+            scaler_mean=self.scaler.mean_,
+            scaler_var=self.scaler.var_,
+            scaler_scale=self.scaler.scale_,
+            scaler_n_samples=np.array(self.scaler.n_samples_seen_),
+        )
+
+    @classmethod
+    def load(cls, path, index="exact"):
+        """
+        Restore a predictor written by ``save``.
+
+        Only NumPy is needed: neither pandas nor scikit-learn is imported.
+
+        Args:
+            path (str): Snapshot .npz file.
+            index (str): Neighbour index to build over the loaded rows, as in ``__init__``.
+        """
+        with np.load(path, allow_pickle=False) as snapshot:
+            version = int(snapshot["version"])
+            if version != SNAPSHOT_VERSION:
+                raise ValueError(f"Unsupported snapshot version {version}, expected {SNAPSHOT_VERSION}")
+
+            predictor = cls.__new__(cls)
+            predictor.repositories = RepositoryNames(data=snapshot["repository_data"],
+                                                     offsets=snapshot["repository_offsets"])
+            predictor.feature_columns = snapshot["feature_columns"].tolist()
+            features = snapshot["features"]
+            predictor.classes = snapshot["classes"]
+            predictor.y_encoded = snapshot["labels"].astype(_label_dtype(len(predictor.classes)))
+
+            predictor.scaler = FeatureScaler()
+            predictor.scaler.n_samples_seen_ = int(snapshot["scaler_n_samples"])
+            predictor.scaler.mean_ = snapshot["scaler_mean"]
+            predictor.scaler.var_ = snapshot["scaler_var"]
+            predictor.scaler.scale_ = snapshot["scaler_scale"]
+
+        predictor._build_index(index, features)
+        return predictor
+
+    def add_repositories(self, repositories, deployments, features, rescale=False):
+        """
+        Append newly labelled repositories without re-reading the dataset.
+
+        The scaler statistics are updated with ``partial_fit`` and the new rows
+        are appended to the neighbour index. Rows already in a scaled index
+        keep the scaling they were indexed with until ``rescale()`` is called
+        (or ``rescale=True`` is passed); binary indexes use the raw features and
+        never need it.
+
+        Args:
+            repositories (list): Repository names, e.g. "owner/name".
+            deployments (list): Deployment platform label for each repository.
+            features: Feature rows in any form accepted by ``predict_batch``.
+            rescale (bool): Re-project every row with the updated scaler afterwards.
+        """
+        new_features = self._feature_matrix(features).astype(np.uint8)
+        repositories = [str(name) for name in repositories]
+        deployments = np.asarray(deployments, dtype=str)
+        if not len(repositories) == len(deployments) == len(new_features):
+            raise ValueError("repositories, deployments and features must have the same length")
+
+        # Grow the label vocabulary, keeping it sorted
+        classes = np.union1d(self.classes, deployments)
+        if len(classes) != len(self.classes):
+            self.y_encoded = np.searchsorted(classes, self.classes[self.y_encoded])
+            self.classes = classes
+        new_labels = np.searchsorted(classes, deployments)
+        self.y_encoded = np.concatenate([self.y_encoded, new_labels]).astype(_label_dtype(len(classes)))
+
+        self.repositories.extend(repositories)
+        self.scaler.partial_fit(new_features)
+
+        if self.binary:
+            if hasattr(self.index, "add"):
+                self.index.add(new_features)
+            else:
+                self.index.fit(np.concatenate([self.features, new_features]))
+            if self._features is not None:
+                self._features = np.concatenate([self._features, new_features])
+            return
+
+        self._features = np.concatenate([self._features, new_features])
+        new_scaled = self.scaler.transform(new_features)
+        self.X_scaled = np.concatenate([self.X_scaled, new_scaled])
+        if rescale:
+            self.rescale()
+        elif hasattr(self.index, "add"):
+            self.index.add(new_scaled)
+        else:
+            self.index.fit(self.X_scaled)
+
+    def rescale(self):
+        """Re-project every row with the current scaler statistics and refit the index."""
+        if self.binary:
+            return
+        self.X_scaled = self.scaler.transform(self._features)
+        self.index.fit(self.X_scaled)
 
     def predict_deployment(self, repository_name, n_similar=5):
-        try:
-            idx = self.df[self.df["repository"] == repository_name].index[0]
-        except IndexError:
+        _check_n_similar(n_similar)
+        idx = self.repositories.position(repository_name)
+        if idx is None:
             return "Repository not found", "No justification available"
 
-        similarity_scores = list(enumerate(self.similarity_matrix[idx]))
-        similarity_scores = sorted(similarity_scores, key=lambda x: x[1], reverse=True)
-        similar_repos = similarity_scores[1:n_similar + 1]
-        similar_deployments = [self.y.iloc[idx] for idx, _ in similar_repos]
-        deployment_prediction = Counter(similar_deployments).most_common(1)[0][0]
+        X_scaled = None if self.binary else self.X_scaled[[idx]]
+        predictions, justifications, _ = self._predict_scaled(
+            X_scaled, self._rows([idx]), [repository_name], n_similar, exclude=[idx]
+        )
+        return predictions[0], justifications[0]
 
-        matched_features = []
-        repo_features = self.X.iloc[idx]
+    def predict_features(self, features, n_similar=5, name="this repository", return_confidence=False):
+        """
+        Predict the deployment platform for a repository that is not in the dataset.
 
-        for feature, providers in FEATURE_PROVIDER_MAPPING.items():
-            if repo_features.get(feature, 0) == 1 and deployment_prediction in providers:
-                matched_features.append(f"{feature} → {providers[deployment_prediction]}")
+        Args:
+            features: One feature vector, either a dict keyed by feature column
+                ("Yes"/"No", bool or 0/1 values, missing columns count as 0) or a
+                sequence of 0/1 values in ``self.feature_columns`` order.
+            n_similar (int): Number of neighbours that vote on the prediction.
+            name (str): Repository name used in the justification.
+            return_confidence (bool): Also return the share of neighbours that voted for the prediction.
+
+        Returns:
+            tuple: (deployment_prediction, justification), plus confidence if requested
+
+        Raises:
+            ValueError: if n_similar is not a positive integer
+        """
+        result = self.predict_batch([features], n_similar, names=[name], return_confidence=return_confidence)
+        return tuple(values[0] for values in result)
+
+    def predict_batch(self, features, n_similar=5, names=None, return_confidence=False):
+        """
+        Predict deployment platforms for many unseen repositories at once.
+
+        All rows are scaled with the fitted scaler, queried against the
+        neighbour index in one call and voted on with array operations.
+
+        Args:
+            features: (M, F) array-like or DataFrame of 0/1 values, or a list of
+                per-repository dicts as accepted by ``predict_features``.
+            n_similar (int): Number of neighbours that vote on each prediction.
+            names (list): (Optional) repository names used in the justifications.
+            return_confidence (bool): Also return the share of neighbours that voted for each prediction.
 
-        justification = f"Based on the most similar repositories, the predicted deployment type for {repository_name} is {deployment_prediction}."
-        if matched_features:
-            justification += "\nFeatures that contributed to this recommendation:\n" + "\n".join(matched_features)
+        Returns:
+            tuple: (predictions, justifications), plus confidences if requested, each a list of length M
+
+        Raises:
+            ValueError: if n_similar is not a positive integer
+        """
+        _check_n_similar(n_similar)
+        X_new = self._feature_matrix(features)
+        if names is None:
+            names = ["this repository"] * len(X_new)
+        if self.binary:
+            X_new_scaled = None
         else:
-            justification += "\nNo strong feature matches found."
+            X_new_scaled = self.scaler.transform(X_new)
+        predictions, justifications, confidences = self._predict_scaled(X_new_scaled, X_new, names, n_similar)
+        if return_confidence:
+            return predictions, justifications, confidences
+        return predictions, justifications
+
+    def _feature_matrix(self, features):
+        """Convert the accepted feature inputs to an (M, F) int array in column order."""
+        columns = self.feature_columns
+        if hasattr(features, "reindex"):
+            # DataFrame: align columns by name
+            features = features.reindex(columns=columns, fill_value=0).to_dict("records")
+        if len(features) and isinstance(features[0], dict):
+            return np.array([[_to_bit(row.get(column, 0)) for column in columns] for row in features], dtype=int)
 
-        return deployment_prediction, justification
+        matrix = np.asarray(features)
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(1, -1)
+        if matrix.shape[1] != len(columns):
+            raise ValueError(f"Expected {len(columns)} features per repository, got {matrix.shape[1]}")
+        if matrix.dtype.kind in "biuf":
+            return (np.nan_to_num(matrix) != 0).astype(int)
+        return np.vectorize(_to_bit, otypes=[int])(matrix)
+
+    def _predict_scaled(self, X_scaled, X_raw, names, n_similar, exclude=None):
+        """Vote among the nearest labelled repositories for each scaled row."""
+        with get_tracer().span("predictor.query", queries=len(X_raw)):
+            return self._vote(X_scaled, X_raw, names, n_similar, exclude)
+
+    def _vote(self, X_scaled, X_raw, names, n_similar, exclude=None):
+        """The body of ``_predict_scaled``, inside its span."""
+        k = min(n_similar, len(self.repositories) - (exclude is not None))
+        queries = X_raw if self.binary else X_scaled
+        similar_idx, _ = self.index.query(queries, k, exclude=exclude)
+        winners, confidences = majority_vote(self.y_encoded[similar_idx], len(self.classes))
+        predictions = self.classes[winners]
+        n_rows = len(predictions)
+
+        # Features backing each prediction, evaluated per mapping entry across all rows
+        matched = [[] for _ in range(n_rows)]
+        columns = self.feature_columns
+        for feature, providers in FEATURE_PROVIDER_MAPPING.items():
+            if feature not in columns:
+                continue
+            present = X_raw[:, columns.index(feature)] == 1
+            for row in np.flatnonzero(present & np.isin(predictions, list(providers))):
+                matched[row].append(f"{feature} → {providers[predictions[row]]}")
+
+        justifications = []
+        for name, prediction, matched_features in zip(names, predictions, matched):
+            justification = f"Based on the most similar repositories, the predicted deployment type for {name} is {prediction}."
+            if matched_features:
+                justification += "\nFeatures that contributed to this recommendation:\n" + "\n".join(matched_features)
+            else:
+                justification += "\nNo strong feature matches found."
+            justifications.append(justification)
+
+        return predictions.tolist(), justifications, confidences.tolist()
+
+    def evaluate(self, n_similar=(1, 3, 5, 7, 9), folds=None, seed=0):
+        """
+        Cross-validate the predictor on its own rows for a sweep of neighbour counts.
+
+        See ``dplibraries.models.evaluation.evaluate_predictor`` for the returned rows.
+        """
+        from dplibraries.models.evaluation import evaluate_predictor
+
+        return evaluate_predictor(self, n_similar, folds, seed)
 
     def analyze_and_generate(self, repo_name, project_structure):
         """
         Analyze project structure, generate deployment files, and create architecture diagrams.
         """
+        from dplibraries.generators.deployment_generator import DeploymentGenerator
+
         generator = DeploymentGenerator()
-        diagram_generator = DiagramGenerator()
 
         service_mapping = generator.analyze_project_services(repo_name, project_structure)
-        architecture_diagram = diagram_generator.generate_architecture_diagram(repo_name, project_structure)
+        architecture_diagram = generator.diagram_generator.generate_architecture_diagram(repo_name, project_structure)
         
         return service_mapping, architecture_diagram 
\ No newline at end of file
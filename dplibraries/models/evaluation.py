@@ -0,0 +1,154 @@
+import copy
+import csv
+import time
+
+import numpy as np
+
+from dplibraries.generators.tracing import get_tracer
+from dplibraries.models.deployment_predictor import majority_vote
+
+
+def fold_assignments(n_rows: int, folds: int, seed: int = 0):
+    """Return the fold of each row, shuffled, with fold sizes differing by at most one."""
+    return np.random.default_rng(seed).permutation(n_rows) % folds
+
+
+def confusion_matrix(actual, predicted, n_classes: int):
+    """Return the (n_classes, n_classes) counts of actual (rows) against predicted (columns) labels."""
+    return np.bincount(np.asarray(actual, dtype=np.int64) * n_classes + np.asarray(predicted, dtype=np.int64),
+                       minlength=n_classes * n_classes).reshape(n_classes, n_classes)
+
+
+def per_platform(confusion, classes) -> dict:
+    """Split a confusion matrix into one-vs-rest counts, precision and recall per platform."""
+    tp = np.diag(confusion)
+    fp = confusion.sum(axis=0) - tp
+    fn = confusion.sum(axis=1) - tp
+    tn = confusion.sum() - tp - fp - fn
+    return {
+        str(platform): {
+            "tp": int(tp[i]), "fp": int(fp[i]), "fn": int(fn[i]), "tn": int(tn[i]),
+            "precision": round(float(tp[i] / max(tp[i] + fp[i], 1)), 4),
+            "recall": round(float(tp[i] / max(tp[i] + fn[i], 1)), 4),
+        }
+        for i, platform in enumerate(classes)
+    }
+
+
+# Rows queried at once while cross-validating, bounding the (rows, block) score matrices of the index
+QUERY_BATCH = 1024
+
+
+def _vote(index, Q, k: int, labels, n_classes: int, exclude=None):
+    """Return the majority-vote label of each row of Q, querying the index QUERY_BATCH rows at a time."""
+    predicted = np.empty(len(Q), dtype=np.int64)
+    for start in range(0, len(Q), QUERY_BATCH):
+        stop = min(start + QUERY_BATCH, len(Q))
+        idx, _ = index.query(Q[start:stop], k, exclude=None if exclude is None else exclude[start:stop])
+        predicted[start:stop] = majority_vote(labels[idx], n_classes)[0]
+    return predicted
+
+
+def cross_validate(predictor, n_similar: int = 5, folds: int = None, seed: int = 0):
+    """
+    Predict every labelled row of a predictor from the other rows.
+
+    Leave-one-out (the default) queries the fitted index for all rows,
+    with each row masked out of its own top-k. With ``folds`` each fold is
+    queried against a copy of the index fitted on the other folds. Queries
+    go ``QUERY_BATCH`` rows at a time, so memory does not grow with the
+    dataset. Rows keep the scaling fitted on the whole dataset.
+
+    Args:
+        predictor (DeploymentPredictor): Fitted predictor.
+        n_similar (int): Number of neighbours that vote on each prediction.
+        folds (int): (Optional) number of folds. Defaults to leave-one-out.
+        seed (int): Seed of the fold shuffle.
+
+    Returns:
+        np.ndarray: predicted label index of every row
+
+    Raises:
+        ValueError: if folds is less than 2
+    """
+    if folds is not None and folds < 2:
+        raise ValueError(f"folds must be at least 2, got {folds}")
+    binary = getattr(predictor.index, "binary", False)
+    X = predictor.features if binary else predictor.X_scaled
+    y = np.asarray(predictor.y_encoded)
+    n_rows, n_classes = len(y), len(predictor.classes)
+
+    if folds is None or folds >= n_rows:
+        return _vote(predictor.index, X, min(n_similar, n_rows - 1), y, n_classes, exclude=np.arange(n_rows))
+
+    predicted = np.empty(n_rows, dtype=np.int64)
+    assignment = fold_assignments(n_rows, folds, seed)
+    for fold in range(folds):
+        test = assignment == fold
+        train = np.flatnonzero(~test)
+        # A copy, so refitting leaves the predictor's own index untouched
+        index = copy.copy(predictor.index).fit(X[train])
+        predicted[test] = _vote(index, X[test], min(n_similar, len(train)), y[train], n_classes)
+    return predicted
+
+
+def evaluate_predictor(predictor, n_similar=(1, 3, 5, 7, 9), folds: int = None, seed: int = 0) -> list:
+    """
+    Measure accuracy and query speed of a predictor for a sweep of neighbour counts.
+
+    Args:
+        predictor (DeploymentPredictor): Fitted predictor.
+        n_similar: Neighbour counts (k) to evaluate.
+        folds (int): (Optional) number of folds. Defaults to leave-one-out.
+        seed (int): Seed of the fold shuffle.
+
+    Returns:
+        list: one dict per k with "k", "folds", "rows", "accuracy", "queries_per_second",
+        "confusion" (actual rows, predicted columns, in ``classes`` order), "classes"
+        and "per_platform" one-vs-rest counts
+    """
+    y = np.asarray(predictor.y_encoded)
+    classes = [str(platform) for platform in predictor.classes]
+    results = []
+    for k in n_similar:
+        with get_tracer().span("predictor.evaluate", k=k, rows=len(y), folds=folds or len(y)):
+            start = time.perf_counter()
+            predicted = cross_validate(predictor, k, folds, seed)
+            seconds = time.perf_counter() - start
+        confusion = confusion_matrix(y, predicted, len(classes))
+        results.append({
+            "k": k,
+            "folds": folds or len(y),
+            "rows": len(y),
+            "accuracy": round(float(np.mean(predicted == y)), 4),
+            "queries_per_second": round(len(y) / max(seconds, 1e-9)),
+            "confusion": confusion.tolist(),
+            "classes": classes,
+            "per_platform": per_platform(confusion, classes),
+        })
+    return results
+
+
+def scale_dataset(dataset_path: str, n_rows: int, output_path: str, noise: float = 0.05, seed: int = 0) -> None:
+    """
+    Write a dataset.csv-shaped file of n_rows repositories resampled from a real dataset.
+
+    Rows are drawn with replacement and keep their label; each feature is
+    flipped with probability ``noise``, so the synthetic rows stay close to
+    the real distribution without being exact copies.
+    """
+    with open(dataset_path, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        rows = list(reader)
+    labels = np.array([row[1] for row in rows])
+    features = np.array([[value.strip().lower() == "yes" for value in row[2:]] for row in rows])
+
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(rows), n_rows)
+    sampled = features[picks] ^ (rng.random((n_rows, features.shape[1])) < noise)
+    with open(output_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for i in range(n_rows):
+            writer.writerow([f"synthetic/repo-{i}", labels[picks[i]], *("Yes" if v else "No" for v in sampled[i])])
@@ -0,0 +1,210 @@
+import json
+import re
+from dplibraries.generators.project_structure import iter_structure_paths
+
+# Feature columns of dataset.csv, in file order
+FEATURE_COLUMNS = [
+    "already_deployed", "has_frontend", "has_cicd", "multiple_environments", "uses_containerization",
+    "uses_iac", "high_availability", "authentication", "realtime_events", "storage", "caching",
+    "ai_implementation", "database", "microservices", "monolith", "api_exposed", "message_queues",
+    "background_jobs", "sensitive_data", "external_apis",
+]
+
+# Each rule has up to three kinds of evidence, any of which sets the feature:
+#   paths:   regex searched in every lowercased repository path ("/"-separated, dirs end with "/")
+#   deps:    package names found in package.json / requirements*.txt / pyproject.toml / Pipfile / go.mod / Gemfile
+#   content: regex searched in the text of any supplied manifest file
+FEATURE_RULES = {
+    "already_deployed": {
+        "paths": r"(^|/)(vercel\.json|now\.json|netlify\.toml|firebase\.json|\.firebaserc|app\.yaml|procfile|fly\.toml"
+                 r"|render\.yaml|amplify\.yml|appspec\.yml|heroku\.yml|cloudbuild\.ya?ml)$",
+    },
+    "has_frontend": {
+        "paths": r"(\.(jsx|tsx|vue|svelte|astro)$|(^|/)(index\.html|angular\.json|next\.config\.[cm]?[jt]s"
+                 r"|vite\.config\.[cm]?[jt]s|nuxt\.config\.[jt]s|svelte\.config\.js|gatsby-config\.[jt]s)$|(^|/)components/)",
+        "deps": {"react", "vue", "next", "nuxt", "svelte", "@angular/core", "astro", "gatsby", "preact", "solid-js",
+                 "streamlit", "gradio"},
+    },
+    "has_cicd": {
+        "paths": r"(^\.github/workflows/.+\.ya?ml$|^\.gitlab-ci\.yml$|^\.circleci/|(^|/)jenkinsfile$|^\.travis\.yml$"
+                 r"|^azure-pipelines\.yml$|^bitbucket-pipelines\.yml$|^\.drone\.yml$|^buildspec\.yml$)",
+    },
+    "multiple_environments": {
+        "paths": r"((^|/)\.env\.(production|staging|development|prod|dev|test)$|(^|/)(environments?|envs)/"
+                 r"|(^|/)(staging|production)/|docker-compose\.(prod|production|staging|dev)\.ya?ml$"
+                 r"|(^|/)config/(production|staging|development)\.)",
+        "content": r"environment:\s*(staging|production)",
+    },
+    "uses_containerization": {
+        "paths": r"((^|/)dockerfile([.-][^/]*)?$|(^|/)(docker-)?compose(\.[^/]+)?\.ya?ml$|(^|/)\.dockerignore$"
+                 r"|(^|/)(k8s|kubernetes|helm|charts)/|(^|/)chart\.yaml$)",
+    },
+    "uses_iac": {
+        "paths": r"(\.(tf|tfvars|bicep)$|(^|/)(cdk\.json|pulumi\.ya?ml|serverless\.ya?ml|template\.ya?ml|terragrunt\.hcl)$"
+                 r"|(^|/)(terraform|cloudformation|pulumi|infra|infrastructure)/)",
+        "deps": {"aws-cdk-lib", "aws-cdk", "@pulumi/pulumi", "pulumi"},
+    },
+    "high_availability": {
+        "paths": r"((^|/)hpa[^/]*\.ya?ml$|(^|/)[^/]*autoscal[^/]*$)",
+        "content": r"(horizontalpodautoscaler|multi_az\s*=\s*true|aws_autoscaling_group|min_capacity|replicas:\s*[2-9])",
+    },
+    "authentication": {
+        "paths": r"(^|/)(auth|authentication|login|signin|sign-in|oauth|passport|session)s?(/|\.[a-z]+$)",
+        "deps": {"next-auth", "@auth/core", "passport", "jsonwebtoken", "bcrypt", "bcryptjs", "@clerk/nextjs",
+                 "@auth0/nextjs-auth0", "firebase-admin", "lucia", "django-allauth", "flask-login", "authlib",
+                 "pyjwt", "python-jose", "djangorestframework-simplejwt", "devise", "golang-jwt/jwt"},
+    },
+    "realtime_events": {
+        "paths": r"(^|/)[^/]*(socket|websocket|realtime|pubsub|channels?)[^/]*(/|$)",
+        "deps": {"socket.io", "socket.io-client", "ws", "pusher", "pusher-js", "ably", "@supabase/realtime-js",
+                 "channels", "websockets", "python-socketio", "gorilla/websocket", "actioncable"},
+    },
+    "storage": {
+        "paths": r"((^|/)(uploads?|storage|media|attachments|files)/|(^|/)storage\.rules$)",
+        "deps": {"multer", "@aws-sdk/client-s3", "aws-sdk", "@google-cloud/storage", "boto3", "django-storages",
+                 "minio", "cloudinary", "activestorage"},
+    },
+    "caching": {
+        "paths": r"(^|/)(cache|caching|redis)(/|\.[a-z]+$)",
+        "deps": {"redis", "ioredis", "memcached", "node-cache", "lru-cache", "django-redis", "flask-caching",
+                 "aiocache", "cachetools", "dalli", "go-redis/redis"},
+        "content": r"\bimage:\s*(redis|memcached)\b",
+    },
+    "ai_implementation": {
+        "paths": r"(\.(ipynb|pkl|onnx|pt|h5)$|(^|/)(ml|ai|llm|prompts)/)",
+        "deps": {"openai", "langchain", "@langchain/core", "anthropic", "@anthropic-ai/sdk", "transformers", "torch",
+                 "tensorflow", "scikit-learn", "sklearn", "keras", "ai", "@tensorflow/tfjs", "sentence-transformers"},
+    },
+    "database": {
+        "paths": r"((^|/)(migrations?|prisma|db|database|models)/|\.(sql|sqlite3?)$|(^|/)(schema\.prisma"
+                 r"|firestore\.rules|alembic\.ini|knexfile\.[jt]s|ormconfig\.[jt]son?)$)",
+        "deps": {"pg", "mysql", "mysql2", "mongoose", "mongodb", "prisma", "@prisma/client", "sequelize", "typeorm",
+                 "knex", "drizzle-orm", "sqlalchemy", "psycopg2", "psycopg2-binary", "psycopg", "pymongo", "django",
+                 "peewee", "sqlite3", "better-sqlite3", "gorm.io/gorm", "activerecord", "firebase"},
+        "content": r"\bimage:\s*(postgres|mysql|mariadb|mongo)",
+    },
+    "api_exposed": {
+        "paths": r"((^|/)(api|apis|routes|controllers|handlers|endpoints|graphql)/|(^|/)(openapi|swagger)\.(ya?ml|json)$)",
+        "deps": {"express", "fastify", "koa", "@nestjs/core", "hapi", "@hapi/hapi", "fastapi", "flask", "django",
+                 "djangorestframework", "graphql", "apollo-server", "@trpc/server", "gin-gonic/gin", "rails", "sinatra"},
+    },
+    "message_queues": {
+        "paths": r"(^|/)(queues?|kafka|rabbitmq|amqp|sqs|nats)(/|\.[a-z]+$)",
+        "deps": {"kafkajs", "amqplib", "bullmq", "bull", "@aws-sdk/client-sqs", "@google-cloud/pubsub", "kafka-python",
+                 "confluent-kafka", "pika", "nats", "kombu"},
+        "content": r"\bimage:\s*(rabbitmq|confluentinc|bitnami/kafka|nats)",
+    },
+    "background_jobs": {
+        "paths": r"((^|/)(workers?|jobs|tasks|cron|scheduler|queues?)(/|\.[a-z]+$)|(^|/)celery\.py$)",
+        "deps": {"celery", "rq", "dramatiq", "apscheduler", "huey", "bull", "bullmq", "agenda", "node-cron", "bee-queue",
+                 "sidekiq", "resque", "graphile-worker"},
+    },
+    "sensitive_data": {
+        "paths": r"((^|/)\.env(\.example|\.sample|\.template)?$|(^|/)(secrets?|vault|encryption|crypto|payments?|billing)(/|\.[a-z]+$))",
+        "deps": {"stripe", "bcrypt", "bcryptjs", "argon2", "cryptography", "crypto-js", "node-vault", "hvac",
+                 "@stripe/stripe-js", "paypal-rest-sdk"},
+    },
+    "external_apis": {
+        "paths": r"(^|/)(integrations?|clients?|webhooks?|third[-_]party)(/|\.[a-z]+$)",
+        "deps": {"axios", "node-fetch", "got", "requests", "httpx", "aiohttp", "stripe", "twilio", "@sendgrid/mail",
+                 "sendgrid", "nodemailer", "openai", "octokit", "@octokit/rest", "pygithub", "googleapis", "slack-sdk",
+                 "@slack/web-api"},
+    },
+}
+
+_PATH_PATTERNS = {feature: re.compile(rule["paths"]) for feature, rule in FEATURE_RULES.items() if "paths" in rule}
+_CONTENT_PATTERNS = {
+    feature: re.compile(rule["content"], re.IGNORECASE) for feature, rule in FEATURE_RULES.items() if "content" in rule
+}
+
+# Separately deployable services live in their own directory under services/ with a build manifest
+_SERVICE_MANIFEST = re.compile(
+    r"^(micro)?services/[^/]+/(dockerfile|package\.json|requirements\.txt|pyproject\.toml|go\.mod|pom\.xml)$"
+)
+_BACKEND_ENTRY = re.compile(
+    r"(^|/)(server|app|main|index|manage|wsgi|asgi)\.(py|js|ts|go|rb|php)$|(^|/)(server|backend|api)/|(^|/)main\.go$"
+)
+
+_REQUIREMENT_NAME = re.compile(r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)")
+_QUOTED_NAME = re.compile(r"""["']([A-Za-z0-9][A-Za-z0-9._-]*)\s*[<>=~!;\[\]"']""")
+
+
+def parse_dependencies(path: str, text: str) -> set:
+    """Return the lowercased package names declared in a manifest file."""
+    filename = path.lower().rsplit("/", 1)[-1]
+    names = set()
+    if filename == "package.json":
+        try:
+            manifest = json.loads(text)
+        except ValueError:
+            return names
+        for section in ("dependencies", "devDependencies", "peerDependencies", "optionalDependencies"):
+            names.update(manifest.get(section) or {})
+    elif filename.startswith("requirements") and filename.endswith(".txt"):
+        for line in text.splitlines():
+            match = _REQUIREMENT_NAME.match(line)
+            if match and not line.lstrip().startswith(("-", "#")):
+                names.add(match.group(1))
+    elif filename in ("pyproject.toml", "pipfile", "gemfile"):
+        # Quoted specifiers ("fastapi>=0.110", gem 'rails') and table keys (fastapi = "^0.110")
+        names.update(_QUOTED_NAME.findall(text))
+        for line in text.splitlines():
+            match = _REQUIREMENT_NAME.match(line)
+            if match and "=" in line:
+                names.add(match.group(1))
+    elif filename == "go.mod":
+        for line in text.splitlines():
+            parts = line.strip().split()
+            if parts and "/" in parts[0] and parts[0] != "module":
+                # Keep the "owner/name" tail, e.g. github.com/gin-gonic/gin -> gin-gonic/gin
+                names.add("/".join(parts[0].split("/")[-2:]))
+    return {name.lower().replace("_", "-") for name in names}
+
+
+def extract_features(project_structure: str, files: dict = None) -> dict:
+    """
+    Map a repository tree to the binary feature columns of dataset.csv.
+
+    The rules in FEATURE_RULES are deterministic and local, so the result can
+    be fed to ``DeploymentPredictor.predict_features`` without any network or
+    model calls.
+
+    Args:
+        project_structure (str): Indented tree as produced by ``DeploymentGenerator._get_project_structure``.
+        files (dict): (Optional) path -> text of key files such as package.json,
+            requirements.txt, Dockerfile, *.tf or .github/workflows/*.yml.
+
+    Returns:
+        dict: feature column -> 0 or 1, in FEATURE_COLUMNS order
+    """
+    found = set()
+    services = set()
+    has_backend = False
+
+    for path in iter_structure_paths(project_structure):
+        path = path.lower()
+        for feature, pattern in _PATH_PATTERNS.items():
+            if feature not in found and pattern.search(path):
+                found.add(feature)
+        if _SERVICE_MANIFEST.match(path):
+            services.add(path.split("/")[1])
+        if not has_backend and _BACKEND_ENTRY.search(path):
+            has_backend = True
+
+    for path, text in (files or {}).items():
+        text = text or ""
+        dependencies = parse_dependencies(path, text)
+        for feature, rule in FEATURE_RULES.items():
+            if feature in found:
+                continue
+            if dependencies & rule.get("deps", set()):
+                found.add(feature)
+            elif feature in _CONTENT_PATTERNS and _CONTENT_PATTERNS[feature].search(text):
+                found.add(feature)
+
+    if len(services) >= 3:
+        found.add("microservices")
+    elif has_backend or "api_exposed" in found:
+        found.add("monolith")
+
+    return {feature: int(feature in found) for feature in FEATURE_COLUMNS}
@@ -0,0 +1,365 @@
+import numpy as np
+
+# Indexed rows scored per step of an exact scan
+SCAN_BLOCK_SIZE = 8192
+
+
+def _normalize_rows(X):
+    """Scale rows to unit length; all-zero rows are left as zeros, like sklearn's cosine_similarity."""
+    X = np.asarray(X, dtype=np.float64)
+    if X.ndim == 1:
+        X = X.reshape(1, -1)
+    norms = np.linalg.norm(X, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return X / norms
+
+
+def _select_top_k(scores, indices, k):
+    """
+    Return the k best (indices, scores) per row, ordered by score then index.
+
+    Args:
+        scores (np.ndarray): (M, C) candidate scores, -inf for excluded candidates.
+        indices (np.ndarray): (M, C) dataset row of each candidate.
+        k (int): Number of neighbours to keep.
+    """
+    k = min(k, scores.shape[1])
+    if k < scores.shape[1]:
+        part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        scores = np.take_along_axis(scores, part, axis=1)
+        indices = np.take_along_axis(indices, part, axis=1)
+    # Highest score first; ties go to the lower dataset index
+    order = np.lexsort((indices, -scores), axis=1)
+    return np.take_along_axis(indices, order, axis=1), np.take_along_axis(scores, order, axis=1)
+
+
+def _scan_top_k(vectors, Q, k, exclude, block_size):
+    """
+    Exact top-k of normalised queries Q over normalised vectors, scanning ``block_size`` rows at a time.
+
+    The block shrinks as the number of queries grows, so the (M, block)
+    score matrix stays near ``block_size * 256`` entries however many rows
+    are queried at once.
+    """
+    M, N = Q.shape[0], vectors.shape[0]
+    block_size = max(1, min(block_size, block_size * 256 // max(M, 1)))
+    best_idx = np.empty((M, 0), dtype=np.int64)
+    best_scores = np.empty((M, 0), dtype=np.float64)
+    for start in range(0, N, block_size):
+        stop = min(start + block_size, N)
+        scores = Q @ vectors[start:stop].T
+        idx = np.broadcast_to(np.arange(start, stop), scores.shape)
+        if exclude is not None:
+            scores = np.where(idx == exclude, -np.inf, scores)
+        best_idx, best_scores = _select_top_k(
+            np.concatenate([best_scores, scores], axis=1),
+            np.concatenate([best_idx, idx], axis=1),
+            k,
+        )
+    return best_idx, best_scores
+
+
+class ExactNeighborIndex:
+    def __init__(self, block_size: int = SCAN_BLOCK_SIZE):
+        """
+        Exact cosine top-k search over a dense feature matrix.
+
+        The dataset is scanned in blocks of at most ``block_size`` rows, fewer
+        for large batches of queries, and only the running top-k per query is
+        kept, so memory stays O(M * k + block_size * 256) instead of the
+        O(N^2) of a full similarity matrix.
+        """
+        self.block_size = block_size
+        self.vectors = None
+
+    def fit(self, X):
+        """Index the rows of X."""
+        self.vectors = _normalize_rows(X)
+        return self
+
+    def add(self, X):
+        """Append rows to the index; they get the next dataset indices."""
+        self.vectors = np.concatenate([self.vectors, _normalize_rows(X)])
+        return self
+
+    def __len__(self):
+        return 0 if self.vectors is None else self.vectors.shape[0]
+
+    def query(self, Q, k: int, exclude=None):
+        """
+        Find the k most similar indexed rows for each query row.
+
+        Args:
+            Q (np.ndarray): (M, F) or (F,) query vectors in the same space as the indexed rows.
+            k (int): Number of neighbours to return.
+            exclude (array-like): (Optional) one dataset row per query to leave out, -1 for none.
+
+        Returns:
+            tuple: (indices, scores), each (M, k), best match first
+        """
+        Q = _normalize_rows(Q)
+        M = Q.shape[0]
+        exclude = None if exclude is None else np.asarray(exclude).reshape(M, 1)
+        return _scan_top_k(self.vectors, Q, min(k, len(self)), exclude, self.block_size)
+
+
+class LSHNeighborIndex:
+    def __init__(self, n_tables: int = 8, n_bits: int = 12, seed: int = 0, batch_size: int = 1024):
+        """
+        Approximate cosine top-k search with random-hyperplane hashing.
+
+        Each of ``n_tables`` tables buckets rows by the signs of ``n_bits``
+        random projections. A query is compared exactly only against rows
+        sharing a bucket with it in some table; when that yields fewer than k
+        candidates the full dataset is scanned instead. Queries are answered
+        ``batch_size`` at a time, each batch scoring all its (query, candidate)
+        pairs together.
+        """
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        self.seed = seed
+        self.batch_size = batch_size
+        self.vectors = None
+        self.planes = None
+        self.tables = []
+
+    def fit(self, X):
+        """Index the rows of X."""
+        self.vectors = _normalize_rows(X)
+        rng = np.random.default_rng(self.seed)
+        self.planes = rng.standard_normal((self.n_tables, self.vectors.shape[1], self.n_bits))
+        self.tables = [{} for _ in range(self.n_tables)]
+        self._insert(self.vectors, 0)
+        return self
+
+    def add(self, X):
+        """Append rows to the index; they get the next dataset indices."""
+        start = len(self)
+        rows = _normalize_rows(X)
+        self.vectors = np.concatenate([self.vectors, rows])
+        self._insert(rows, start)
+        return self
+
+    def _insert(self, rows, start):
+        """Add already-normalised rows, numbered from start, to every hash table."""
+        for table, codes in zip(self.tables, self._hash(rows)):
+            order = np.argsort(codes, kind="stable")
+            keys, starts = np.unique(codes[order], return_index=True)
+            for key, bucket in zip(keys.tolist(), np.split(order + start, starts[1:])):
+                table[key] = np.concatenate([table[key], bucket]) if key in table else bucket
+
+    def __len__(self):
+        return 0 if self.vectors is None else self.vectors.shape[0]
+
+    def _hash(self, V):
+        """Return (n_tables, M) integer bucket codes for the rows of V."""
+        bits = np.einsum("mf,tfb->tmb", V, self.planes) > 0
+        return bits.astype(np.int64) @ (1 << np.arange(self.n_bits, dtype=np.int64))
+
+    def query(self, Q, k: int, exclude=None):
+        """Same contract as ExactNeighborIndex.query, with approximate recall."""
+        Q = _normalize_rows(Q)
+        M, N = Q.shape[0], len(self)
+        k = min(k, N)
+        exclude = np.full(M, -1) if exclude is None else np.asarray(exclude).reshape(M)
+
+        out_idx = np.empty((M, k), dtype=np.int64)
+        out_scores = np.empty((M, k), dtype=np.float64)
+        for start in range(0, M, self.batch_size):
+            stop = min(start + self.batch_size, M)
+            out_idx[start:stop], out_scores[start:stop] = self._query_batch(Q[start:stop], k, exclude[start:stop])
+        return out_idx, out_scores
+
+    def _query_batch(self, Q, k, exclude):
+        """Answer a batch of normalised queries from their bucket candidates, scanning all rows for short ones."""
+        M, N = Q.shape[0], len(self)
+        # Every (query, candidate) pair of the buckets the queries fall into, one table and bucket at a time
+        rows, candidates = [], []
+        for table, codes in zip(self.tables, self._hash(Q)):
+            order = np.argsort(codes, kind="stable")
+            keys, starts = np.unique(codes[order], return_index=True)
+            for key, queries in zip(keys.tolist(), np.split(order, starts[1:])):
+                bucket = table.get(key)
+                if bucket is not None:
+                    rows.append(np.repeat(queries, len(bucket)))
+                    candidates.append(np.tile(bucket, len(queries)))
+        pairs = np.unique(np.concatenate(rows) * N + np.concatenate(candidates)) if rows else np.empty(0, np.int64)
+        rows, candidates = np.divmod(pairs, N)
+        keep = candidates != exclude[rows]
+        rows, candidates = rows[keep], candidates[keep]
+
+        out_idx = np.empty((M, k), dtype=np.int64)
+        out_scores = np.empty((M, k), dtype=np.float64)
+        counts = np.bincount(rows, minlength=M)
+        short = np.flatnonzero(counts < k)
+        if len(short):
+            out_idx[short], out_scores[short] = _scan_top_k(
+                self.vectors, Q[short], k, exclude[short].reshape(-1, 1), SCAN_BLOCK_SIZE
+            )
+            keep = counts[rows] >= k
+            rows, candidates = rows[keep], candidates[keep]
+
+        # Best k of each query's candidates: by query, then highest score, then lowest index
+        scores = np.einsum("ij,ij->i", self.vectors[candidates], Q[rows])
+        order = np.lexsort((candidates, -scores, rows))
+        rows, candidates, scores = rows[order], candidates[order], scores[order]
+        first = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=M))[:-1]])
+        rank = np.arange(len(rows)) - first[rows]
+        top = rank < k
+        out_idx[rows[top], rank[top]] = candidates[top]
+        out_scores[rows[top], rank[top]] = scores[top]
+        return out_idx, out_scores
+
+
+def pack_bits(X):
+    """
+    Pack rows of 0/1 features into uint64 words, 64 features per word.
+
+    Args:
+        X (np.ndarray): (N, F) or (F,) array of 0/1 values.
+
+    Returns:
+        np.ndarray: (N, ceil(F / 64)) uint64 array
+    """
+    X = np.asarray(X)
+    if X.ndim == 1:
+        X = X.reshape(1, -1)
+    n_words = max(1, -(-X.shape[1] // 64))
+    padded = np.zeros((X.shape[0], n_words * 64), dtype=np.uint8)
+    padded[:, :X.shape[1]] = X != 0
+    return np.packbits(padded, axis=1, bitorder="little").view("<u8")
+
+
+def unpack_bits(words, n_features: int):
+    """
+    Unpack rows of uint64 words written by ``pack_bits`` back into 0/1 features.
+
+    Args:
+        words (np.ndarray): (N, W) uint64 array.
+        n_features (int): Number of features F packed per row.
+
+    Returns:
+        np.ndarray: (N, F) uint8 array
+    """
+    as_bytes = np.ascontiguousarray(words, dtype="<u8").view(np.uint8)
+    return np.unpackbits(as_bytes, axis=1, count=n_features, bitorder="little")
+
+
+if hasattr(np, "bitwise_count"):
+    def popcount(words):
+        """Count the set bits along the last axis of a uint64 array."""
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int64)
+else:
+    _BYTE_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def popcount(words):
+        """Count the set bits along the last axis of a uint64 array."""
+        as_bytes = np.ascontiguousarray(words).view(np.uint8).reshape(words.shape[:-1] + (-1,))
+        return _BYTE_POPCOUNT[as_bytes].sum(axis=-1, dtype=np.int64)
+
+
+class BinaryNeighborIndex:
+    binary = True
+
+    def __init__(self, metric: str = "jaccard", block_size: int = 65536):
+        """
+        Exact top-k search over bit-packed binary feature vectors.
+
+        Every row is stored as ceil(F / 64) uint64 words and similarity is
+        derived from popcounts of the AND of query and row, so a 20-feature
+        repository takes 8 bytes instead of 160 for a float64 row. It indexes
+        the raw 0/1 features rather than scaled ones.
+
+        Args:
+            metric (str): "jaccard", "hamming" (1 - normalised Hamming distance) or "cosine".
+            block_size (int): Rows scanned per step when keeping the running top-k.
+        """
+        if metric not in ("jaccard", "hamming", "cosine"):
+            raise ValueError(f"Unknown metric '{metric}'. Choose from: jaccard, hamming, cosine")
+        self.metric = metric
+        self.block_size = block_size
+        self.words = None
+        self.counts = None
+        self.n_features = 0
+
+    def fit(self, X):
+        """Pack and index the 0/1 rows of X."""
+        X = np.asarray(X)
+        self.n_features = X.shape[1]
+        self.words = pack_bits(X)
+        self.counts = self._counts(self.words)
+        return self
+
+    def add(self, X):
+        """Append 0/1 rows to the index; they get the next dataset indices."""
+        words = pack_bits(X)
+        self.words = np.concatenate([self.words, words])
+        self.counts = np.concatenate([self.counts, self._counts(words)])
+        return self
+
+    def _counts(self, words):
+        """Set bits per row, in the narrowest integer type that holds n_features."""
+        return popcount(words).astype(np.min_scalar_type(self.n_features))
+
+    def rows(self, idx):
+        """Return the indexed rows at positions idx as (len(idx), F) 0/1 uint8 features."""
+        return unpack_bits(self.words[idx], self.n_features)
+
+    def __len__(self):
+        return 0 if self.words is None else self.words.shape[0]
+
+    def _similarity(self, q_words, q_counts, start, stop):
+        """(M, stop - start) similarities between packed queries and a block of indexed rows."""
+        inter = popcount(q_words[:, None, :] & self.words[None, start:stop, :])
+        counts = self.counts[None, start:stop]
+        q_counts = q_counts[:, None]
+        if self.metric == "jaccard":
+            union = q_counts + counts - inter
+            # Two all-zero vectors are identical
+            return np.where(union == 0, 1.0, inter / np.maximum(union, 1))
+        if self.metric == "hamming":
+            return 1.0 - (q_counts + counts - 2 * inter) / max(self.n_features, 1)
+        denom = np.sqrt(q_counts * counts)
+        return np.where(denom == 0, 0.0, inter / np.where(denom == 0, 1, denom))
+
+    def query(self, Q, k: int, exclude=None):
+        """Same contract as ExactNeighborIndex.query, with Q holding raw 0/1 features."""
+        q_words = pack_bits(Q)
+        q_counts = popcount(q_words)
+        M, N = q_words.shape[0], len(self)
+        k = min(k, N)
+        exclude = None if exclude is None else np.asarray(exclude).reshape(M, 1)
+
+        # Keep the (M, block, words) intermediate of the AND bounded
+        block_size = max(1, min(self.block_size, self.block_size * 64 // max(M, 1)))
+        best_idx = np.empty((M, 0), dtype=np.int64)
+        best_scores = np.empty((M, 0), dtype=np.float64)
+        for start in range(0, N, block_size):
+            stop = min(start + block_size, N)
+            scores = self._similarity(q_words, q_counts, start, stop)
+            idx = np.broadcast_to(np.arange(start, stop), scores.shape)
+            if exclude is not None:
+                scores = np.where(idx == exclude, -np.inf, scores)
+            best_idx, best_scores = _select_top_k(
+                np.concatenate([best_scores, scores], axis=1),
+                np.concatenate([best_idx, idx], axis=1),
+                k,
+            )
+        return best_idx, best_scores
+
+
+NEIGHBOR_INDEXES = {
+    "exact": ExactNeighborIndex,
+    "approximate": LSHNeighborIndex,
+    "binary": BinaryNeighborIndex,
+}
+
+
+def make_neighbor_index(index="exact"):
+    """Return a neighbour index from a NEIGHBOR_INDEXES name or an index instance."""
+    if isinstance(index, str):
+        try:
+            return NEIGHBOR_INDEXES[index]()
+        except KeyError:
+            raise ValueError(f"Unknown neighbour index '{index}'. Choose from: {', '.join(NEIGHBOR_INDEXES)}")
+    return index
@@ -0,0 +1,7 @@
+"""
+Service module for DeployPilot.
+
+This module contains a long-running HTTP service that keeps the generators
+and the predictor warm and runs requests as jobs. Run it with
+``python -m dplibraries.service``.
+"""
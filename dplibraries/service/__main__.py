@@ -0,0 +1,3 @@
+from dplibraries.service.server import main
+
+main()
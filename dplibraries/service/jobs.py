@@ -0,0 +1,180 @@
+import asyncio
+import contextvars
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from dplibraries.generators.tracing import get_tracer
+
+# Span of the job a coroutine belongs to; asyncio gives every job task its own copy
+_job_span = contextvars.ContextVar("job_span", default=None)
+
+
+class Job:
+    def __init__(self, kind: str, params: dict):
+        """One submitted request, tracked from "queued" through "running" to "done" or "failed"."""
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.done = threading.Event()
+
+    def to_dict(self) -> dict:
+        seconds = None
+        if self.started is not None:
+            seconds = round((self.finished or time.time()) - self.started, 3)
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "params": self.params,
+            "result": self.result,
+            "error": self.error,
+            "submitted": self.submitted,
+            "seconds": seconds,
+        }
+
+
+class JobQueue:
+    def __init__(self, workers: int = 8, github_concurrency: int = 4, openai_concurrency: int = 4,
+                 max_finished: int = 1000):
+        """
+        Runs jobs as coroutines on an asyncio event loop in a background thread.
+
+        Handlers are coroutines called as ``handler(**params)``. They make
+        their blocking GitHub and OpenAI calls through ``github(fn)`` and
+        ``openai(fn)``, which run fn on the worker threads while holding a slot
+        of the matching limit, so a burst of jobs waits on the loop instead of
+        piling onto either API.
+
+        Args:
+            workers (int): Jobs running at once; also the number of worker threads.
+            github_concurrency (int): Jobs talking to GitHub at once.
+            openai_concurrency (int): Jobs waiting on OpenAI at once.
+            max_finished (int): Finished jobs kept for polling before the oldest are forgotten.
+        """
+        self.workers = workers
+        self.github_concurrency = github_concurrency
+        self.openai_concurrency = openai_concurrency
+        self.max_finished = max_finished
+        self._handlers = {}
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+
+    def register(self, kind: str, handler) -> None:
+        """Run handler for jobs of this kind."""
+        self._handlers[kind] = handler
+
+    @property
+    def kinds(self) -> list:
+        return list(self._handlers)
+
+    def start(self):
+        """Start the event loop thread."""
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._loop.set_default_executor(ThreadPoolExecutor(self.workers, thread_name_prefix="deploypilot-job"))
+            self._slots = asyncio.Semaphore(self.workers)
+            self._github_slots = asyncio.Semaphore(self.github_concurrency)
+            self._openai_slots = asyncio.Semaphore(self.openai_concurrency)
+            ready.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self._loop.shutdown_default_executor())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="deploypilot-jobs", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop(self) -> None:
+        """Stop the event loop after the blocking calls in progress return; unfinished jobs are abandoned."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def submit(self, kind: str, params: dict) -> Job:
+        """
+        Queue a job and return it at once; poll ``get(job.id)`` or wait on ``job.done``.
+
+        Raises:
+            ValueError: if no handler is registered for kind
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind {kind!r}, expected one of: {', '.join(self._handlers)}")
+        if self._loop is None:
+            raise RuntimeError("JobQueue is not started")
+        job = Job(kind, params)
+        with self._lock:
+            self._jobs[job.id] = job
+        asyncio.run_coroutine_threadsafe(self._run(job), self._loop)
+        return job
+
+    def get(self, job_id: str):
+        """Return the job with this id, or None if unknown or forgotten."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> dict:
+        """Number of known jobs per status."""
+        with self._lock:
+            counts = Counter(job.status for job in self._jobs.values())
+        return {status: counts[status] for status in ("queued", "running", "done", "failed")}
+
+    async def _run(self, job: Job) -> None:
+        # Not activated, as jobs share the loop thread; worker threads attach to it through _job_span
+        with get_tracer().span(f"job.{job.kind}", activate=False) as span:
+            _job_span.set(span)
+            try:
+                async with self._slots:
+                    job.status, job.started = "running", time.time()
+                    job.result = await self._handlers[job.kind](**job.params)
+                    job.status = "done"
+            except Exception as e:
+                job.status, job.error = "failed", str(e) or type(e).__name__
+                span.error = type(e).__name__
+            finally:
+                job.finished = time.time()
+                job.done.set()
+                self._forget_finished()
+
+    def _forget_finished(self) -> None:
+        """Drop the oldest finished jobs beyond max_finished."""
+        with self._lock:
+            finished = [job_id for job_id, job in self._jobs.items() if job.done.is_set()]
+            for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+                del self._jobs[job_id]
+
+    async def blocking(self, fn):
+        """Run a blocking call on a worker thread."""
+        fn = get_tracer().wrap(fn, parent=_job_span.get())
+        return await asyncio.get_running_loop().run_in_executor(None, fn)
+
+    async def github(self, fn):
+        """Run a blocking GitHub call on a worker thread, within github_concurrency."""
+        async with self._github_slots:
+            return await self.blocking(fn)
+
+    async def openai(self, fn):
+        """Run a blocking call waiting on OpenAI on a worker thread, within openai_concurrency."""
+        async with self._openai_slots:
+            return await self.blocking(fn)
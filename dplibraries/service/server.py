@@ -0,0 +1,261 @@
+import argparse
+import json
+import logging
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from dplibraries.agents.analysis_session import AnalysisSession
+from dplibraries.generators.deployment_generator import PLATFORM_PROMPTS
+from dplibraries.models.feature_extractor import extract_features
+from dplibraries.service.jobs import JobQueue
+
+logger = logging.getLogger("dplibraries.service")
+
+DATASET_PATH = Path(__file__).absolute().parents[2] / "dataset.csv"
+GITHUB_URL = re.compile(r'^https://github\.com/[a-zA-Z0-9_.-]+/[a-zA-Z0-9_.-]+/?$')
+
+# Parameters of each job kind: (required, optional)
+JOB_PARAMS = {
+    "files": ({"repo_url"}, {"platform", "ref"}),
+    "diagram": ({"repo_url"}, {"ref"}),
+    "predict": (set(), {"repository", "repo_url", "ref", "n_similar"}),
+}
+
+
+class DeployPilotService:
+    def __init__(self, session: AnalysisSession = None, predictor=None, jobs: JobQueue = None,
+                 dataset_path=DATASET_PATH):
+        """
+        The generators and predictor of one long-running process, offered as jobs.
+
+        Analyses are kept per repository and commit in an AnalysisSession, so
+        every client reuses the structure walks and completions made for
+        earlier requests about the same commit.
+
+        Args:
+            session (AnalysisSession): (Optional) analysis store. Defaults to one holding 64 repositories.
+            predictor (DeploymentPredictor): (Optional) local model. Loaded from dataset_path on first use.
+            jobs (JobQueue): (Optional) queue running the jobs. Defaults to ``JobQueue()``.
+            dataset_path: CSV the predictor is built from.
+        """
+        self.session = session if session is not None else AnalysisSession(max_repositories=64)
+        self.dataset_path = dataset_path
+        self._predictor = predictor
+        self._predictor_lock = threading.Lock()
+        self.jobs = jobs if jobs is not None else JobQueue()
+        self.jobs.register("files", self.files)
+        self.jobs.register("diagram", self.diagram)
+        self.jobs.register("predict", self.predict)
+
+    @property
+    def predictor(self):
+        with self._predictor_lock:
+            if self._predictor is None:
+                from dplibraries.models.deployment_predictor import DeploymentPredictor
+                self._predictor = DeploymentPredictor(self.dataset_path)
+            return self._predictor
+
+    def warm(self) -> None:
+        """Build the clients and the predictor now rather than during the first requests."""
+        self.session.generator
+        try:
+            self.predictor
+        except Exception as e:
+            # Predict jobs report the error; the other kinds do not need the model
+            logger.warning("Predictor unavailable: %s", e)
+
+    def validate(self, kind: str, params: dict) -> dict:
+        """
+        Check the parameters of a job before it is queued.
+
+        Raises:
+            ValueError: with a message for the client
+        """
+        if kind not in JOB_PARAMS:
+            raise ValueError(f"Unknown job kind {kind!r}, expected one of: {', '.join(JOB_PARAMS)}")
+        required, optional = JOB_PARAMS[kind]
+        missing = sorted(required - set(params))
+        unknown = sorted(set(params) - required - optional)
+        if missing:
+            raise ValueError(f"Missing parameters for {kind}: {', '.join(missing)}")
+        if unknown:
+            raise ValueError(f"Unknown parameters for {kind}: {', '.join(unknown)}")
+        if "repo_url" in params and not GITHUB_URL.match(str(params["repo_url"])):
+            raise ValueError(f"Invalid GitHub repository URL: {params['repo_url']}")
+        if params.get("platform") and params["platform"] not in PLATFORM_PROMPTS:
+            raise ValueError(f"Unsupported platform {params['platform']!r}, expected one of: "
+                             f"{', '.join(PLATFORM_PROMPTS)}")
+        if kind == "predict" and ("repository" in params) == ("repo_url" in params):
+            raise ValueError("predict needs either repository (a dataset entry) or repo_url")
+        n_similar = params.get("n_similar", 1)
+        # bool is an int subclass, so true and false would otherwise pass as 1 and 0
+        if isinstance(n_similar, bool) or not isinstance(n_similar, int) or n_similar < 1:
+            raise ValueError("n_similar must be a positive integer")
+        return params
+
+    def submit(self, kind: str, params: dict):
+        """Validate and queue a job."""
+        return self.jobs.submit(kind, self.validate(kind, params))
+
+    async def _analysis(self, repo_url: str, ref: str = None):
+        """Return the session's analysis of a repository, with its structure fetched."""
+        analysis = await self.jobs.github(lambda: self.session.get(repo_url, ref))
+        await self.jobs.github(lambda: analysis.structure)
+        return analysis
+
+    async def files(self, repo_url: str, platform: str = None, ref: str = None) -> dict:
+        """Deployment files for a repository, for the recommended platform unless one is given."""
+        analysis = await self._analysis(repo_url, ref)
+        platform = platform or await self.jobs.openai(lambda: analysis.recommendation)
+        if platform not in PLATFORM_PROMPTS:
+            raise RuntimeError(f"No supported platform recommended (got {platform!r})")
+        files = await self.jobs.openai(lambda: analysis.files(platform))
+        if "error.txt" in files:
+            raise RuntimeError(files["error.txt"])
+        return {"recommendation": platform, "files": files, "revision": analysis.revision}
+
+    async def diagram(self, repo_url: str, ref: str = None) -> dict:
+        """The Mermaid.js architecture diagram of a repository; a failed refinement leaves the rule-based draft."""
+        analysis = await self._analysis(repo_url, ref)
+        diagram = await self.jobs.openai(lambda: analysis.diagram)
+        return {"diagram": diagram, "revision": analysis.revision}
+
+    async def predict(self, repository: str = None, repo_url: str = None, ref: str = None, n_similar: int = 5) -> dict:
+        """
+        The local model's platform prediction, for a dataset entry by name or for
+        any GitHub repository from the features of its structure.
+        """
+        predictor = await self.jobs.blocking(lambda: self.predictor)
+        if repository is not None:
+            prediction, justification = await self.jobs.blocking(
+                lambda: predictor.predict_deployment(repository, n_similar)
+            )
+            if prediction == "Repository not found":
+                raise LookupError(f"{repository} is not in the dataset")
+            return {"prediction": prediction, "justification": justification}
+
+        analysis = await self._analysis(repo_url, ref)
+        prediction, justification, confidence = await self.jobs.blocking(lambda: predictor.predict_features(
+            extract_features(analysis.structure), n_similar, name=analysis.repo_name, return_confidence=True
+        ))
+        return {"prediction": prediction, "justification": justification, "confidence": confidence,
+                "revision": analysis.revision}
+
+
+def make_handler(service: DeployPilotService, wait: float):
+    """
+    Return the request handler class serving a DeployPilotService.
+
+    Routes:
+        GET  /health            job counts and repositories in memory
+        POST /jobs              {"kind": "files" | "diagram" | "predict", ...parameters}; 202 with the job
+        GET  /jobs/<id>         the job, with its result once done
+        POST /files, /diagram,  the same jobs, answered with 200 (or 500 if failed) when they finish
+        POST /predict           within ?wait=seconds (default ``wait``), else 202 with the job to poll
+
+    Invalid parameters are answered with 400, and jobs submitted once the queue is stopped with 503.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            logger.info("%s %s", self.address_string(), format % args)
+
+        def do_GET(self):
+            path = urlparse(self.path).path.rstrip("/")
+            if path == "/health":
+                self._send(200, {"status": "ok", "jobs": service.jobs.stats(), "repositories": len(service.session)})
+            elif path.startswith("/jobs/"):
+                job = service.jobs.get(path[len("/jobs/"):])
+                if job is None:
+                    self._send(404, {"error": "Unknown job"})
+                else:
+                    self._send(200, job.to_dict())
+            else:
+                self._send(404, {"error": f"No route for GET {path}"})
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            path = url.path.rstrip("/")
+            try:
+                params = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if not isinstance(params, dict):
+                    raise ValueError("The request body must be a JSON object")
+                if path == "/jobs":
+                    job = service.submit(params.pop("kind", None), params)
+                    self._send(202, job.to_dict(), {"Location": f"/jobs/{job.id}"})
+                    return
+                if path.lstrip("/") not in JOB_PARAMS:
+                    self._send(404, {"error": f"No route for POST {path}"})
+                    return
+                timeout = float(parse_qs(url.query).get("wait", [wait])[0])
+                job = service.submit(path.lstrip("/"), params)
+            except ValueError as e:
+                self._send(400, {"error": str(e)})
+                return
+            except RuntimeError as e:
+                # The job queue is stopped, e.g. while the server shuts down
+                self._send(503, {"error": str(e)})
+                return
+
+            if not job.done.wait(timeout):
+                self._send(202, job.to_dict(), {"Location": f"/jobs/{job.id}"})
+            else:
+                self._send(200 if job.status == "done" else 500, job.to_dict())
+
+        def _send(self, status: int, payload: dict, headers: dict = None):
+            data = json.dumps(payload, default=str).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+    return Handler
+
+
+def make_server(service: DeployPilotService, host: str = "127.0.0.1", port: int = 8000,
+                wait: float = 300.0) -> ThreadingHTTPServer:
+    """Return an HTTP server for service; call ``serve_forever()`` on it after starting ``service.jobs``."""
+    server = ThreadingHTTPServer((host, port), make_handler(service, wait))
+    server.daemon_threads = True
+    return server
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="DeployPilot HTTP service")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on (default: 8000)")
+    parser.add_argument("--workers", type=int, default=8, help="Jobs running at once (default: 8)")
+    parser.add_argument("--github-concurrency", type=int, default=4,
+                        help="Jobs talking to GitHub at once (default: 4)")
+    parser.add_argument("--openai-concurrency", type=int, default=4,
+                        help="Jobs waiting on OpenAI at once (default: 4)")
+    parser.add_argument("--wait", type=float, default=300.0,
+                        help="Seconds POST /files, /diagram and /predict wait before answering 202 (default: 300)")
+    parser.add_argument("--dataset", default=str(DATASET_PATH), help="Dataset the predictor is built from")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    jobs = JobQueue(args.workers, args.github_concurrency, args.openai_concurrency)
+    service = DeployPilotService(jobs=jobs, dataset_path=args.dataset)
+    service.warm()
+    server = make_server(service, args.host, args.port, args.wait)
+    logger.info("DeployPilot service listening on http://%s:%s", *server.server_address[:2])
+    with jobs:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
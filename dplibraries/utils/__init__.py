@@ -5,11 +5,29 @@ This package contains reusable functions and utilities that are used
 throughout the project.
 """
 
+import importlib
+
 __version__ = "0.1.0"
 
-from dplibraries.generators.deployment_generator import DeploymentGenerator
-from dplibraries.generators.diagram_generator import DiagramGenerator
-from dplibraries.models.deployment_predictor import DeploymentPredictor
+# Exported name -> module defining it; imported on first access
+_EXPORTS = {
+    "DeploymentGenerator": "dplibraries.generators.deployment_generator",
+    "DiagramGenerator": "dplibraries.generators.diagram_generator",
+    "DeploymentPredictor": "dplibraries.models.deployment_predictor",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    """Import exported names on first access, so importing the package loads no heavy dependencies."""
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
 
-__all__ = ["DeploymentGenerator", "DiagramGenerator", "DeploymentPredictor"]
 
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,12 +1,6 @@
 from github import Github
-import os
-from dotenv import load_dotenv
+from dplibraries.generators.clients import get_client_registry
 
-load_dotenv()
-
-def get_github_client():
-    token = os.getenv("GITHUB_TOKEN")
-    if token is None:
-        raise ValueError("GITHUB_TOKEN not found in environment variables")
-        
-    return Github(token)
\ No newline at end of file
+def get_github_client() -> Github:
+    """Return the shared, connection-pooled GitHub client."""
+    return get_client_registry().github()
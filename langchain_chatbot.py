@@ -1,14 +1,17 @@
 from langchain.agents import initialize_agent, Tool
 from langchain.chat_models import ChatOpenAI
 
-from dplibraries.agents.agent_tools import tools
+from dplibraries.agents.agent_tools import make_tools
+from dplibraries.agents.analysis_session import AnalysisSession
 
 
 def main():
     llm = ChatOpenAI(temperature=0)
-    
+
+    # One analysis store per chat, so follow-up questions about a repository reuse earlier work
+    session = AnalysisSession()
     agent = initialize_agent(
-        tools,
+        make_tools(session),
         llm,
         agent="chat-zero-shot-react-description",
         verbose=True,
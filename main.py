@@ -1,15 +1,36 @@
 from dplibraries.generators.deployment_generator import DeploymentGenerator
+from dplibraries.generators.incremental import IncrementalAnalyzer
+from dplibraries.generators.tracing import LogExporter, PrometheusExporter, get_tracer
+from dplibraries.models.deployment_predictor import DeploymentPredictor
+from dplibraries.models.feature_extractor import extract_features
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from types import SimpleNamespace
 from typing import Optional, Dict, Any
+from pathlib import Path
+import argparse
+import json
+import logging
 import re
 import sys
+import threading
+import time
 from rich.console import Console
 from rich.prompt import Prompt, Confirm
-from rich.progress import Progress, SpinnerColumn, TextColumn
+from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, MofNCompleteColumn, TimeElapsedColumn
 from rich.panel import Panel
+from rich.table import Table
+from rich.console import Group
+from rich.live import Live
+from rich.text import Text
 from rich import print as rprint
 
 console = Console()
 
+DATASET_PATH = Path(__file__).absolute().parent / "dataset.csv"
+
+# Platforms DeploymentGenerator.generate_files has templates for
+SUPPORTED_PLATFORMS = ["AWS", "Firebase", "Vercel", "Google Cloud"]
+
 def is_valid_github_url(url: str) -> bool:
     """Validate if the input is a valid GitHub repository URL."""
     pattern = r'^https://github\.com/[a-zA-Z0-9_.-]+/[a-zA-Z0-9_.-]+/?$'
@@ -38,6 +59,247 @@ def get_repo_info(url: str) -> Dict[str, str]:
         "full_name": "/".join(parts)
     }
 
+def load_predictor() -> Optional[DeploymentPredictor]:
+    """Load the local nearest-neighbour model, or None when the dataset is unavailable."""
+    try:
+        return DeploymentPredictor(DATASET_PATH)
+    except Exception:
+        return None
+
+def predict_locally(predictor: Optional[DeploymentPredictor], repo_name: str, structure: str,
+                    min_confidence: float) -> Optional[tuple[str, str, float]]:
+    """
+    Recommend a platform with the local nearest-neighbour model.
+
+    Returns (platform, justification, confidence), or None when the model is
+    unavailable, not confident enough or predicts an unsupported platform.
+    """
+    if predictor is None:
+        return None
+
+    features = extract_features(structure)
+    prediction, justification, confidence = predictor.predict_features(
+        features, name=repo_name, return_confidence=True
+    )
+    if confidence < min_confidence or prediction not in SUPPORTED_PLATFORMS:
+        return None
+    return prediction, justification, confidence
+
+class ThrottledClient:
+    """OpenAI client wrapper that caps how many chat completions run at once."""
+
+    def __init__(self, client, limit: int):
+        self._client = client
+        self._slots = threading.BoundedSemaphore(limit)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        with self._slots:
+            return self._client.chat.completions.create(**kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+def read_batch(lines) -> list[tuple[str, Optional[str]]]:
+    """
+    Parse batch input into (repo_url, platform) pairs.
+
+    Each line holds a repository URL optionally followed by a platform,
+    separated by a comma, tab or space ("https://github.com/o/r, Google Cloud").
+    Blank lines and lines starting with "#" are skipped; a missing platform
+    is None and gets recommended.
+    """
+    jobs = []
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        parts = re.split(r"\s*,\s*|\s+", line, maxsplit=1)
+        platform = parts[1].strip() if len(parts) > 1 else ""
+        jobs.append((parts[0], platform or None))
+    return jobs
+
+def analyze_repository(generator: DeploymentGenerator, predictor: Optional[DeploymentPredictor], repo_url: str,
+                       platform: Optional[str], github_slots: threading.Semaphore,
+                       min_confidence: float, incremental: Optional[IncrementalAnalyzer] = None) -> Dict[str, Any]:
+    """
+    Run the whole pipeline for one repository without prompting.
+
+    Returns a JSON-serialisable record with the chosen platform, where the
+    choice came from ("requested", "local_model" or "openai"), the generated
+    files and any error message. With an IncrementalAnalyzer the files are
+    generated from the repository's previous analysis, and its report is
+    added under "incremental".
+    """
+    started = time.perf_counter()
+    record = {"repo_url": repo_url, "platform": platform, "platform_source": "requested" if platform else None,
+              "revision": None, "files": None, "error": None}
+    with get_tracer().span("repository", repo_url=repo_url) as span:
+        _analyze_repository(generator, predictor, repo_url, platform, github_slots, min_confidence, record,
+                            incremental)
+        span.set(failed=record["error"] is not None)
+    if is_valid_github_url(repo_url):
+        record["github"] = generator.github_usage(get_repo_info(repo_url)["full_name"])
+    record["seconds"] = round(time.perf_counter() - started, 3)
+    return record
+
+def _analyze_repository(generator: DeploymentGenerator, predictor: Optional[DeploymentPredictor], repo_url: str,
+                        platform: Optional[str], github_slots: threading.Semaphore, min_confidence: float,
+                        record: Dict[str, Any], incremental: Optional[IncrementalAnalyzer] = None) -> None:
+    """Fill in record for analyze_repository, inside the repository's span."""
+    try:
+        if not is_valid_github_url(repo_url):
+            raise ValueError(f"Invalid GitHub repository URL: {repo_url}")
+        repo_info = get_repo_info(repo_url)
+
+        with github_slots:
+            structure = generator._get_project_structure(repo_info["full_name"])
+        revision = generator.revisions.get(repo_info["full_name"])
+        record["revision"] = revision
+
+        if not platform:
+            local = predict_locally(predictor, repo_info["name"], structure, min_confidence)
+            if local:
+                platform, record["platform_source"] = local[0], "local_model"
+            else:
+                platform = generator.recommend_deployment_target(
+                    repo_name=repo_info["name"],
+                    project_structure=structure,
+                    revision=revision
+                )
+                record["platform_source"] = "openai"
+            record["platform"] = platform
+
+        if incremental is not None:
+            # The analyzer holds github_slots around its own GitHub requests only
+            files = incremental.generate_files(platform, repo_url, ref=revision)
+            record["incremental"] = incremental.reports.get(repo_info["full_name"])
+        else:
+            files = generator.generate_files(
+                deployment_type=platform,
+                repo_name=repo_info["name"],
+                repo_url=repo_url,
+                project_structure=structure,
+                revision=revision
+            )
+        if "error.txt" in files:
+            record["error"] = files["error.txt"]
+        else:
+            record["files"] = files
+    except Exception as e:
+        record["error"] = str(e)
+
+def run_batch(args: argparse.Namespace) -> int:
+    """
+    Analyze every repository listed in args.batch and stream JSON Lines to args.output.
+
+    Repositories run on a pool of args.workers threads; at most
+    args.github_concurrency of them fetch structures from GitHub and at most
+    args.openai_concurrency chat completions are in flight at once. Each
+    result is written and flushed as soon as its repository finishes.
+
+    Returns:
+        int: 0 if every repository succeeded, 1 otherwise
+    """
+    if args.batch == "-":
+        jobs = read_batch(sys.stdin)
+    else:
+        with open(args.batch, encoding="utf-8") as f:
+            jobs = read_batch(f)
+
+    generator = DeploymentGenerator()
+    if args.no_cache:
+        generator.cache.enabled = False
+    if args.combined:
+        generator.generation_mode = "combined"
+    if args.refine_diagram:
+        generator.diagram_generator.refine = True
+    # Both generators share one client, so the limit covers all completions
+    client = ThrottledClient(generator.client, args.openai_concurrency)
+    generator.client = generator.diagram_generator.client = client
+    github_slots = threading.BoundedSemaphore(args.github_concurrency)
+    predictor = load_predictor()
+    incremental = IncrementalAnalyzer(generator, github_slots=github_slots) if args.incremental else None
+
+    # Progress goes to stderr so stdout can carry the JSON Lines
+    progress_console = Console(stderr=True)
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    failed = 0
+    try:
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            MofNCompleteColumn(),
+            TimeElapsedColumn(),
+            console=progress_console
+        ) as progress, ThreadPoolExecutor(max_workers=args.workers) as executor:
+            task = progress.add_task("Analyzing repositories...", total=len(jobs))
+            futures = [
+                executor.submit(analyze_repository, generator, predictor, repo_url, platform,
+                                github_slots, args.min_confidence, incremental)
+                for repo_url, platform in jobs
+            ]
+            for future in as_completed(futures):
+                record = future.result()
+                failed += record["error"] is not None
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                progress.update(task, advance=1, description=f"Analyzing repositories ({failed} failed)...")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    stats = generator.cache.stats()
+    tokens = generator.prompt_builder.totals()
+    progress_console.print(
+        f"[dim]{len(jobs) - failed}/{len(jobs)} repositories succeeded. "
+        f"Completion cache: {stats['hits']} hits, {stats['misses']} misses. "
+        f"Tokens: {tokens['prompt_tokens']:,} in, {tokens['completion_tokens']:,} out[/dim]"
+    )
+    if args.profile:
+        print_profile(progress_console)
+    return 1 if failed else 0
+
+# Span attributes shown by --profile, with their column titles
+PROFILE_COLUMNS = {
+    "requests": "GitHub requests",
+    "not_modified": "304s",
+    "cache_hits": "Cache hits",
+    "prompt_tokens": "Prompt tokens",
+    "completion_tokens": "Completion tokens",
+}
+
+def configure_tracing(args: argparse.Namespace) -> None:
+    """Attach the span exporters requested on the command line."""
+    tracer = get_tracer()
+    if args.trace_log:
+        logger = logging.getLogger("dplibraries.trace")
+        logger.setLevel(logging.INFO)
+        logger.addHandler(logging.FileHandler(args.trace_log, encoding="utf-8"))
+        logger.propagate = False
+        tracer.add_exporter(LogExporter(logger))
+    if args.prometheus:
+        tracer.add_exporter(PrometheusExporter(args.prometheus))
+
+def print_profile(target: Console) -> None:
+    """Print the per-stage wall time, request, token and cache breakdown recorded by the tracer."""
+    rows = get_tracer().summary()
+    table = Table(title="Profile")
+    for title in ("Stage", "Calls", "Errors", "Total s", "Mean ms", "p95 ms", *PROFILE_COLUMNS.values()):
+        table.add_column(title, justify="left" if title == "Stage" else "right")
+    for row in rows:
+        table.add_row(
+            row["span"],
+            str(row["calls"]),
+            str(row["errors"]),
+            f"{row['total_s']:.2f}",
+            f"{row['mean_s'] * 1000:.1f}",
+            f"{row['p95_s'] * 1000:.1f}",
+            *(f"{row[key]:,}" if key in row else "-" for key in PROFILE_COLUMNS)
+        )
+    target.print(table)
+
 def display_welcome() -> None:
     """Display welcome message and instructions."""
     console.print(Panel.fit(
@@ -68,7 +330,122 @@ def get_user_input() -> tuple[str, Optional[str]]:
     
     return repo_url, deployment_type
 
+# Panels filled while DeploymentGenerator.stream_files runs
+STREAM_TITLES = {
+    "platform_files": "Deployment files",
+    "service_mapping": "service_mapping.json",
+    "architecture_diagram": "architecture_diagram.mmd",
+}
+
+def render_streams(texts: Dict[str, str], tail_lines: int = 12) -> Group:
+    """Render one panel per stream showing the last lines received so far."""
+    panels = []
+    for stage, title in STREAM_TITLES.items():
+        text = texts.get(stage, "")
+        body = Text("\n".join(text.splitlines()[-tail_lines:])) if text else Text("waiting for the first tokens…", style="dim")
+        panels.append(Panel(body, title=f"{title} ({len(text):,} chars)", border_style="green" if text else "dim"))
+    return Group(*panels)
+
+def stream_files_live(generator: DeploymentGenerator, deployment_type: str, repo_info: Dict[str, str], repo_url: str,
+                      structure: Optional[str] = None) -> Dict[str, str]:
+    """
+    Generate deployment files while showing each stream as it arrives.
+
+    Ctrl-C closes the streams (nothing partial is cached) and propagates
+    KeyboardInterrupt to the caller.
+    """
+    texts = {}
+    events = generator.stream_files(
+        deployment_type,
+        repo_info["name"],
+        repo_url=repo_url,
+        project_structure=structure,
+        revision=generator.revisions.get(repo_info["full_name"])
+    )
+    try:
+        with Live(render_streams(texts), console=console, refresh_per_second=12, transient=True) as live:
+            for stage, piece in events:
+                if stage == "files":
+                    return piece
+                texts[stage] = texts.get(stage, "") + piece
+                live.update(render_streams(texts))
+    finally:
+        events.close()
+    return {}
+
+def parse_args(argv: Optional[list] = None) -> argparse.Namespace:
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="DeployPilot - Intelligent Deployment Advisor")
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always call OpenAI instead of reusing cached completions"
+    )
+    parser.add_argument(
+        "--min-confidence",
+        type=float,
+        default=0.6,
+        help="Share of similar repositories that must agree before the local model's "
+             "recommendation is used instead of asking OpenAI (default: 0.6)"
+    )
+    parser.add_argument(
+        "--combined",
+        action="store_true",
+        help="Ask for deployment files, service mapping and diagram in one structured OpenAI request"
+    )
+    parser.add_argument(
+        "--refine-diagram",
+        action="store_true",
+        help="Have OpenAI refine the architecture diagram drawn from the file tree"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Start from the previous analysis of each repository and regenerate only what changed since"
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="FILE",
+        help="Analyze every repository URL listed in FILE ('-' for stdin) without prompting. "
+             "Each line may add a platform after the URL"
+    )
+    parser.add_argument(
+        "--output",
+        metavar="FILE",
+        default="-",
+        help="Where batch mode writes its JSON Lines results (default: stdout)"
+    )
+    parser.add_argument("--workers", type=int, default=8, help="Repositories analyzed at once in batch mode (default: 8)")
+    parser.add_argument(
+        "--github-concurrency",
+        type=int,
+        default=4,
+        help="Repositories fetched from GitHub at once in batch mode (default: 4)"
+    )
+    parser.add_argument(
+        "--openai-concurrency",
+        type=int,
+        default=4,
+        help="OpenAI requests in flight at once in batch mode (default: 4)"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print wall time, requests, tokens and cache hits per stage when done"
+    )
+    parser.add_argument("--trace-log", metavar="FILE", help="Append every finished span to FILE as a JSON line")
+    parser.add_argument(
+        "--prometheus",
+        metavar="FILE",
+        help="Keep span metrics in FILE in the Prometheus text format (for node_exporter's textfile collector)"
+    )
+    return parser.parse_args(argv)
+
 def main() -> None:
+    args = parse_args()
+    configure_tracing(args)
+    if args.batch:
+        sys.exit(run_batch(args))
     try:
         display_welcome()
         repo_url, deployment_type = get_user_input()
@@ -82,14 +459,27 @@ def main() -> None:
             task = progress.add_task("Analyzing repository...", total=None)
             
             generator = DeploymentGenerator()
+            if args.no_cache:
+                generator.cache.enabled = False
+            if args.combined:
+                generator.generation_mode = "combined"
+            if args.refine_diagram:
+                generator.diagram_generator.refine = True
             
+            structure = None
             if is_unspecified_input(deployment_type):
                 console.print("\n[bold yellow]🤔 No deployment target specified. Analyzing project structure...[/bold yellow]")
                 structure = generator._get_project_structure(repo_info["full_name"])
-                recommended = generator.recommend_deployment_target(
-                    repo_name=repo_info["name"],
-                    project_structure=structure
-                )
+                local = predict_locally(load_predictor(), repo_info["name"], structure, args.min_confidence)
+                if local:
+                    recommended, justification, confidence = local
+                    console.print(f"[dim]{justification}\n(local model, {confidence:.0%} of similar repositories agree)[/dim]")
+                else:
+                    recommended = generator.recommend_deployment_target(
+                        repo_name=repo_info["name"],
+                        project_structure=structure,
+                        revision=generator.revisions.get(repo_info["full_name"])
+                    )
                 
                 console.print(f"\n[bold green]✅ Recommendation:[/bold green] {recommended}")
                 if Confirm.ask("Proceed with this recommendation?"):
@@ -100,21 +490,47 @@ def main() -> None:
                         choices=["AWS", "Firebase", "Vercel", "Google Cloud", "Heroku", "Netlify", "DigitalOcean"]
                     )
             
-            progress.update(task, description="Generating deployment files...")
-            result = generator.generate_files(
-                deployment_type=deployment_type,
-                repo_name=repo_info["name"],
-                repo_url=repo_url
+        if args.incremental:
+            with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}"), console=console) as progress:
+                progress.add_task("Updating the previous analysis...", total=None)
+                analyzer = IncrementalAnalyzer(generator)
+                result = analyzer.generate_files(deployment_type, repo_url)
+            report = analyzer.reports[repo_info["full_name"]]
+            console.print(
+                f"[dim]{report['mode'].capitalize()} run: reused {', '.join(report['reused']) or 'nothing'}[/dim]"
             )
-            
-            console.print("\n[bold green]📦 Generated Deployment Files:[/bold green]")
-            for filename, content in result.items():
-                console.print(Panel(
-                    f"[bold]{filename}[/bold]\n{content[:500]}...",
-                    title="File Preview",
-                    border_style="green"
-                ))
-                
+        elif args.combined:
+            # One JSON completion, nothing to stream
+            with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}"), console=console) as progress:
+                progress.add_task("Generating deployment files...", total=None)
+                result = generator.generate_files(
+                    deployment_type=deployment_type,
+                    repo_name=repo_info["name"],
+                    repo_url=repo_url,
+                    project_structure=structure
+                )
+        else:
+            result = stream_files_live(generator, deployment_type, repo_info, repo_url, structure)
+
+        console.print("\n[bold green]📦 Generated Deployment Files:[/bold green]")
+        for filename, content in result.items():
+            console.print(Panel(Text(str(content)), title=filename, border_style="green"))
+
+        stats = generator.cache.stats()
+        tokens = generator.prompt_builder.totals()
+        github = generator.github_usage(repo_info["full_name"])
+        console.print(
+            f"[dim]GitHub: {github['requests']} requests, {github['not_modified']} answered "
+            f"304 Not Modified (free of rate limit)[/dim]"
+        )
+        console.print(f"[dim]Completion cache: {stats['hits']} hits, {stats['misses']} misses[/dim]")
+        console.print(
+            f"[dim]Tokens: {tokens['prompt_tokens']:,} in, {tokens['completion_tokens']:,} out "
+            f"over {tokens['calls'] - tokens['cached_calls']} OpenAI calls[/dim]"
+        )
+        if args.profile:
+            print_profile(console)
+
     except KeyboardInterrupt:
         console.print("\n[yellow]⚠️ Operation cancelled by user.[/yellow]")
         sys.exit(1)
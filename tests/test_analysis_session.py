@@ -0,0 +1,104 @@
+"""
+Tests for dplibraries.agents.analysis_session.
+"""
+
+import os
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from dplibraries.agents.analysis_session import AnalysisSession
+from dplibraries.generators.completion_cache import CompletionCache
+from dplibraries.generators.deployment_generator import DeploymentGenerator
+from dplibraries.generators.single_flight import SingleFlight
+from tests.test_deployment_generator import FakeChatClient, FakeRepo, PATHS
+
+
+class TestAnalysisSession(unittest.TestCase):
+    """Test cases for AnalysisSession and RepositoryAnalysis."""
+
+    def setUp(self):
+        env = {"OPENAI_API_KEY": "test", "GITHUB_TOKEN": "test"}
+        with mock.patch.dict(os.environ, env):
+            self.generator = DeploymentGenerator()
+        self.generator.single_flight = SingleFlight()
+        self.client = FakeChatClient()
+        self.generator.client = self.generator.diagram_generator.client = self.client
+        # Caching is off so every completion reaches the fake client
+        self.generator.cache = self.generator.diagram_generator.cache = CompletionCache(":memory:", enabled=False)
+        # The model refines the diagram, so every stage is a completion
+        self.generator.diagram_generator.refine = True
+        self.repos = {}
+        self.generator.gh = SimpleNamespace(get_repo=lambda name: self.repos.setdefault(name, FakeRepo(PATHS)))
+        self.session = AnalysisSession(self.generator, max_repositories=2)
+
+    def test_stages_are_computed_once(self):
+        """A recommendation followed by files reuses the structure and each completion."""
+        self.client.create = mock.Mock(wraps=self.client.create)
+        self.client.chat.completions.create = self.client.create
+        self.generator.recommend_deployment_target = mock.Mock(return_value="Vercel")
+
+        analysis = self.session.get("https://github.com/owner/repo")
+        self.assertEqual(analysis.recommendation, "Vercel")
+        files = analysis.files()
+        self.assertIn("vercel.json", files)
+        self.assertIs(self.session.get("https://github.com/owner/repo").files(), files)
+
+        self.assertEqual(self.repos["owner/repo"].tree_calls, 1)
+        self.assertEqual(self.generator.recommend_deployment_target.call_count, 1)
+        # Service mapping, diagram and platform output, once each
+        self.assertEqual(self.client.create.call_count, 3)
+        self.assertEqual(analysis.diagram, files["architecture_diagram.mmd"])
+        self.assertEqual(self.client.create.call_count, 3)
+
+    def test_files_fan_out_missing_stages(self):
+        """The service mapping, diagram and platform files are asked for concurrently, then reused."""
+        barrier = threading.Barrier(3, timeout=5)
+        create = self.client.create
+
+        def concurrent_create(*args, **kwargs):
+            # Fails with BrokenBarrierError unless all three completions are in flight together
+            barrier.wait()
+            return create(*args, **kwargs)
+
+        self.client.chat.completions.create = concurrent_create
+        analysis = self.session.get("https://github.com/owner/repo")
+        files = analysis.files("Vercel")
+        self.assertIn("vercel.json", files)
+        self.assertEqual(analysis.computed(), ["structure", "service_mapping", "diagram", "files:Vercel"])
+
+        self.client.chat.completions.create = create
+        analysis.files("AWS")
+        # Only the AWS platform files are new
+        self.assertEqual(len(self.client.calls), 4)
+
+    def test_new_commit_starts_new_analysis(self):
+        """Analyses are keyed by commit SHA."""
+        first = self.session.get("https://github.com/owner/repo")
+        self.repos["owner/repo"].head_sha = "beef"
+        second = self.session.get("https://github.com/owner/repo")
+        self.assertIsNot(first, second)
+        self.assertEqual(second.revision, "beef")
+
+    def test_failed_stage_is_retried(self):
+        """Error values are not remembered."""
+        self.generator.recommend_deployment_target = mock.Mock(side_effect=["unknown", "AWS"])
+        analysis = self.session.get("https://github.com/owner/repo")
+        self.assertEqual(analysis.recommendation, "unknown")
+        self.assertEqual(analysis.recommendation, "AWS")
+        self.assertEqual(analysis.computed(), ["structure", "recommendation"])
+
+    def test_least_recently_used_repository_is_evicted(self):
+        """Only max_repositories analyses are kept."""
+        a = self.session.get("https://github.com/owner/a")
+        self.session.get("https://github.com/owner/b")
+        self.assertIs(self.session.get("https://github.com/owner/a"), a)
+        self.session.get("https://github.com/owner/c")
+        self.assertEqual(len(self.session), 2)
+        self.assertIs(self.session.get("https://github.com/owner/a"), a)
+        self.assertNotIn(("owner/b", "c0ffee"), self.session._analyses)
+
+
+if __name__ == '__main__':
+    unittest.main()
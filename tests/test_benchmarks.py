@@ -0,0 +1,99 @@
+"""
+Tests for dplibraries.benchmarks.
+"""
+
+import unittest
+
+from dplibraries.benchmarks.backends import FakeChatServer, SyntheticRepository, synthetic_paths
+from dplibraries.benchmarks.suite import (
+    bench_evaluation,
+    bench_pipeline,
+    bench_predictor,
+    bench_startup,
+    bench_structure,
+    offline_generator,
+)
+
+
+class TestBackends(unittest.TestCase):
+    """Test cases for the offline GitHub and OpenAI stand-ins."""
+
+    def test_synthetic_paths_shape(self):
+        """The tree has the requested number of files, with each directory before its contents."""
+        paths = synthetic_paths(500, fanout=4, files_per_dir=10)
+        files = [p for p in paths if not p.endswith("/")]
+        self.assertEqual(len(files), 500)
+        self.assertIn("package.json", paths)
+        self.assertTrue(any(p.startswith("node_modules/") for p in files))
+
+        seen = set()
+        for path in paths:
+            parent = path.rstrip("/").rsplit("/", 1)[0] + "/" if "/" in path.rstrip("/") else ""
+            self.assertTrue(parent == "" or parent in seen, path)
+            seen.add(path)
+
+    def test_truncated_tree_matches_contents_walk(self):
+        """The structure walk renders the same text from a truncated tree and from the contents API."""
+        repository = SyntheticRepository(synthetic_paths(300), truncate_over=50)
+        generator = offline_generator(repository)
+        from_tree = generator._get_project_structure(repository.full_name)
+        generator.structure_mode = "contents"
+        self.assertEqual(from_tree, generator._get_project_structure(repository.full_name))
+
+    def test_fake_chat_server_with_openai_client(self):
+        """The real OpenAI client talks to the fake server, plain and streaming."""
+        with FakeChatServer(latency=0.0, tokens_per_second=10000, completion_tokens=6) as server:
+            client = server.client(max_retries=0)
+            messages = [{"role": "user", "content": "hi"}]
+            response = client.chat.completions.create(model="gpt-3.5-turbo", messages=messages)
+            text = response.choices[0].message.content
+            self.assertEqual(text, "token0 token1 token2 \n\ntoken3 token4 token5 ")
+
+            stream = client.chat.completions.create(model="gpt-3.5-turbo", messages=messages, stream=True,
+                                                    stream_options={"include_usage": True})
+            chunks = list(stream)
+            self.assertEqual("".join(c.choices[0].delta.content or "" for c in chunks if c.choices), text)
+            self.assertEqual(chunks[-1].usage.completion_tokens, 7)
+            self.assertEqual(server.requests, 2)
+
+
+class TestSuite(unittest.TestCase):
+    """Test cases for the benchmark functions."""
+
+    def test_rows_report_percentiles(self):
+        """Every benchmark reports p50/p95 latency and peak memory."""
+        with FakeChatServer(latency=0.0, tokens_per_second=100000, completion_tokens=10) as server:
+            rows = (bench_structure([10], repeat=2) + bench_pipeline([10], server, repeat=2)
+                    + bench_predictor([20], repeat=2, n_queries=5))
+        self.assertEqual([row["benchmark"] for row in rows],
+                         ["structure", "structure", "pipeline", "pipeline", "predictor"])
+        for row in rows:
+            self.assertLessEqual(row["p50_ms"], row["p95_ms"])
+            self.assertGreater(row["peak_memory_kb"], 0)
+        # The diagram is drawn locally; only the service mapping and platform files are completions
+        self.assertEqual(rows[2]["openai_calls_per_run"], 2)
+        self.assertTrue(rows[2]["ok"])
+        # Every platform shares one service mapping
+        self.assertEqual(rows[3]["openai_calls_per_run"], 5)
+        self.assertTrue(rows[3]["ok"])
+
+    def test_evaluation_sweeps_sizes_and_k(self):
+        """The evaluation reports one row per dataset and k, starting with dataset.csv."""
+        rows = bench_evaluation([50], ks=[1, 3])
+        self.assertEqual([(row["mode"], row["files"], row["k"]) for row in rows],
+                         [("exact/dataset.csv", 32, 1), ("exact/dataset.csv", 32, 3),
+                          ("exact/scaled", 50, 1), ("exact/scaled", 50, 3)])
+        for row in rows:
+            self.assertTrue(0 <= row["accuracy"] <= 1)
+
+    def test_startup_loads_no_unexpected_dependencies(self):
+        """Importing the packages, the predictor and main.py stays clear of pandas, scikit-learn and openai."""
+        rows = bench_startup(repeat=1)
+        self.assertEqual({row["module"]: row["unexpected"] for row in rows},
+                         {row["module"]: "-" for row in rows})
+        packages = [row for row in rows if row["module"] in ("dplibraries.utils", "dplibraries.models")]
+        self.assertEqual([row["heavy_modules"] for row in packages], ["-", "-"])
+
+
+if __name__ == '__main__':
+    unittest.main()
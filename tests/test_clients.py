@@ -0,0 +1,75 @@
+"""
+Tests for dplibraries.generators.clients.
+"""
+
+import os
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from dplibraries.generators.clients import ClientRegistry
+from dplibraries.generators.deployment_generator import DeploymentGenerator
+
+
+class TestClientRegistry(unittest.TestCase):
+    """Test cases for ClientRegistry."""
+
+    def setUp(self):
+        self.registry = ClientRegistry(max_connections=5, max_retries=2)
+        self.addCleanup(self.registry.close)
+
+    def test_reuses_clients_per_credential(self):
+        """The same credential returns the same client; a new one builds another."""
+        with mock.patch.dict(os.environ, {"OPENAI_API_KEY": "a", "GITHUB_TOKEN": "a"}):
+            openai_client = self.registry.openai()
+            github_client = self.registry.github()
+            self.assertIs(self.registry.openai(), openai_client)
+            self.assertIs(self.registry.github(), github_client)
+        with mock.patch.dict(os.environ, {"OPENAI_API_KEY": "b", "GITHUB_TOKEN": "b"}):
+            self.assertIsNot(self.registry.openai(), openai_client)
+            self.assertIsNot(self.registry.github(), github_client)
+
+    def test_applies_pool_and_retry_settings(self):
+        """Pool size and retry count reach the underlying clients."""
+        with mock.patch.dict(os.environ, {"OPENAI_API_KEY": "a", "GITHUB_TOKEN": "a"}):
+            self.assertEqual(self.registry.openai().max_retries, 2)
+            requester = self.registry.github().requester
+        self.assertEqual(requester._Requester__retry.total, 2)
+        self.assertEqual(requester._Requester__pool_size, 5)
+
+    def test_rate_limits_are_retried_by_the_adapter_only(self):
+        """The transport retries server errors but leaves 403/429 refusals to GitHubAdapter."""
+        with mock.patch.dict(os.environ, {"OPENAI_API_KEY": "a", "GITHUB_TOKEN": "a"}):
+            retry = self.registry.github().requester._Requester__retry
+        self.assertTrue(retry.is_retry("GET", 502))
+        self.assertFalse(retry.is_retry("GET", 403, has_retry_after=True))
+        self.assertFalse(retry.is_retry("GET", 429, has_retry_after=True))
+
+    def test_unsupported_pygithub_fails_loudly(self):
+        """A PyGithub without the connection factory raises instead of bypassing the scheduler."""
+        without_factory = mock.Mock(return_value=SimpleNamespace(requester=SimpleNamespace()))
+        with mock.patch.dict(os.environ, {"OPENAI_API_KEY": "a", "GITHUB_TOKEN": "a"}), \
+                mock.patch("dplibraries.generators.clients.Github", without_factory):
+            with self.assertRaises(RuntimeError):
+                self.registry.github()
+
+    def test_missing_credentials_raise(self):
+        """A missing key or token raises ValueError."""
+        with mock.patch.dict(os.environ, {}, clear=True), mock.patch("dplibraries.generators.clients.load_dotenv"):
+            with self.assertRaises(ValueError):
+                self.registry.openai()
+            with self.assertRaises(ValueError):
+                self.registry.github()
+
+    def test_generators_share_clients(self):
+        """Generators built from one registry share its clients."""
+        with mock.patch.dict(os.environ, {"OPENAI_API_KEY": "a", "GITHUB_TOKEN": "a"}):
+            first = DeploymentGenerator(self.registry)
+            second = DeploymentGenerator(self.registry)
+        self.assertIs(first.client, second.client)
+        self.assertIs(first.client, first.diagram_generator.client)
+        self.assertIs(first.gh, second.gh)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+"""
+Tests for dplibraries.generators.completion_cache.
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from dplibraries.generators.completion_cache import CompletionCache
+
+
+class TestCompletionCache(unittest.TestCase):
+    """Test cases for CompletionCache."""
+
+    def test_persists_across_instances(self):
+        """Entries written by one cache are visible to a new cache on the same file."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.sqlite3")
+            key = CompletionCache.make_key("gpt", 0.7, [{"role": "user", "content": "hi"}], "sha1")
+            CompletionCache(path).set(key, "hello")
+
+            cache = CompletionCache(path)
+            self.assertEqual(cache.get(key), "hello")
+            self.assertEqual(cache.get("missing"), None)
+            self.assertEqual((cache.hits, cache.misses), (1, 1))
+            cache._conn.close()
+
+    def test_key_depends_on_every_field(self):
+        """Changing model, temperature, messages or revision changes the key."""
+        messages = [{"role": "user", "content": "hi"}]
+        base = CompletionCache.make_key("gpt", 0.7, messages, "sha1")
+        self.assertEqual(base, CompletionCache.make_key("gpt", 0.7, list(messages), "sha1"))
+        self.assertNotEqual(base, CompletionCache.make_key("gpt-4", 0.7, messages, "sha1"))
+        self.assertNotEqual(base, CompletionCache.make_key("gpt", 0.3, messages, "sha1"))
+        self.assertNotEqual(base, CompletionCache.make_key("gpt", 0.7, [{"role": "user", "content": "yo"}], "sha1"))
+        self.assertNotEqual(base, CompletionCache.make_key("gpt", 0.7, messages, "sha2"))
+
+    def test_evicts_least_recently_used(self):
+        """Entries beyond max_entries are evicted in least recently used order."""
+        cache = CompletionCache(":memory:", max_entries=2, ttl=None)
+        with mock.patch("time.time", side_effect=[1, 2, 3, 4]):
+            cache.set("a", "1")
+            cache.set("b", "2")
+            cache.get("a")
+            cache.set("c", "3")
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get("b"), None)
+        self.assertEqual(cache.get("a"), "1")
+
+    def test_expired_entries_miss(self):
+        """Entries older than the TTL are treated as misses and removed."""
+        cache = CompletionCache(":memory:", ttl=10)
+        with mock.patch("time.time", return_value=100):
+            cache.set("a", "1")
+        with mock.patch("time.time", return_value=111):
+            self.assertEqual(cache.get("a"), None)
+        self.assertEqual(len(cache), 0)
+
+    def test_bypass(self):
+        """A disabled cache never stores or returns entries."""
+        cache = CompletionCache(":memory:", enabled=False)
+        cache.set("a", "1")
+        self.assertEqual(cache.get("a"), None)
+        self.assertEqual(len(cache), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
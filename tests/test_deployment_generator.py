@@ -0,0 +1,400 @@
+"""
+Tests for dplibraries.generators.deployment_generator.
+"""
+
+import json
+import os
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest import mock
+
+from github import RateLimitExceededException, UnknownObjectException
+
+from dplibraries.generators.completion_cache import CompletionCache
+from dplibraries.generators.deployment_generator import DeploymentGenerator
+from dplibraries.generators.single_flight import SingleFlight
+
+
+class FakeRepo:
+    """Minimal stand-in for a PyGithub Repository backed by a list of paths."""
+
+    def __init__(self, paths, truncate_over=None):
+        # paths: list of "a/b/" (directory) or "a/b.py" (file) strings
+        self.default_branch = "main"
+        self.head_sha = "c0ffee"
+        self.paths = paths
+        self.truncate_over = truncate_over
+        self.tree_calls = 0
+        self.contents_calls = 0
+
+    def _children(self, base):
+        children = []
+        for path in self.paths:
+            stripped = path.rstrip("/")
+            if stripped.startswith(base) and "/" not in stripped[len(base):]:
+                children.append(path)
+        return children
+
+    def _element(self, path, base):
+        is_dir = path.endswith("/")
+        relative = path.rstrip("/")[len(base):]
+        return SimpleNamespace(path=relative, type="tree" if is_dir else "blob", sha=path.rstrip("/"))
+
+    def get_commit(self, ref):
+        return SimpleNamespace(sha=self.head_sha)
+
+    def get_git_tree(self, sha, recursive=False):
+        self.tree_calls += 1
+        base = "" if sha == self.head_sha else sha + "/"
+        if recursive:
+            below = [p for p in self.paths if p.startswith(base) and p != base]
+            truncated = self.truncate_over is not None and len(below) > self.truncate_over
+            if truncated:
+                below = below[:self.truncate_over]
+            return SimpleNamespace(sha=sha, tree=[self._element(p, base) for p in below], truncated=truncated)
+        return SimpleNamespace(sha=sha, tree=[self._element(p, base) for p in self._children(base)], truncated=False)
+
+    def get_contents(self, path, ref=None):
+        self.contents_calls += 1
+        base = path + "/" if path else ""
+        return [
+            SimpleNamespace(
+                name=p.rstrip("/").rsplit("/", 1)[-1],
+                path=p.rstrip("/"),
+                type="dir" if p.endswith("/") else "file",
+            )
+            for p in self._children(base)
+        ]
+
+
+class FakeChatClient:
+    """Chat client whose completions sleep for a fixed latency and echo the system prompt."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, temperature, stream=False, **kwargs):
+        self.calls.append(messages)
+        content = f"{messages[0]['content']}\n\nsecond block"
+        if stream:
+            return self._stream(content)
+        time.sleep(self.latency)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    def _stream(self, content):
+        """Yield the content word by word, spreading the latency over the pieces."""
+        pieces = content.split(" ")
+        for i, piece in enumerate(pieces):
+            time.sleep(self.latency / len(pieces))
+            text = piece if i == 0 else " " + piece
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))], usage=None)
+        usage = SimpleNamespace(prompt_tokens=10, completion_tokens=len(pieces))
+        yield SimpleNamespace(choices=[], usage=usage)
+
+
+PATHS = [
+    ".github/",
+    ".github/workflows/",
+    ".github/workflows/ci.yml",
+    "Dockerfile",
+    "package.json",
+    "src/",
+    "src/api/",
+    "src/api/app.py",
+    "src/main.py",
+]
+
+
+class TestProjectStructure(unittest.TestCase):
+    """Test cases for DeploymentGenerator._get_project_structure."""
+
+    def setUp(self):
+        env = {"OPENAI_API_KEY": "test", "GITHUB_TOKEN": "test"}
+        with mock.patch.dict(os.environ, env):
+            self.generator = DeploymentGenerator()
+        self.generator.single_flight = SingleFlight()
+
+    def _structure(self, repo, **kwargs):
+        self.generator.gh = SimpleNamespace(get_repo=lambda name: repo)
+        return self.generator._get_project_structure("owner/repo", **kwargs)
+
+    def test_tree_mode_matches_contents_walk(self):
+        """The single recursive tree request renders the same text as the directory walk."""
+        tree_repo = FakeRepo(PATHS)
+        from_tree = self._structure(tree_repo)
+
+        self.generator.structure_mode = "contents"
+        contents_repo = FakeRepo(PATHS)
+        from_contents = self._structure(contents_repo)
+
+        self.assertEqual(from_tree, from_contents)
+        self.assertEqual(tree_repo.tree_calls, 1)
+        self.assertEqual(contents_repo.contents_calls, 5)
+        self.assertIn("  workflows/\n    ci.yml", from_tree)
+
+    def test_truncated_tree_falls_back_per_directory(self):
+        """A truncated recursive listing is completed by fetching subtrees separately."""
+        repo = FakeRepo(PATHS, truncate_over=4)
+        structure = self._structure(repo)
+
+        self.assertEqual(structure, self._structure(FakeRepo(PATHS)))
+        self.assertGreater(repo.tree_calls, 1)
+
+    def test_hidden_directories_are_not_fetched(self):
+        """Directories hidden by the per-directory budget cost no request, in the contents walk or a truncated tree."""
+        paths = [p for i in range(1000) for p in (f"d{i:04}/", f"d{i:04}/index.js")]
+        budgets = {"max_dir_entries": 10, "max_entries": 50}
+
+        self.generator.structure_mode = "contents"
+        contents_repo = FakeRepo(paths)
+        structure = self._structure(contents_repo, **budgets)
+        self.assertEqual(contents_repo.contents_calls, 1 + 10)
+        self.assertIn("… 990 more entries at the top level", structure)
+
+        self.generator.structure_mode = "tree"
+        tree_repo = FakeRepo(paths, truncate_over=100)
+        self.assertEqual(self._structure(tree_repo, **budgets), structure)
+        # The truncated recursive listing, the top level, and one subtree per directory shown
+        self.assertEqual(tree_repo.tree_calls, 2 + 10)
+
+    def test_rate_limit_is_not_swallowed(self):
+        """A rate-limited subtree request fails the walk instead of leaving a silent gap."""
+        repo = FakeRepo(PATHS, truncate_over=4)
+        get_git_tree = repo.get_git_tree
+
+        def limited(sha, recursive=False):
+            if sha != repo.head_sha and recursive:
+                raise RateLimitExceededException(403, {"message": "API rate limit exceeded"}, {})
+            return get_git_tree(sha, recursive)
+
+        repo.get_git_tree = limited
+        with self.assertRaises(RateLimitExceededException):
+            self._structure(repo)
+
+    def test_missing_subtree_is_skipped(self):
+        """A subtree that no longer exists is left out."""
+        repo = FakeRepo(PATHS, truncate_over=4)
+        get_git_tree = repo.get_git_tree
+
+        def missing(sha, recursive=False):
+            if sha != repo.head_sha and recursive:
+                raise UnknownObjectException(404, {"message": "Not Found"}, {})
+            return get_git_tree(sha, recursive)
+
+        repo.get_git_tree = missing
+        self.assertIn("src/", self._structure(repo))
+
+    def test_concurrent_walks_share_one_walk(self):
+        """Walks of the same repository started together make the GitHub requests once."""
+        repo = FakeRepo(PATHS)
+        get_git_tree = repo.get_git_tree
+
+        def slow(sha, recursive=False):
+            time.sleep(0.2)
+            return get_git_tree(sha, recursive)
+
+        repo.get_git_tree = slow
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            structures = list(executor.map(lambda _: self._structure(repo), range(4)))
+
+        self.assertEqual(len(set(structures)), 1)
+        self.assertEqual(repo.tree_calls, 1)
+
+    def test_shared_walk_records_the_revision_on_every_generator(self):
+        """A generator that joined another generator's walk still learns the commit it was pinned to."""
+        repo = FakeRepo(PATHS)
+        get_git_tree = repo.get_git_tree
+
+        def slow(sha, recursive=False):
+            time.sleep(0.2)
+            return get_git_tree(sha, recursive)
+
+        repo.get_git_tree = slow
+        with mock.patch.dict(os.environ, {"OPENAI_API_KEY": "test", "GITHUB_TOKEN": "test"}):
+            generators = [DeploymentGenerator() for _ in range(3)]
+        for generator in generators:
+            generator.single_flight = self.generator.single_flight
+            generator.gh = SimpleNamespace(get_repo=lambda name: repo)
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            list(executor.map(lambda generator: generator._get_project_structure("owner/repo"), generators))
+
+        self.assertEqual(repo.tree_calls, 1)
+        self.assertEqual([generator.revisions.get("owner/repo") for generator in generators], ["c0ffee"] * 3)
+
+
+
+class TestGenerateFiles(unittest.TestCase):
+    """Test cases for DeploymentGenerator.generate_files."""
+
+    def setUp(self):
+        env = {"OPENAI_API_KEY": "test", "GITHUB_TOKEN": "test"}
+        with mock.patch.dict(os.environ, env):
+            self.generator = DeploymentGenerator()
+        self.generator.single_flight = SingleFlight()
+        self.client = FakeChatClient(latency=0.2)
+        self.generator.client = self.client
+        self.generator.diagram_generator.client = self.client
+        self.generator.cache = None
+        self.generator.diagram_generator.cache = None
+        # The model refines the diagram, so all three stages are completions
+        self.generator.diagram_generator.refine = True
+
+    def test_parallel_matches_sequential(self):
+        """The concurrent path returns the same files and overlaps the three completions."""
+        start = time.perf_counter()
+        parallel = self.generator.generate_files("AWS", "repo", project_structure="app.py")
+        parallel_elapsed = time.perf_counter() - start
+
+        self.generator.parallel = False
+        sequential = self.generator.generate_files("AWS", "repo", project_structure="app.py")
+
+        self.assertEqual(parallel, sequential)
+        self.assertEqual(
+            sorted(parallel),
+            ["Dockerfile", "architecture_diagram.mmd", "service_mapping.json", "terraform.tf"],
+        )
+        self.assertLess(parallel_elapsed, 0.5)
+
+    def test_token_usage_recorded_per_stage(self):
+        """Every completion is logged in the shared prompt builder ledger."""
+        self.generator.generate_files("Vercel", "repo", project_structure="app.py")
+        stages = {call["stage"] for call in self.generator.prompt_builder.usage}
+        self.assertEqual(stages, {"service_mapping", "architecture_diagram", "platform_files"})
+        self.assertGreater(self.generator.prompt_builder.totals()["prompt_tokens"], 0)
+
+    def test_platforms_share_one_analysis(self):
+        """Several platforms cost one service mapping and diagram plus one completion per platform, all at once."""
+        platforms = ["AWS", "Vercel", "Firebase", "Google Cloud", "Mainframe"]
+        start = time.perf_counter()
+        results = self.generator.generate_files_for_platforms(platforms, "repo", project_structure="app.py")
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(list(results), platforms)
+        self.assertEqual(len(self.client.calls), 6)
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual(results["AWS"], self.generator.generate_files("AWS", "repo", project_structure="app.py"))
+        self.assertIn("deployment.yaml", results["Google Cloud"])
+        self.assertEqual(results["Mainframe"], {"error.txt": "No template available for Mainframe"})
+
+    def test_failing_platform_spares_the_others(self):
+        """A platform whose completion fails gets error.txt; the other platforms still get their files."""
+        generate = self.generator._generate_platform_output
+
+        def flaky(prompt, revision=None):
+            if "firebase.json" in prompt:
+                raise RuntimeError("quota exceeded")
+            return generate(prompt, revision)
+
+        self.generator._generate_platform_output = flaky
+        results = self.generator.generate_files_for_platforms(["Firebase", "Vercel"], "repo", project_structure="app.py")
+        self.assertEqual(results["Firebase"], {"error.txt": "An error occurred: quota exceeded"})
+        self.assertIn("vercel.json", results["Vercel"])
+
+    def test_timeout_returns_error_file(self):
+        """A stage that outlives the deadline surfaces as error.txt."""
+        self.generator.request_timeout = 0.05
+        result = self.generator.generate_files("Vercel", "repo", project_structure="app.py")
+        self.assertIn("error.txt", result)
+
+    def test_concurrent_requests_share_completions(self):
+        """Requests arriving together share completions; only the platform files differ per platform."""
+        platforms = ["AWS", "AWS", "AWS", "Vercel"]
+        with ThreadPoolExecutor(max_workers=len(platforms)) as executor:
+            results = list(executor.map(
+                lambda platform: self.generator.generate_files(platform, "repo", project_structure="app.py"),
+                platforms
+            ))
+
+        self.assertEqual(len(self.client.calls), 4)
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0]["architecture_diagram.mmd"], results[3]["architecture_diagram.mmd"])
+        self.assertEqual(self.generator.single_flight.stats(), {"calls": 4, "shared": 8})
+
+    def test_cached_rerun_skips_completions(self):
+        """A second run for the same revision is served entirely from the completion cache."""
+        cache = CompletionCache(":memory:")
+        self.generator.cache = cache
+        self.generator.diagram_generator.cache = cache
+
+        first = self.generator.generate_files("Vercel", "repo", project_structure="app.py", revision="abc")
+        self.assertEqual(len(self.client.calls), 3)
+        second = self.generator.generate_files("Vercel", "repo", project_structure="app.py", revision="abc")
+        self.assertEqual(len(self.client.calls), 3)
+        self.assertEqual(first, second)
+        self.assertEqual(cache.stats()["hits"], 3)
+
+        self.generator.generate_files("Vercel", "repo", project_structure="app.py", revision="def")
+        self.assertEqual(len(self.client.calls), 6)
+
+    def test_stream_matches_generate(self):
+        """Streamed pieces arrive early and add up to the files generate_files returns."""
+        start = time.perf_counter()
+        events = self.generator.stream_files("AWS", "repo", project_structure="app.py")
+        first_stage, _ = next(events)
+        first_piece_elapsed = time.perf_counter() - start
+        rest = list(events)
+
+        self.assertIn(first_stage, {"platform_files", "service_mapping", "architecture_diagram"})
+        self.assertLess(first_piece_elapsed, 0.15)
+        self.assertEqual(rest[-1][0], "files")
+        self.assertEqual(rest[-1][1], self.generator.generate_files("AWS", "repo", project_structure="app.py"))
+        stages = [call["stage"] for call in self.generator.prompt_builder.usage]
+        self.assertEqual(stages.count("platform_files"), 2)
+
+    def test_closed_stream_caches_nothing(self):
+        """Cancelling after the first piece leaves the cache empty."""
+        cache = CompletionCache(":memory:")
+        self.generator.cache = cache
+        self.generator.diagram_generator.cache = cache
+
+        events = self.generator.stream_files("Vercel", "repo", project_structure="app.py")
+        next(events)
+        events.close()
+        time.sleep(0.3)
+        self.assertEqual(len(cache), 0)
+
+    def test_combined_mode_makes_one_call(self):
+        """Combined mode returns the same filenames from a single validated JSON completion."""
+        reply = json.dumps({
+            "files": {"Dockerfile": "FROM python:3.12", "terraform.tf": "resource \"aws_ecs_cluster\" \"main\" {}"},
+            "service_mapping": [{"path": "app.py", "service": "AWS ECS"}],
+            "architecture_diagram": "graph TD;\n  A-->B",
+        })
+        self.client.create = mock.Mock(return_value=SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=reply))]
+        ))
+        self.client.chat.completions.create = self.client.create
+        self.generator.cache = CompletionCache(":memory:")
+        self.generator.generation_mode = "combined"
+
+        result = self.generator.generate_files("AWS", "repo", project_structure="app.py")
+        self.assertEqual(self.client.create.call_count, 1)
+        self.assertEqual(result["Dockerfile"], "FROM python:3.12")
+        self.assertEqual(json.loads(result["service_mapping.json"]), {"app.py": "AWS ECS"})
+        self.assertEqual(
+            sorted(result),
+            ["Dockerfile", "architecture_diagram.mmd", "service_mapping.json", "terraform.tf"],
+        )
+        self.assertEqual(self.client.create.call_args.kwargs["response_format"], {"type": "json_object"})
+
+    def test_combined_mode_rejects_invalid_reply(self):
+        """A reply missing artifacts becomes error.txt and is not cached."""
+        self.client.create = mock.Mock(return_value=SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content='{"files": {}}'))]
+        ))
+        self.client.chat.completions.create = self.client.create
+        cache = CompletionCache(":memory:")
+        self.generator.cache = cache
+        self.generator.generation_mode = "combined"
+
+        result = self.generator.generate_files("Vercel", "repo", project_structure="app.py")
+        self.assertIn("missing files: vercel.json", result["error.txt"])
+        self.assertEqual(len(cache), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+"""
+Tests for dplibraries.models.deployment_predictor.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+from dplibraries.models.deployment_predictor import DeploymentPredictor, RepositoryNames
+
+DATASET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dataset.csv")
+
+
+class TestDeploymentPredictor(unittest.TestCase):
+    """Test cases for DeploymentPredictor."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.predictor = DeploymentPredictor(DATASET)
+
+    def test_predict_known_repository(self):
+        """Repositories from the dataset get a prediction and a justification."""
+        prediction, justification = self.predictor.predict_deployment("IsraelChidera/focus-app")
+        self.assertIn(prediction, set(self.predictor.y))
+        self.assertIn("IsraelChidera/focus-app", justification)
+
+    def test_predict_unknown_repository(self):
+        """Unknown repository names are reported as not found."""
+        self.assertEqual(
+            self.predictor.predict_deployment("nobody/nothing"),
+            ("Repository not found", "No justification available"),
+        )
+
+    def test_predict_features_accepts_dict_and_vector(self):
+        """A feature dict and the equivalent column-ordered vector give the same answer."""
+        features = {"has_frontend": "Yes", "database": "Yes", "authentication": True}
+        vector = [1 if column in features else 0 for column in self.predictor.X.columns]
+
+        self.assertEqual(
+            self.predictor.predict_features(features, name="new/repo"),
+            self.predictor.predict_features(vector, name="new/repo"),
+        )
+
+    def test_predict_batch_matches_single_predictions(self):
+        """Batch prediction gives the same results as predicting each row on its own."""
+        rng = np.random.default_rng(0)
+        X = rng.integers(0, 2, size=(50, len(self.predictor.X.columns)))
+
+        predictions, justifications = self.predictor.predict_batch(X, n_similar=3)
+        self.assertEqual(len(predictions), 50)
+        for row, prediction, justification in zip(X, predictions, justifications):
+            self.assertEqual(self.predictor.predict_features(row, n_similar=3), (prediction, justification))
+
+    def test_binary_index(self):
+        """The bit-packed index answers the same API from the raw 0/1 features."""
+        predictor = DeploymentPredictor(DATASET, index="binary")
+        prediction, _ = predictor.predict_deployment("IsraelChidera/focus-app")
+        self.assertIn(prediction, set(predictor.y))
+        predictions, _ = predictor.predict_batch(predictor.X.values[:4])
+        self.assertEqual(len(predictions), 4)
+
+    def test_binary_index_is_the_only_feature_store(self):
+        """With a binary index no scaled or unpacked copy is kept, and rows unpack to the original features."""
+        predictor = DeploymentPredictor(DATASET, index="binary")
+        self.assertIsNone(predictor.X_scaled)
+        self.assertIsNone(predictor._features)
+        np.testing.assert_array_equal(predictor.features, self.predictor.features)
+
+        predictor.add_repositories(["new/repo"], ["Vercel"], [self.predictor.features[0]])
+        np.testing.assert_array_equal(predictor.features[-1], self.predictor.features[0])
+        self.assertEqual(predictor.predict_deployment("new/repo", 1)[0], self.predictor.y.iloc[0])
+
+    def test_repository_names(self):
+        """Names round-trip, the first row of a repeated name wins and appended names are found."""
+        names = RepositoryNames(["a/b", "ünï/cödé", "a/b"])
+        self.assertEqual(list(names), ["a/b", "ünï/cödé", "a/b"])
+        self.assertEqual((names.position("a/b"), names.position("ünï/cödé"), names.position("x/y")), (0, 1, None))
+        names.extend(["x/y", "a/b"])
+        self.assertEqual((len(names), names[-2], names.position("x/y"), names.position("a/b")), (5, "x/y", 3, 0))
+
+    def test_snapshot_round_trip(self):
+        """A saved snapshot loads back into a predictor with the same answers."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "predictor.npz")
+            self.predictor.save(path)
+            loaded = DeploymentPredictor.load(path)
+
+        np.testing.assert_allclose(loaded.X_scaled, self.predictor.X_scaled)
+        for repository in self.predictor.repositories[:10]:
+            self.assertEqual(loaded.predict_deployment(repository), self.predictor.predict_deployment(repository))
+
+    def test_snapshot_loads_without_pandas_or_sklearn(self):
+        """Loading a snapshot and predicting from it needs NumPy only."""
+        probe = ("import sys; from dplibraries.models.deployment_predictor import DeploymentPredictor; "
+                 "p = DeploymentPredictor.load(sys.argv[1]); p.predict_batch([[0] * len(p.feature_columns)]); "
+                 "print(','.join(m for m in ('pandas', 'sklearn', 'scipy') if m in sys.modules))")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "predictor.npz")
+            self.predictor.save(path)
+            result = subprocess.run([sys.executable, "-c", probe, path], capture_output=True, text=True,
+                                    cwd=os.path.dirname(DATASET), check=True)
+        self.assertEqual(result.stdout.strip(), "")
+
+    def test_add_repositories_matches_full_fit(self):
+        """Incrementally added rows give the same model as fitting on all rows at once."""
+        rows = self.predictor.df.iloc[:12].replace({1: "Yes", 0: "No"})
+        with tempfile.TemporaryDirectory() as tmp:
+            rows.to_csv(os.path.join(tmp, "full.csv"), index=False)
+            rows.iloc[:6].to_csv(os.path.join(tmp, "head.csv"), index=False)
+            full = DeploymentPredictor(os.path.join(tmp, "full.csv"))
+            incremental = DeploymentPredictor(os.path.join(tmp, "head.csv"))
+
+        tail = rows.iloc[6:]
+        incremental.add_repositories(
+            tail["repository"].tolist(),
+            tail["deployment"].tolist(),
+            tail[incremental.feature_columns],
+            rescale=True,
+        )
+
+        np.testing.assert_allclose(incremental.scaler.mean_, full.scaler.mean_)
+        np.testing.assert_allclose(incremental.scaler.var_, full.scaler.var_)
+        np.testing.assert_array_equal(incremental.y, full.y)
+        for repository in rows["repository"]:
+            self.assertEqual(incremental.predict_deployment(repository, 3), full.predict_deployment(repository, 3))
+
+    def test_predict_batch_rejects_wrong_width(self):
+        """Vectors with the wrong number of features are rejected."""
+        with self.assertRaises(ValueError):
+            self.predictor.predict_batch(np.zeros((2, 3)))
+
+    def test_n_similar_must_be_positive(self):
+        """Zero, negative, boolean and non-integer neighbour counts are rejected by every predict method."""
+        features = np.zeros(len(self.predictor.feature_columns))
+        for n_similar in (0, -1, True, 2.5):
+            with self.assertRaises(ValueError):
+                self.predictor.predict_deployment("IsraelChidera/focus-app", n_similar)
+            with self.assertRaises(ValueError):
+                self.predictor.predict_features(features, n_similar)
+            with self.assertRaises(ValueError):
+                self.predictor.predict_batch([features], n_similar)
+        self.assertEqual(len(self.predictor.predict_batch([features], np.int64(3))[0]), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
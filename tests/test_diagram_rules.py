@@ -0,0 +1,102 @@
+"""
+Tests for dplibraries.generators.diagram_rules.
+"""
+
+import os
+import unittest
+from unittest import mock
+
+from dplibraries.generators.completion_cache import CompletionCache
+from dplibraries.generators.diagram_generator import DiagramGenerator
+from dplibraries.generators.diagram_rules import synthesize_diagram
+from tests.test_deployment_generator import FakeChatClient
+
+STRUCTURE = """.github/
+  workflows/
+    ci.yml
+Dockerfile
+prisma/
+  schema.prisma
+src/
+  api/
+    users.ts
+  components/
+    App.tsx
+  workers/
+    email.ts
+"""
+
+MICROSERVICES = """api/
+  gateway.ts
+services/
+  billing/
+    Dockerfile
+  search/
+    go.mod
+  users/
+    package.json
+terraform/
+  main.tf
+"""
+
+
+class TestSynthesizeDiagram(unittest.TestCase):
+    """Test cases for the rule-based diagram engine."""
+
+    def test_components_and_edges(self):
+        """Detected components become labelled nodes wired by the rules."""
+        diagram = synthesize_diagram("demo", STRUCTURE)
+        lines = [line.strip() for line in diagram.splitlines()]
+        self.assertEqual(lines[0], "graph TD")
+        self.assertIn('frontend["Frontend<br/>src/components/"]', lines)
+        self.assertIn('db[("Database<br/>prisma/")]', lines)
+        for edge in ("users -->|uses| frontend", "frontend -->|API calls| api", "api -->|queries| db",
+                     "api -->|schedules| workers", "workers -->|queries| db", "cicd -->|builds| containers"):
+            self.assertIn(edge, lines)
+        self.assertEqual(synthesize_diagram("demo", STRUCTURE), diagram)
+
+    def test_microservices_are_drawn_one_by_one(self):
+        """Each service with its own manifest gets a node routed from the API."""
+        lines = [line.strip() for line in synthesize_diagram("shop", MICROSERVICES).splitlines()]
+        for name in ("billing", "search", "users"):
+            self.assertIn(f'svc_{name}["{name}<br/>services/{name}/"]', lines)
+            self.assertIn(f"api -->|routes| svc_{name}", lines)
+        self.assertIn('iac["Infrastructure as code<br/>terraform/"]', lines)
+
+    def test_empty_structure(self):
+        """A tree with nothing recognisable is drawn as users of the application."""
+        diagram = synthesize_diagram("tiny", "")
+        self.assertIn('app["tiny"]', diagram)
+        self.assertIn("users -->|uses| app", diagram)
+
+
+class TestDiagramGenerator(unittest.TestCase):
+    """Test cases for DiagramGenerator with and without the refinement pass."""
+
+    def setUp(self):
+        with mock.patch.dict(os.environ, {"OPENAI_API_KEY": "test"}):
+            self.generator = DiagramGenerator()
+        self.client = FakeChatClient()
+        self.generator.client = self.client
+        self.generator.cache = CompletionCache(":memory:", enabled=False)
+
+    def test_rules_by_default(self):
+        """Without refine no completion is made and streaming yields the same diagram."""
+        diagram = self.generator.generate_architecture_diagram("demo", STRUCTURE)
+        self.assertEqual(diagram, synthesize_diagram("demo", STRUCTURE))
+        self.assertEqual(list(self.generator.stream_architecture_diagram("demo", STRUCTURE)), [diagram])
+        self.assertEqual(self.client.calls, [])
+
+    def test_refine_sends_the_draft(self):
+        """With refine the model gets the draft, and a failed completion falls back to it."""
+        self.generator.refine = True
+        self.generator.generate_architecture_diagram("demo", STRUCTURE)
+        self.assertIn('frontend["Frontend<br/>src/components/"]', self.client.calls[0][1]["content"])
+
+        self.client.chat.completions.create = mock.Mock(side_effect=RuntimeError("down"))
+        self.assertEqual(self.generator.generate_architecture_diagram("demo", STRUCTURE),
+                         synthesize_diagram("demo", STRUCTURE))
+
+
+if __name__ == '__main__':
+    unittest.main()
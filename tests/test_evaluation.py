@@ -0,0 +1,80 @@
+"""
+Tests for dplibraries.models.evaluation.
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from dplibraries.models.deployment_predictor import DeploymentPredictor
+from dplibraries.models import evaluation
+from dplibraries.models.evaluation import confusion_matrix, cross_validate, fold_assignments, scale_dataset
+from tests.test_deployment_predictor import DATASET
+
+
+class TestEvaluation(unittest.TestCase):
+    """Test cases for the predictor cross-validation harness."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.predictor = DeploymentPredictor(DATASET)
+
+    def test_leave_one_out_matches_single_predictions(self):
+        """Each row is predicted as predict_deployment predicts it from its neighbours, itself excluded."""
+        predicted = cross_validate(self.predictor, n_similar=3)
+        classes = self.predictor.classes
+        for name, label in zip(self.predictor.repositories, predicted):
+            self.assertEqual(self.predictor.predict_deployment(name, 3)[0], classes[label])
+
+    def test_evaluate_reports_confusion_and_platforms(self):
+        """Each k gets accuracy, a confusion matrix over every row and one-vs-rest counts that agree with it."""
+        results = self.predictor.evaluate(n_similar=(1, 5))
+        self.assertEqual([result["k"] for result in results], [1, 5])
+        n_rows = len(self.predictor.y)
+        for result in results:
+            confusion = np.array(result["confusion"])
+            self.assertEqual(confusion.sum(), n_rows)
+            self.assertAlmostEqual(result["accuracy"], np.trace(confusion) / n_rows, places=4)
+            for platform in result["per_platform"].values():
+                self.assertEqual(sum(platform[key] for key in ("tp", "fp", "fn", "tn")), n_rows)
+            self.assertGreater(result["queries_per_second"], 0)
+
+    def test_k_fold_predicts_every_row_once(self):
+        """Folds partition the rows, and refitting a fold leaves the predictor untouched."""
+        self.assertEqual(np.bincount(fold_assignments(32, 5)).tolist(), [7, 7, 6, 6, 6])
+        before = self.predictor.predict_deployment("IsraelChidera/focus-app")
+        predicted = cross_validate(self.predictor, n_similar=3, folds=4)
+        self.assertEqual(len(predicted), len(self.predictor.y))
+        self.assertEqual(self.predictor.predict_deployment("IsraelChidera/focus-app"), before)
+
+    def test_queries_are_batched(self):
+        """Querying a few rows at a time predicts what one bulk query would, and folds below 2 are refused."""
+        loo, folded = cross_validate(self.predictor, 3), cross_validate(self.predictor, 3, folds=4)
+        with mock.patch.object(evaluation, "QUERY_BATCH", 7):
+            np.testing.assert_array_equal(cross_validate(self.predictor, 3), loo)
+            np.testing.assert_array_equal(cross_validate(self.predictor, 3, folds=4), folded)
+        for folds in (0, 1):
+            with self.assertRaises(ValueError):
+                cross_validate(self.predictor, 3, folds=folds)
+
+    def test_confusion_matrix(self):
+        """Actual labels are rows and predicted labels are columns."""
+        self.assertEqual(confusion_matrix([0, 0, 1, 2], [0, 1, 1, 0], 3).tolist(),
+                         [[1, 1, 0], [0, 1, 0], [1, 0, 0]])
+
+    def test_scale_dataset(self):
+        """Scaled datasets keep the header and labels of the real one and load as a predictor."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "scaled.csv")
+            scale_dataset(DATASET, 200, path)
+            scaled = DeploymentPredictor(path)
+        self.assertEqual(len(scaled.y), 200)
+        self.assertEqual(list(scaled.X.columns), list(self.predictor.X.columns))
+        self.assertTrue(set(scaled.y) <= set(self.predictor.y))
+
+
+if __name__ == '__main__':
+    unittest.main()
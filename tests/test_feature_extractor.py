@@ -0,0 +1,77 @@
+"""
+Tests for dplibraries.models.feature_extractor.
+"""
+
+import csv
+import os
+import unittest
+
+from dplibraries.models.feature_extractor import (
+    FEATURE_COLUMNS,
+    extract_features,
+    iter_structure_paths,
+    parse_dependencies,
+)
+
+DATASET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dataset.csv")
+
+STRUCTURE = """.github/
+  workflows/
+    ci.yml
+Dockerfile
+package.json
+prisma/
+  schema.prisma
+src/
+  api/
+    users.ts
+  components/
+    App.tsx
+"""
+
+
+class TestFeatureExtractor(unittest.TestCase):
+    """Test cases for the rule-based feature extractor."""
+
+    def test_columns_match_dataset(self):
+        """The extractor emits exactly the feature columns of dataset.csv."""
+        with open(DATASET) as f:
+            header = next(csv.reader(f))
+        self.assertEqual(FEATURE_COLUMNS, header[2:])
+        self.assertEqual(list(extract_features("")), FEATURE_COLUMNS)
+
+    def test_iter_structure_paths(self):
+        """Indented structure lines are turned back into full paths."""
+        paths = list(iter_structure_paths(STRUCTURE))
+        self.assertIn(".github/workflows/ci.yml", paths)
+        self.assertIn("src/components/App.tsx", paths)
+        self.assertIn("Dockerfile", paths)
+
+    def test_features_from_paths(self):
+        """Path rules detect features from the tree alone."""
+        features = extract_features(STRUCTURE)
+        for feature in ("has_frontend", "has_cicd", "uses_containerization", "database", "api_exposed", "monolith"):
+            self.assertEqual(features[feature], 1, feature)
+        for feature in ("uses_iac", "message_queues", "microservices", "already_deployed"):
+            self.assertEqual(features[feature], 0, feature)
+
+    def test_features_from_manifests(self):
+        """Dependencies and manifest contents add features the tree does not show."""
+        files = {
+            "package.json": '{"dependencies": {"next-auth": "4", "ioredis": "5"}, "devDependencies": {"bullmq": "5"}}',
+            "docker-compose.yml": "services:\n  db:\n    image: postgres:16\n",
+        }
+        features = extract_features("package.json\ndocker-compose.yml", files)
+        for feature in ("authentication", "caching", "message_queues", "background_jobs", "database"):
+            self.assertEqual(features[feature], 1, feature)
+
+    def test_parse_dependencies(self):
+        """Package names are read from the common manifest formats."""
+        self.assertEqual(parse_dependencies("requirements.txt", "Django>=4\n# comment\nceler_y==5\n"), {"django", "celer-y"})
+        self.assertIn("fastapi", parse_dependencies("pyproject.toml", 'dependencies = ["fastapi>=0.110"]\n'))
+        self.assertIn("gin-gonic/gin", parse_dependencies("go.mod", "require (\n\tgithub.com/gin-gonic/gin v1.9.1\n)\n"))
+        self.assertEqual(parse_dependencies("package.json", "not json"), set())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+"""
+Tests for dplibraries.generators.github_access.
+"""
+
+import unittest
+from unittest import mock
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from dplibraries.generators.github_access import (
+    ConditionalCache,
+    GitHubAdapter,
+    RateLimitScheduler,
+    connection_class,
+)
+
+TREE_URL = "https://api.github.com/repos/Owner/Repo/git/trees/abc?recursive=1"
+
+
+def make_response(status, body=b"", headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response._content = body
+    response.headers.update(headers or {})
+    response.url = TREE_URL
+    return response
+
+
+class FakeClock:
+    """Clock whose sleep advances time instead of blocking."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestGitHubAdapter(unittest.TestCase):
+    """Test cases for GitHubAdapter, RateLimitScheduler and ConditionalCache."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.scheduler = RateLimitScheduler(reserve=2, clock=self.clock, sleep=self.clock.sleep)
+        self.adapter = GitHubAdapter(self.scheduler, ConditionalCache())
+        self.sent = []
+
+    def _send(self, *responses):
+        """Send one GET through the adapter while the network returns responses in order."""
+        replies = iter(responses)
+
+        def network(adapter, request, **kwargs):
+            self.sent.append(dict(request.headers))
+            return next(replies)
+
+        request = requests.Request("GET", TREE_URL, headers={"Authorization": "token x"}).prepare()
+        with mock.patch.object(HTTPAdapter, "send", network):
+            return self.adapter.send(request)
+
+    def test_unchanged_resource_is_served_from_304(self):
+        """A repeated GET is conditional and a 304 returns the remembered body."""
+        headers = {"ETag": '"v1"', "X-RateLimit-Remaining": "100", "X-RateLimit-Reset": "2000"}
+        first = self._send(make_response(200, b'{"tree": []}', headers))
+        second = self._send(make_response(304, headers={"X-RateLimit-Remaining": "100", "X-RateLimit-Reset": "2000"}))
+
+        self.assertEqual(self.sent[1]["If-None-Match"], '"v1"')
+        self.assertEqual((second.status_code, second.content), (200, first.content))
+        self.assertEqual(self.scheduler.usage("owner/repo"), {"requests": 2, "not_modified": 1})
+
+    def test_waits_for_reset_when_budget_is_spent(self):
+        """Once only the reserve is left, requests wait for the reported reset."""
+        self._send(make_response(200, headers={"X-RateLimit-Remaining": "3", "X-RateLimit-Reset": "1030"}))
+        self._send(make_response(200, headers={"X-RateLimit-Remaining": "2", "X-RateLimit-Reset": "1030"}))
+        self.assertEqual(self.clock.sleeps, [])
+
+        self._send(make_response(200, headers={"X-RateLimit-Remaining": "4999", "X-RateLimit-Reset": "4600"}))
+        self.assertEqual(self.clock.sleeps, [31.0])
+        self.assertEqual(self.scheduler.remaining, 4999)
+
+    def test_rate_limited_request_is_retried(self):
+        """A 403 refusal for the rate limit is retried after the reset instead of returned."""
+        refused = make_response(403, headers={"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "1060"})
+        ok = make_response(200, b"{}", {"X-RateLimit-Remaining": "4999", "X-RateLimit-Reset": "4600"})
+        response = self._send(refused, ok)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.clock.sleeps, [61.0])
+        self.assertEqual(self.scheduler.usage("owner/repo")["requests"], 2)
+
+    def test_spent_budget_without_reset_backs_off(self):
+        """A spent budget reported without X-RateLimit-Reset waits the fixed back-off, then sends."""
+        self._send(make_response(200, headers={"X-RateLimit-Remaining": "1"}))
+        self._send(make_response(200, headers={"X-RateLimit-Remaining": "4999"}))
+        self.assertEqual(self.clock.sleeps, [61.0])
+        self.assertEqual(self.scheduler.remaining, 4999)
+
+    def test_cache_is_bounded_by_bytes(self):
+        """The least recently used bodies are dropped once the cache holds more than max_bytes."""
+        cache = ConditionalCache(max_bytes=250)
+        for i in range(3):
+            cache.set(str(i), make_response(200, b"x" * 100, {"ETag": f'"{i}"'}))
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("0"))
+        self.assertLessEqual(cache.size, 250)
+        cache.set("big", make_response(200, b"x" * 1000, {"ETag": '"big"'}))
+        self.assertIsNone(cache.get("big"))
+
+    def test_connection_factory_mounts_adapter(self):
+        """PyGithub connections built by the factory route through GitHubAdapter."""
+        connection = connection_class(self.scheduler)("api.github.com", retry=1, pool_size=3)
+        adapter = connection.session.get_adapter("https://api.github.com/repos")
+        self.assertIsInstance(adapter, GitHubAdapter)
+        self.assertIs(adapter.scheduler, self.scheduler)
+
+
+if __name__ == '__main__':
+    unittest.main()
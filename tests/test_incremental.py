@@ -0,0 +1,212 @@
+"""
+Tests for dplibraries.generators.incremental.
+"""
+
+import json
+import os
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from dplibraries.generators.completion_cache import CompletionCache
+from dplibraries.generators.deployment_generator import DeploymentGenerator
+from dplibraries.generators.incremental import AnalysisStore, IncrementalAnalyzer, apply_changes, parse_mapping
+from dplibraries.generators.single_flight import SingleFlight
+from tests.test_deployment_generator import PATHS, FakeChatClient, FakeRepo
+
+REPO_URL = "https://github.com/owner/repo"
+
+
+class VersionedRepo(FakeRepo):
+    """FakeRepo keeping the paths of every pushed commit, with a compare API over them."""
+
+    def __init__(self, paths):
+        super().__init__(paths)
+        self.history = {self.head_sha: list(paths)}
+        self.compare_calls = 0
+        self.diverged = False
+
+    def push(self, sha, paths):
+        self.history[sha] = list(paths)
+        self.head_sha, self.paths = sha, list(paths)
+
+    def compare(self, base, head):
+        self.compare_calls += 1
+        old = {p for p in self.history[base] if not p.endswith("/")}
+        new = {p for p in self.history[head] if not p.endswith("/")}
+        files = [SimpleNamespace(status="removed", filename=p, previous_filename=None) for p in sorted(old - new)]
+        files += [SimpleNamespace(status="added", filename=p, previous_filename=None) for p in sorted(new - old)]
+        status = "diverged" if self.diverged else ("ahead" if base != head else "identical")
+        return SimpleNamespace(status=status, files=files, total_commits=1)
+
+
+class MappingChatClient(FakeChatClient):
+    """FakeChatClient answering service mapping requests with queued JSON objects."""
+
+    def __init__(self, mappings):
+        super().__init__()
+        self.mappings = list(mappings)
+
+    def create(self, model, messages, temperature, stream=False, **kwargs):
+        if messages[0]["content"] != "You are a cloud infrastructure expert.":
+            return super().create(model, messages, temperature, stream, **kwargs)
+        self.calls.append(messages)
+        content = json.dumps(self.mappings.pop(0))
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+class TestApplyChanges(unittest.TestCase):
+    """Test cases for apply_changes."""
+
+    def test_matches_a_fresh_walk(self):
+        """Adding, removing and moving files yields the entries of the new tree, in git order."""
+        base = [(p.rstrip("/"), p.endswith("/")) for p in PATHS]
+        changes = [
+            ("renamed", "lib/api/app.py", "src/api/app.py"),
+            ("removed", "Dockerfile", None),
+            ("added", "src/main.py.bak", None),
+            ("modified", "package.json", None),
+        ]
+        entries, added, removed = apply_changes(base, changes)
+
+        self.assertEqual(entries, [
+            (".github", True), (".github/workflows", True), (".github/workflows/ci.yml", False),
+            ("lib", True), ("lib/api", True), ("lib/api/app.py", False),
+            ("package.json", False),
+            ("src", True), ("src/main.py", False), ("src/main.py.bak", False),
+        ])
+        self.assertEqual(added, {"lib": True, "lib/api": True, "lib/api/app.py": False, "src/main.py.bak": False})
+        self.assertEqual(removed, {"Dockerfile": False, "src/api": True, "src/api/app.py": False})
+
+    def test_parse_mapping(self):
+        """Mappings are read from plain or fenced JSON; anything else is not a mapping."""
+        self.assertEqual(parse_mapping('```json\n{"a.py": "Lambda"}\n```'), {"a.py": "Lambda"})
+        self.assertIsNone(parse_mapping("Use AWS for everything."))
+        self.assertIsNone(parse_mapping({"error": "Service analysis failed"}))
+
+
+class TestIncrementalAnalyzer(unittest.TestCase):
+    """Test cases for IncrementalAnalyzer over fake GitHub and OpenAI clients."""
+
+    def setUp(self):
+        env = {"OPENAI_API_KEY": "test", "GITHUB_TOKEN": "test"}
+        with mock.patch.dict(os.environ, env):
+            self.generator = DeploymentGenerator()
+        self.generator.single_flight = SingleFlight()
+        self.client = MappingChatClient([
+            {"Dockerfile": "AWS ECS", "src/main.py": "AWS Lambda"},
+            {"src/worker/jobs.py": "AWS SQS"},
+        ])
+        self.generator.client = self.generator.diagram_generator.client = self.client
+        self.generator.cache = self.generator.diagram_generator.cache = CompletionCache(":memory:", enabled=False)
+        self.repo = VersionedRepo(PATHS)
+        self.generator.gh = SimpleNamespace(get_repo=lambda name: self.repo)
+        self.analyzer = IncrementalAnalyzer(self.generator, AnalysisStore(":memory:"))
+
+    def test_unchanged_commit_reuses_everything(self):
+        """A second run on the same commit makes no completion and no tree walk."""
+        first = self.analyzer.generate_files("Vercel", REPO_URL)
+        calls, tree_calls = len(self.client.calls), self.repo.tree_calls
+
+        second = self.analyzer.generate_files("Vercel", REPO_URL)
+        self.assertEqual(second, first)
+        self.assertEqual((len(self.client.calls), self.repo.tree_calls), (calls, tree_calls))
+        report = self.analyzer.reports["owner/repo"]
+        self.assertEqual(report["mode"], "unchanged")
+        self.assertEqual(report["reused"], ["architecture_diagram", "output", "service_mapping"])
+
+    def test_push_regenerates_only_what_the_diff_touches(self):
+        """New files are mapped on their own and merged; removed ones leave the mapping; the tree is not walked."""
+        self.analyzer.generate_files("Vercel", REPO_URL)
+        tree_calls = self.repo.tree_calls
+        head = [p for p in PATHS if p != "Dockerfile"] + ["src/worker/", "src/worker/jobs.py"]
+        self.repo.push("beef", sorted(head, key=lambda p: p.rstrip("/").split("/")))
+
+        files = self.analyzer.generate_files("Vercel", REPO_URL)
+        report = self.analyzer.reports["owner/repo"]
+        self.assertEqual(report["mode"], "incremental")
+        self.assertEqual(report["changed_files"], 2)
+        self.assertEqual(report["regenerated"], ["architecture_diagram", "service_mapping"])
+        self.assertEqual(self.repo.tree_calls, tree_calls)
+
+        mapping_calls = [m for m in self.client.calls if m[0]["content"] == "You are a cloud infrastructure expert."]
+        partial_prompt = mapping_calls[-1][1]["content"]
+        self.assertIn("jobs.py", partial_prompt)
+        self.assertNotIn("ci.yml", partial_prompt)
+        self.assertEqual(json.loads(files["service_mapping.json"]),
+                         {"src/main.py": "AWS Lambda", "src/worker/jobs.py": "AWS SQS"})
+
+        # The patched entries are those a fresh walk of the new commit finds
+        fresh = list(self.generator._structure_entries(self.repo, "beef", self.generator.structure_budgets)[0])
+        self.assertEqual([tuple(e) for e in self.analyzer.store.get("owner/repo")["entries"]], fresh)
+
+    def test_new_files_without_new_directories_redraw_the_diagram(self):
+        """Files the diagram rules recognise change the diagram even when no directory is added."""
+        self.analyzer.generate_files("Vercel", REPO_URL)
+        self.assertNotIn("iac", self.analyzer.store.get("owner/repo")["architecture_diagram"])
+        self.repo.push("beef", sorted(PATHS + ["main.tf", "vercel.json"], key=lambda p: p.rstrip("/").split("/")))
+
+        files = self.analyzer.generate_files("Vercel", REPO_URL)
+        report = self.analyzer.reports["owner/repo"]
+        self.assertIn("architecture_diagram", report["regenerated"])
+        self.assertIn("iac", files["architecture_diagram.mmd"])
+        self.assertIn("hosting", files["architecture_diagram.mmd"])
+        fresh = self.generator.diagram_generator.draft("repo", self.generator._get_project_structure("owner/repo"))
+        self.assertEqual(files["architecture_diagram.mmd"], fresh)
+
+    def test_hidden_entries_are_not_stored(self):
+        """Ignored and overly deep entries stay out of the record, and pushes touching only them reuse everything."""
+        self.generator.structure_budgets = {**self.generator.structure_budgets, "max_depth": 2}
+        paths = PATHS + ["node_modules/", "node_modules/left-pad/", "node_modules/left-pad/index.js",
+                         "src/api/v1/", "src/api/v1/deep/", "src/api/v1/deep/handler.py"]
+        self.repo.push("base", sorted(paths, key=lambda p: p.rstrip("/").split("/")))
+        self.analyzer.generate_files("Vercel", REPO_URL)
+        stored = [path for path, _ in self.analyzer.store.get("owner/repo")["entries"]]
+        self.assertNotIn("node_modules", stored)
+        self.assertIn("src/api/v1", stored)
+        self.assertNotIn("src/api/v1/deep", stored)
+
+        self.repo.push("beef", sorted(paths + ["node_modules/left-pad/extra.js"],
+                                      key=lambda p: p.rstrip("/").split("/")))
+        self.analyzer.generate_files("Vercel", REPO_URL)
+        self.assertEqual(self.analyzer.reports["owner/repo"]["regenerated"], [])
+
+    def test_github_slot_is_not_held_during_completions(self):
+        """The GitHub slot covers the compare and tree requests, not the model calls."""
+        holding = threading.local()
+
+        class Slot:
+            def __enter__(self):
+                holding.value = True
+
+            def __exit__(self, *exc):
+                holding.value = False
+
+        create = self.client.create
+        held_during_completion = []
+
+        def create_checking_slot(*args, **kwargs):
+            held_during_completion.append(getattr(holding, "value", False))
+            return create(*args, **kwargs)
+
+        self.client.chat.completions.create = create_checking_slot
+        self.analyzer.github_slots = Slot()
+        self.analyzer.generate_files("Vercel", REPO_URL)
+        self.assertTrue(held_during_completion)
+        self.assertFalse(any(held_during_completion))
+
+    def test_force_push_falls_back_to_a_full_run(self):
+        """A head that is not a descendant of the stored commit is walked and analyzed in full."""
+        self.analyzer.generate_files("Vercel", REPO_URL)
+        self.repo.diverged = True
+        self.repo.push("beef", [p for p in PATHS if p != "package.json"])
+
+        self.analyzer.generate_files("Vercel", REPO_URL)
+        report = self.analyzer.reports["owner/repo"]
+        self.assertEqual(report["mode"], "full")
+        self.assertEqual(report["regenerated"], ["architecture_diagram", "service_mapping"])
+
+
+if __name__ == '__main__':
+    unittest.main()
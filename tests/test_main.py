@@ -0,0 +1,258 @@
+"""
+Tests for the batch mode and local recommendations of main.py.
+"""
+
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from github import UnknownObjectException
+
+import main
+from dplibraries.generators.completion_cache import CompletionCache
+from dplibraries.generators.deployment_generator import DeploymentGenerator
+from dplibraries.generators.single_flight import SingleFlight
+from dplibraries.models.deployment_predictor import DeploymentPredictor
+from tests.test_deployment_generator import PATHS, FakeChatClient, FakeRepo
+
+
+class Gauge:
+    """Counts the calls running at once and remembers the peak."""
+
+    def __init__(self):
+        self.running = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        with self.lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+
+    def __exit__(self, *exc):
+        with self.lock:
+            self.running -= 1
+
+
+class GaugedChatClient(FakeChatClient):
+    """FakeChatClient measuring how many completions are in flight at once."""
+
+    def __init__(self, latency=0.0):
+        super().__init__(latency)
+        self.gauge = Gauge()
+
+    def create(self, model, messages, temperature, stream=False, **kwargs):
+        with self.gauge:
+            return super().create(model, messages, temperature, stream, **kwargs)
+
+
+class GaugedRepo(FakeRepo):
+    """FakeRepo measuring how many tree requests, shared across repositories, run at once."""
+
+    def __init__(self, paths, gauge, latency=0.0):
+        super().__init__(paths)
+        self.gauge = gauge
+        self.latency = latency
+
+    def get_git_tree(self, sha, recursive=False):
+        with self.gauge:
+            time.sleep(self.latency)
+            return super().get_git_tree(sha, recursive)
+
+
+class RecommendingChatClient(FakeChatClient):
+    """FakeChatClient answering platform recommendation requests with a fixed platform."""
+
+    def __init__(self, platform):
+        super().__init__()
+        self.platform = platform
+        self.recommendations = 0
+
+    def create(self, model, messages, temperature, stream=False, **kwargs):
+        if messages[0]["content"] != "You are a deployment strategy expert.":
+            return super().create(model, messages, temperature, stream, **kwargs)
+        self.recommendations += 1
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=self.platform))])
+
+
+class Output(io.StringIO):
+    """stdout stand-in calling on_line with each JSON Lines record as it is written."""
+
+    def __init__(self, on_line=None):
+        super().__init__()
+        self.on_line = on_line
+
+    def write(self, text):
+        if self.on_line is not None:
+            self.on_line(json.loads(text))
+        return super().write(text)
+
+
+class TestReadBatch(unittest.TestCase):
+    """Test cases for read_batch."""
+
+    def test_separators_and_skipped_lines(self):
+        """URLs may be followed by a platform after a comma, tab or space; blank and # lines are skipped."""
+        lines = [
+            "# repositories to analyze\n",
+            "https://github.com/o/a\n",
+            "\n",
+            "https://github.com/o/b, Google Cloud\n",
+            "https://github.com/o/c\tAWS\n",
+            "   \n",
+            "https://github.com/o/d Vercel\n",
+            "https://github.com/o/e ,\n",
+        ]
+        self.assertEqual(main.read_batch(lines), [
+            ("https://github.com/o/a", None),
+            ("https://github.com/o/b", "Google Cloud"),
+            ("https://github.com/o/c", "AWS"),
+            ("https://github.com/o/d", "Vercel"),
+            ("https://github.com/o/e", None),
+        ])
+
+
+class TestPredictLocally(unittest.TestCase):
+    """Test cases for recommending a platform with the local model before asking OpenAI."""
+
+    @classmethod
+    def setUpClass(cls):
+        # Five repositories, so every one votes: 3 of 5 (60%) agree on Vercel
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "dataset.csv")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("repository,deployment,has_frontend,has_cicd,uses_containerization\n")
+                for i, (platform, *features) in enumerate([
+                    ("Vercel", "Yes", "Yes", "No"), ("Vercel", "Yes", "Yes", "Yes"), ("Vercel", "Yes", "No", "No"),
+                    ("AWS", "No", "Yes", "Yes"), ("AWS", "No", "No", "Yes"),
+                ]):
+                    f.write(",".join([f"owner/repo{i}", platform, *features]) + "\n")
+            cls.predictor = DeploymentPredictor(path)
+
+    def setUp(self):
+        env = {"OPENAI_API_KEY": "test", "GITHUB_TOKEN": "test"}
+        with mock.patch.dict(os.environ, env):
+            self.generator = DeploymentGenerator()
+        self.generator.single_flight = SingleFlight()
+        self.client = RecommendingChatClient("AWS")
+        self.generator.client = self.generator.diagram_generator.client = self.client
+        self.generator.cache = self.generator.diagram_generator.cache = CompletionCache(":memory:", enabled=False)
+        self.generator.gh = SimpleNamespace(get_repo=lambda name: FakeRepo(PATHS))
+
+    def _analyze(self, min_confidence):
+        return main.analyze_repository(self.generator, self.predictor, "https://github.com/owner/repo", None,
+                                       threading.BoundedSemaphore(1), min_confidence)
+
+    def test_confident_prediction_is_used_without_openai(self):
+        """At or above min_confidence the local prediction picks the platform and no recommendation is asked for."""
+        self.assertEqual(main.predict_locally(self.predictor, "repo", "src/\n  app.py", 0.6)[::2], ("Vercel", 0.6))
+        record = self._analyze(0.6)
+        self.assertEqual((record["platform"], record["platform_source"]), ("Vercel", "local_model"))
+        self.assertIn("vercel.json", record["files"])
+        self.assertEqual(self.client.recommendations, 0)
+
+    def test_unconfident_prediction_falls_back_to_openai(self):
+        """Below min_confidence, or without a model, OpenAI is asked once and its platform is used."""
+        self.assertIsNone(main.predict_locally(self.predictor, "repo", "src/\n  app.py", 0.8))
+        self.assertIsNone(main.predict_locally(None, "repo", "src/\n  app.py", 0.0))
+        record = self._analyze(0.8)
+        self.assertEqual((record["platform"], record["platform_source"]), ("AWS", "openai"))
+        self.assertIn("Dockerfile", record["files"])
+        self.assertEqual(self.client.recommendations, 1)
+
+
+class TestRunBatch(unittest.TestCase):
+    """Test cases for run_batch over fake GitHub and OpenAI clients."""
+
+    def setUp(self):
+        env = {"OPENAI_API_KEY": "test", "GITHUB_TOKEN": "test"}
+        with mock.patch.dict(os.environ, env):
+            self.generator = DeploymentGenerator()
+        self.generator.single_flight = SingleFlight()
+        self.client = GaugedChatClient(latency=0.02)
+        self.generator.client = self.generator.diagram_generator.client = self.client
+        self.generator.cache = self.generator.diagram_generator.cache = CompletionCache(":memory:", enabled=False)
+        self.github = Gauge()
+        self.repos = {}
+        self.generator.gh = SimpleNamespace(get_repo=self._get_repo)
+
+        patches = [
+            mock.patch.object(main, "DeploymentGenerator", return_value=self.generator),
+            mock.patch.object(main, "load_predictor", return_value=None),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def _get_repo(self, name):
+        if name.endswith("/missing"):
+            raise UnknownObjectException(404, {"message": "Not Found"}, {})
+        return self.repos.setdefault(name, GaugedRepo(PATHS, self.github, latency=0.02))
+
+    def _run(self, lines, *options, on_line=None):
+        """Run batch mode over lines and return its exit code and the records in the order written."""
+        with tempfile.TemporaryDirectory() as tmp:
+            batch = os.path.join(tmp, "repos.txt")
+            with open(batch, "w", encoding="utf-8") as f:
+                f.write("\n".join(lines))
+            output = Output(on_line)
+            with mock.patch("sys.stdout", output):
+                code = main.run_batch(main.parse_args(["--batch", batch, *options]))
+        return code, [json.loads(line) for line in output.getvalue().splitlines()]
+
+    def test_one_failure_leaves_the_other_records(self):
+        """A repository that cannot be read is reported in its record while the others get their files."""
+        code, records = self._run([
+            "https://github.com/owner/one Vercel",
+            "https://github.com/owner/missing Vercel",
+            "https://github.com/owner/two, AWS",
+        ])
+        self.assertEqual(code, 1)
+        by_url = {record["repo_url"]: record for record in records}
+        self.assertEqual(len(by_url), 3)
+        self.assertIsNotNone(by_url["https://github.com/owner/missing"]["error"])
+        for name, platform, filename in (("one", "Vercel", "vercel.json"), ("two", "AWS", "Dockerfile")):
+            record = by_url[f"https://github.com/owner/{name}"]
+            self.assertIsNone(record["error"])
+            self.assertEqual((record["platform"], record["platform_source"]), (platform, "requested"))
+            self.assertIn(filename, record["files"])
+
+    def test_records_are_written_as_repositories_finish(self):
+        """A quick repository's record is written while a slower one is still being analyzed."""
+        first_written = threading.Event()
+        get_repo = self._get_repo
+
+        def slow_get_repo(name):
+            if name == "owner/slow":
+                self.assertTrue(first_written.wait(5), "no record was written before the batch ended")
+            return get_repo(name)
+
+        self.generator.gh = SimpleNamespace(get_repo=slow_get_repo)
+        code, records = self._run(
+            ["https://github.com/owner/slow Vercel", "https://github.com/owner/quick Vercel"],
+            "--workers", "2",
+            on_line=lambda record: first_written.set(),
+        )
+        self.assertEqual(code, 0)
+        self.assertEqual([record["repo_url"] for record in records],
+                         ["https://github.com/owner/quick", "https://github.com/owner/slow"])
+
+    def test_concurrency_limits(self):
+        """However many workers run, GitHub walks and completions stay within their own limits."""
+        lines = [f"https://github.com/owner/repo{i} Vercel" for i in range(8)]
+        code, records = self._run(lines, "--workers", "8", "--github-concurrency", "2", "--openai-concurrency", "3")
+        self.assertEqual((code, len(records)), (0, 8))
+        self.assertLessEqual(self.github.peak, 2)
+        self.assertLessEqual(self.client.gauge.peak, 3)
+        # The limits are reached, so the workers do overlap
+        self.assertEqual((self.github.peak, self.client.gauge.peak), (2, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+"""
+Tests for dplibraries.models.neighbor_index.
+"""
+
+import unittest
+
+import numpy as np
+
+from dplibraries.models.neighbor_index import (
+    BinaryNeighborIndex,
+    ExactNeighborIndex,
+    LSHNeighborIndex,
+    make_neighbor_index,
+    pack_bits,
+    popcount,
+)
+
+
+def brute_force_top_k(X, Q, k, exclude):
+    Xn = X / np.linalg.norm(X, axis=1, keepdims=True)
+    Qn = Q / np.linalg.norm(Q, axis=1, keepdims=True)
+    scores = Qn @ Xn.T
+    scores[np.arange(len(Q)), exclude] = -np.inf
+    return np.argsort(-scores, axis=1, kind="stable")[:, :k]
+
+
+class TestNeighborIndex(unittest.TestCase):
+    """Test cases for the neighbour index backends."""
+
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        self.X = rng.standard_normal((500, 20))
+        self.exclude = np.arange(0, 500, 5)
+        self.Q = self.X[self.exclude]
+
+    def test_exact_matches_brute_force_across_blocks(self):
+        """Blocked search returns the same neighbours as a full similarity matrix."""
+        index = ExactNeighborIndex(block_size=64).fit(self.X)
+        idx, scores = index.query(self.Q, 7, exclude=self.exclude)
+
+        np.testing.assert_array_equal(idx, brute_force_top_k(self.X, self.Q, 7, self.exclude))
+        self.assertTrue(np.all(np.diff(scores, axis=1) <= 0))
+
+    def test_approximate_recall(self):
+        """The hashing backend recovers most of the exact neighbours."""
+        index = LSHNeighborIndex(n_tables=16, n_bits=6).fit(self.X)
+        idx, _ = index.query(self.Q, 10, exclude=self.exclude)
+        expected = brute_force_top_k(self.X, self.Q, 10, self.exclude)
+
+        recall = np.mean([len(set(a) & set(b)) / 10 for a, b in zip(idx, expected)])
+        self.assertGreater(recall, 0.7)
+        self.assertFalse(np.any(idx == self.exclude[:, None]))
+
+    def test_approximate_batches_match_single_queries(self):
+        """Answering queries in batches gives each row the neighbours it gets on its own."""
+        index = LSHNeighborIndex(n_tables=4, n_bits=8, batch_size=32).fit(self.X)
+        idx, scores = index.query(self.Q, 10, exclude=self.exclude)
+        for i, row in enumerate(self.Q):
+            single_idx, single_scores = index.query(row, 10, exclude=self.exclude[i])
+            np.testing.assert_array_equal(idx[i], single_idx[0])
+            np.testing.assert_allclose(scores[i], single_scores[0])
+
+    def test_pack_bits_popcount(self):
+        """Packed rows keep one bit per feature and popcount recovers the row sums."""
+        rng = np.random.default_rng(1)
+        bits = rng.integers(0, 2, size=(40, 130))
+        words = pack_bits(bits)
+
+        self.assertEqual(words.shape, (40, 3))
+        self.assertEqual(words.dtype, np.uint64)
+        np.testing.assert_array_equal(popcount(words), bits.sum(axis=1))
+
+    def test_binary_jaccard_matches_brute_force(self):
+        """Popcount Jaccard search agrees with Jaccard computed on unpacked rows."""
+        rng = np.random.default_rng(2)
+        bits = rng.integers(0, 2, size=(300, 20))
+        exclude = np.arange(0, 300, 10)
+        index = BinaryNeighborIndex(metric="jaccard", block_size=32).fit(bits)
+        idx, scores = index.query(bits[exclude], 5, exclude=exclude)
+
+        inter = bits[exclude] @ bits.T
+        union = bits[exclude].sum(axis=1)[:, None] + bits.sum(axis=1)[None, :] - inter
+        expected = inter / union
+        expected[np.arange(len(exclude)), exclude] = -np.inf
+        np.testing.assert_allclose(scores, np.sort(expected, axis=1)[:, ::-1][:, :5])
+        self.assertFalse(np.any(idx == exclude[:, None]))
+
+    def test_unknown_backend(self):
+        """Unknown backend names are rejected."""
+        with self.assertRaises(ValueError):
+            make_neighbor_index("faiss")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+Tests for dplibraries.generators.project_structure.
+"""
+
+import unittest
+
+from dplibraries.generators.project_structure import DEFAULT_IGNORE, render_structure
+
+ENTRIES = [
+    ("assets", True),
+    *[(f"assets/img{i}.png", False) for i in range(5)],
+    ("node_modules", True),
+    ("node_modules/react", True),
+    ("node_modules/react/index.js", False),
+    ("package-lock.json", False),
+    ("package.json", False),
+    ("src", True),
+    ("src/app", True),
+    ("src/app/deep", True),
+    ("src/app/deep/file.py", False),
+    ("src/main.py", False),
+]
+
+
+class TestRenderStructure(unittest.TestCase):
+    """Test cases for render_structure."""
+
+    def test_unbounded_listing(self):
+        """Without budgets every entry is listed with two-space indentation."""
+        lines = list(render_structure(ENTRIES))
+        self.assertEqual(len(lines), len(ENTRIES))
+        self.assertIn("    deep/", lines)
+        self.assertIn("      file.py", lines)
+
+    def test_ignore_drops_subtrees(self):
+        """Ignored directories disappear with everything below them, lockfiles too."""
+        lines = list(render_structure(ENTRIES, ignore=DEFAULT_IGNORE))
+        self.assertNotIn("node_modules/", lines)
+        self.assertNotIn("    index.js", lines)
+        self.assertNotIn("package-lock.json", lines)
+        self.assertIn("package.json", lines)
+
+    def test_directory_budget_summarises(self):
+        """Entries beyond the per-directory budget are summarised under their directory."""
+        lines = list(render_structure(ENTRIES, max_dir_entries=2, ignore=DEFAULT_IGNORE))
+        self.assertEqual(lines[:4], ["assets/", "  img0.png", "  img1.png", "  … 3 more entries in assets/"])
+        self.assertEqual(lines[-1], "… 5 more entries at the top level")
+
+    def test_depth_budget_summarises(self):
+        """Entries below max_depth are counted against the deepest listed directory."""
+        lines = list(render_structure(ENTRIES, max_depth=2, ignore=DEFAULT_IGNORE))
+        self.assertIn("  app/", lines)
+        self.assertNotIn("    deep/", lines)
+        self.assertIn("    … 2 more entries in src/app/", lines)
+
+    def test_total_budget(self):
+        """max_entries bounds the listing and reports how much was left out."""
+        lines = list(render_structure(ENTRIES, max_entries=3))
+        self.assertEqual(lines[:3], ["assets/", "  img0.png", "  img1.png"])
+        self.assertEqual(lines[-1], f"… {len(ENTRIES) - 3} more entries not listed (limit of 3 reached)")
+
+    def test_lazy_when_not_counting(self):
+        """With count_hidden=False no entries past the budget are consumed."""
+        consumed = []
+
+        def entries():
+            for entry in ENTRIES:
+                consumed.append(entry)
+                yield entry
+
+        lines = list(render_structure(entries(), max_entries=2, count_hidden=False))
+        self.assertEqual(len(consumed), 3)
+        self.assertEqual(lines[-1], "… more entries not listed (limit of 2 reached)")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+"""
+Tests for dplibraries.generators.prompt_builder.
+"""
+
+import unittest
+
+from dplibraries.generators.prompt_builder import PromptBuilder, count_tokens, trim_structure
+
+STRUCTURE = "\n".join(
+    ["assets/"]
+    + [f"  image{i}.png" for i in range(400)]
+    + [".github/", "  workflows/", "    deploy.yml", "package.json", "src/", "  server/", "    main.py"]
+)
+
+
+class TestPromptBuilder(unittest.TestCase):
+    """Test cases for the token-budgeted prompt builder."""
+
+    def test_small_structure_unchanged(self):
+        """Structures within budget are embedded verbatim."""
+        builder = PromptBuilder(max_prompt_tokens=1000)
+        prompt = builder.build("Repo {repo_name}:\n{project_structure}", "src/\n  app.py", repo_name="demo")
+        self.assertEqual(prompt, "Repo demo:\nsrc/\n  app.py")
+
+    def test_trim_keeps_relevant_lines_and_parents(self):
+        """Trimming keeps manifests and entry points with their directories, in order."""
+        trimmed = trim_structure(STRUCTURE, 60)
+        lines = trimmed.splitlines()
+
+        self.assertLessEqual(count_tokens(trimmed), 60)
+        for line in (".github/", "  workflows/", "    deploy.yml", "package.json", "src/", "  server/", "    main.py"):
+            self.assertIn(line, lines)
+        self.assertLess(lines.index("  workflows/"), lines.index("    deploy.yml"))
+        self.assertTrue(lines[-1].endswith("lines omitted to fit the token budget"))
+
+    def test_build_fits_budget(self):
+        """The assembled prompt, template included, stays within max_prompt_tokens."""
+        builder = PromptBuilder(max_prompt_tokens=120)
+        prompt = builder.build("Describe {repo_name}.\n\nProject Structure:\n{project_structure}", STRUCTURE,
+                               repo_name="demo")
+        self.assertLessEqual(count_tokens(prompt), 120)
+        self.assertIn("package.json", prompt)
+
+    def test_usage_totals(self):
+        """Token totals only count calls that reached the API."""
+        builder = PromptBuilder()
+        builder.record("service_mapping", [{"role": "user", "content": "hi"}], prompt_tokens=10, completion_tokens=5)
+        builder.record("architecture_diagram", [{"role": "user", "content": "hi"}], cached=True)
+        self.assertEqual(
+            builder.totals(),
+            {"calls": 2, "cached_calls": 1, "prompt_tokens": 10, "completion_tokens": 5},
+        )
+
+    def test_usage_ledger_is_bounded(self):
+        """Only recent calls are kept one by one; the totals still cover every call."""
+        builder = PromptBuilder(max_usage_entries=3)
+        for _ in range(10):
+            builder.record("platform_files", [], prompt_tokens=2, completion_tokens=1)
+        self.assertEqual(len(builder.usage), 3)
+        self.assertEqual(builder.totals()["calls"], 10)
+        self.assertEqual(builder.stages["platform_files"]["prompt_tokens"], 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+"""
+Tests for dplibraries.service.
+"""
+
+import os
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import requests
+
+from dplibraries.agents.analysis_session import AnalysisSession
+from dplibraries.generators.completion_cache import CompletionCache
+from dplibraries.generators.deployment_generator import DeploymentGenerator
+from dplibraries.generators.single_flight import SingleFlight
+from dplibraries.service.jobs import JobQueue
+from dplibraries.service.server import DeployPilotService, make_server
+from tests.test_deployment_generator import PATHS, FakeChatClient, FakeRepo
+
+REPO_URL = "https://github.com/owner/repo"
+
+
+class TestService(unittest.TestCase):
+    """Test cases for the HTTP service over fake GitHub and OpenAI clients."""
+
+    def setUp(self):
+        env = {"OPENAI_API_KEY": "test", "GITHUB_TOKEN": "test"}
+        with mock.patch.dict(os.environ, env):
+            generator = DeploymentGenerator()
+        generator.single_flight = SingleFlight()
+        self.client = FakeChatClient()
+        generator.client = generator.diagram_generator.client = self.client
+        generator.cache = generator.diagram_generator.cache = CompletionCache(":memory:", enabled=False)
+        generator.gh = SimpleNamespace(get_repo=lambda name: FakeRepo(PATHS))
+
+        self.jobs = JobQueue(workers=2, github_concurrency=1, openai_concurrency=1).start()
+        self.addCleanup(self.jobs.stop)
+        self.service = DeployPilotService(AnalysisSession(generator), jobs=self.jobs)
+        server = make_server(self.service, port=0, wait=5)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.url = "http://%s:%s" % server.server_address[:2]
+
+    def _poll(self, job_id, timeout=5):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            job = requests.get(f"{self.url}/jobs/{job_id}").json()
+            if job["status"] in ("done", "failed"):
+                return job
+            time.sleep(0.02)
+        self.fail(f"job {job_id} did not finish")
+
+    def test_submit_and_poll_files(self):
+        """A submitted job answers 202 with its id and is polled until the files are ready."""
+        response = requests.post(f"{self.url}/jobs", json={"kind": "files", "repo_url": REPO_URL, "platform": "Vercel"})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.headers["Location"], f"/jobs/{response.json()['id']}")
+
+        job = self._poll(response.json()["id"])
+        self.assertEqual(job["status"], "done", job["error"])
+        self.assertEqual(job["result"]["recommendation"], "Vercel")
+        self.assertEqual(job["result"]["revision"], "c0ffee")
+        self.assertEqual(sorted(job["result"]["files"]),
+                         ["architecture_diagram.mmd", "service_mapping.json", "vercel.json"])
+
+    def test_requests_share_the_warm_analysis(self):
+        """A synchronous diagram request after the files reuses the diagram already generated."""
+        requests.post(f"{self.url}/files", json={"repo_url": REPO_URL, "platform": "AWS"})
+        calls = len(self.client.calls)
+
+        response = requests.post(f"{self.url}/diagram", json={"repo_url": REPO_URL})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["result"]["diagram"].startswith("graph TD"))
+        self.assertEqual(len(self.client.calls), calls)
+        self.assertEqual(requests.get(f"{self.url}/health").json()["jobs"]["done"], 2)
+
+    def test_predict_from_dataset_and_structure(self):
+        """The predictor answers for a dataset entry by name and for a repository by its structure."""
+        name = self.service.predictor.repositories[0]
+        by_name = requests.post(f"{self.url}/predict", json={"repository": name}).json()
+        by_url = requests.post(f"{self.url}/predict", json={"repo_url": REPO_URL, "n_similar": 3}).json()
+        self.assertEqual(by_name["status"], "done")
+        self.assertIn(by_name["result"]["prediction"], self.service.predictor.classes)
+        self.assertEqual(by_url["status"], "done")
+        self.assertIn(by_url["result"]["confidence"], (1 / 3, 2 / 3, 1.0))
+
+        missing = requests.post(f"{self.url}/predict", json={"repository": "nobody/nothing"})
+        self.assertEqual((missing.status_code, missing.json()["status"]), (500, "failed"))
+
+    def test_invalid_requests_are_rejected(self):
+        """Bad parameters are refused with 400 before anything is queued; unknown jobs are 404."""
+        bad = [
+            ("/files", {}),
+            ("/files", {"repo_url": "not a url"}),
+            ("/files", {"repo_url": REPO_URL, "platform": "Mainframe"}),
+            ("/predict", {"repository": "a", "repo_url": REPO_URL}),
+            ("/predict", {"repository": "a", "n_similar": True}),
+            ("/predict", {"repository": "a", "n_similar": 0}),
+            ("/jobs", {"kind": "deploy", "repo_url": REPO_URL}),
+        ]
+        for path, body in bad:
+            self.assertEqual(requests.post(self.url + path, json=body).status_code, 400, (path, body))
+        self.assertEqual(requests.get(f"{self.url}/jobs/unknown").status_code, 404)
+        self.assertEqual(sum(self.jobs.stats().values()), 0)
+
+    def test_stopped_queue_answers_503(self):
+        """Jobs submitted after the queue stopped are refused with 503 rather than an unhandled error."""
+        self.jobs.stop()
+        for path, body in (("/jobs", {"kind": "diagram", "repo_url": REPO_URL}), ("/diagram", {"repo_url": REPO_URL})):
+            response = requests.post(self.url + path, json=body)
+            self.assertEqual(response.status_code, 503, path)
+            self.assertIn("not started", response.json()["error"])
+
+
+class TestJobQueue(unittest.TestCase):
+    """Test cases for JobQueue."""
+
+    def test_github_calls_are_bounded(self):
+        """No more than github_concurrency blocking GitHub calls run at once, however many jobs are queued."""
+        running, peak, lock = [0], [0], threading.Lock()
+
+        def call():
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+            return "ok"
+
+        with JobQueue(workers=6, github_concurrency=2) as jobs:
+            async def handler():
+                return await jobs.github(call)
+
+            jobs.register("walk", handler)
+            submitted = [jobs.submit("walk", {}) for _ in range(6)]
+            for job in submitted:
+                self.assertTrue(job.done.wait(5))
+
+        self.assertEqual([job.result for job in submitted], ["ok"] * 6)
+        self.assertEqual(peak[0], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
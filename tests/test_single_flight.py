@@ -0,0 +1,66 @@
+"""
+Tests for dplibraries.generators.single_flight.
+"""
+
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from dplibraries.generators.single_flight import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Test cases for SingleFlight."""
+
+    def setUp(self):
+        self.flight = SingleFlight()
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.runs = 0
+
+    def _work(self, result="done"):
+        self.runs += 1
+        self.started.set()
+        self.release.wait(5)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def _run_concurrently(self, n, key, result="done"):
+        """Start n callers for key, release the leader once every follower has joined."""
+        executor = ThreadPoolExecutor(max_workers=n)
+        futures = [executor.submit(self.flight.do, key, lambda: self._work(result)) for _ in range(n)]
+        self.started.wait(5)
+        deadline = time.monotonic() + 5
+        while self.flight.stats()["shared"] < n - 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.release.set()
+        executor.shutdown(wait=True)
+        return futures
+
+    def test_concurrent_callers_share_one_call(self):
+        """Callers joining a running call get its result without running the work again."""
+        futures = self._run_concurrently(5, ("owner/repo", "c0ffee", "AWS", "platform_files"))
+        self.assertEqual([future.result() for future in futures], ["done"] * 5)
+        self.assertEqual(self.runs, 1)
+        self.assertEqual(self.flight.stats(), {"calls": 1, "shared": 4})
+        self.assertEqual(self.flight.in_flight(), 0)
+
+    def test_error_reaches_every_caller(self):
+        """A failing call raises its exception in every waiting caller, and the next call runs afresh."""
+        futures = self._run_concurrently(3, "key", ValueError("boom"))
+        for future in futures:
+            self.assertRaises(ValueError, future.result)
+        self.assertEqual(self.flight.do("key", lambda: "retried"), "retried")
+
+    def test_finished_call_is_not_remembered(self):
+        """Sequential calls with the same key each run."""
+        self.release.set()
+        self.flight.do("key", self._work)
+        self.flight.do("key", self._work)
+        self.assertEqual(self.runs, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+"""
+Tests for dplibraries.generators.tracing.
+"""
+
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from dplibraries.generators import tracing
+from dplibraries.generators.completion_cache import CompletionCache
+from dplibraries.generators.deployment_generator import DeploymentGenerator
+from dplibraries.generators.single_flight import SingleFlight
+from dplibraries.generators.tracing import PrometheusExporter, Tracer
+from tests.test_deployment_generator import FakeChatClient
+
+
+class RecordingExporter:
+    """Exporter keeping every finished span."""
+
+    def __init__(self):
+        self.spans = []
+
+    def on_start(self, span):
+        pass
+
+    def on_end(self, span):
+        self.spans.append(span)
+
+
+class TestTracer(unittest.TestCase):
+    """Test cases for Tracer and its exporters."""
+
+    def setUp(self):
+        self.exporter = RecordingExporter()
+        self.tracer = Tracer([self.exporter])
+
+    def test_spans_nest_across_wrapped_threads(self):
+        """Spans opened on a thread started with wrap keep the span that was open when it was wrapped."""
+        with self.tracer.span("outer"):
+            with self.tracer.span("inner"):
+                pass
+
+            def work():
+                with self.tracer.span("worker"):
+                    pass
+
+            thread = threading.Thread(target=self.tracer.wrap(work))
+            thread.start()
+            thread.join()
+            with self.tracer.span("stream", activate=False):
+                with self.tracer.span("sibling"):
+                    pass
+
+        parents = {span.name: span.parent.name if span.parent else None for span in self.exporter.spans}
+        self.assertEqual(parents, {"inner": "outer", "worker": "outer", "sibling": "outer", "stream": "outer",
+                                   "outer": None})
+        self.assertIsNone(self.tracer.current)
+
+    def test_summary_sums_numeric_attributes(self):
+        """Calls, errors and numeric attributes are aggregated per span name."""
+        for tokens in (10, 30):
+            with self.tracer.span("openai.completion", model="m", prompt_tokens=tokens, cache_hits=0):
+                pass
+        with self.assertRaises(ValueError):
+            with self.tracer.span("openai.completion", cache_hits=1):
+                raise ValueError("boom")
+
+        (row,) = self.tracer.summary()
+        self.assertEqual((row["span"], row["calls"], row["errors"]), ("openai.completion", 3, 1))
+        self.assertEqual((row["prompt_tokens"], row["cache_hits"]), (40, 1))
+        self.assertNotIn("model", row)
+        self.assertLessEqual(row["p50_s"], row["p95_s"])
+
+        self.tracer.reset()
+        self.assertEqual(self.tracer.summary(), [])
+
+    def test_prometheus_file_written_when_root_span_ends(self):
+        """The text file appears once the top-level span ends and holds one series per span and attribute."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "deploypilot.prom")
+            self.tracer.add_exporter(PrometheusExporter(path))
+            with self.tracer.span("repository"):
+                with self.tracer.span("github.structure", requests=3):
+                    pass
+                self.assertFalse(os.path.exists(path))
+            with open(path) as f:
+                text = f.read()
+
+        self.assertIn('deploypilot_span_seconds_count{span="repository"} 1', text)
+        self.assertIn('deploypilot_span_value_total{span="github.structure",attribute="requests"} 3', text)
+        self.assertIn("# TYPE deploypilot_span_errors_total counter", text)
+
+
+class TestInstrumentation(unittest.TestCase):
+    """Test cases for the spans recorded by the generators."""
+
+    def setUp(self):
+        self.exporter = RecordingExporter()
+        self.tracer = Tracer([self.exporter])
+        patcher = mock.patch.object(tracing, "_default_tracer", self.tracer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        env = {"OPENAI_API_KEY": "test", "GITHUB_TOKEN": "test"}
+        with mock.patch.dict(os.environ, env):
+            self.generator = DeploymentGenerator()
+        self.generator.single_flight = SingleFlight()
+        self.generator.client = self.generator.diagram_generator.client = FakeChatClient()
+        cache = CompletionCache(":memory:")
+        self.generator.cache = self.generator.diagram_generator.cache = cache
+        self.generator.diagram_generator.refine = True
+
+    def test_completion_spans_count_cache_hits(self):
+        """Each completion is a child of generate_files, and a cached rerun shows up as cache hits."""
+        for _ in range(2):
+            self.generator.generate_files("Vercel", "repo", project_structure="app.py")
+
+        completions = [span for span in self.exporter.spans if span.name == "openai.completion"]
+        self.assertEqual({span.parent.name for span in completions}, {"generate_files"})
+        self.assertEqual({span.attributes["stage"] for span in completions},
+                         {"service_mapping", "architecture_diagram", "platform_files"})
+
+        rows = {row["span"]: row for row in self.tracer.summary()}
+        self.assertEqual(rows["generate_files"]["calls"], 2)
+        self.assertEqual((rows["openai.completion"]["calls"], rows["openai.completion"]["cache_hits"]), (6, 3))
+
+    def test_stream_span_stays_open_until_stream_ends(self):
+        """A streamed completion records its tokens once the last piece is read."""
+        events = list(self.generator.stream_files("Vercel", "repo", project_structure="app.py"))
+        self.assertEqual(events[-1][0], "files")
+
+        (row,) = [row for row in self.tracer.summary() if row["span"] == "openai.completion"]
+        self.assertEqual((row["calls"], row["cache_hits"]), (3, 0))
+        self.assertEqual(row["prompt_tokens"], 30)
+
+
+if __name__ == '__main__':
+    unittest.main()